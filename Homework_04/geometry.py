@@ -0,0 +1,184 @@
+"""
+Shared unit meshes for the scene primitives.
+
+Each (primitive, tessellation level) is built once as an interleaved
+normal/position array plus a uint32 index buffer, uploaded to a VBO/IBO on
+first use and then drawn with a single glDrawElements call. Objects place
+the unit mesh with glTranslate/glScale, so hundreds of spheres share one
+tessellation instead of re-running gluSphere every frame.
+"""
+import math
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError, NullFunctionError
+
+
+# -------------------------
+# Unit mesh builders
+# -------------------------
+def build_sphere(level):
+    """
+    Unit-radius sphere with level slices and level stacks, laid out like
+    gluSphere (poles on the z axis) so it shades the same.
+    Returns (vertices, indices): vertices is (N, 6) float32 rows of
+    (nx, ny, nz, x, y, z).
+    """
+    slices = stacks = level
+    theta = np.linspace(0.0, 2.0 * math.pi, slices + 1)
+    phi = np.linspace(0.0, math.pi, stacks + 1)
+    sin_phi, cos_phi = np.sin(phi)[:, None], np.cos(phi)[:, None]
+
+    x = sin_phi * np.sin(theta)[None, :]
+    y = sin_phi * np.cos(theta)[None, :]
+    z = np.broadcast_to(cos_phi, x.shape)
+    points = np.stack([x, y, z], axis=2).reshape(-1, 3)
+
+    # Two triangles per grid cell, wound counter-clockwise seen from outside
+    j, i = np.meshgrid(np.arange(stacks), np.arange(slices), indexing="ij")
+    a = (j * (slices + 1) + i).reshape(-1)
+    b = a + slices + 1
+    upper = np.stack([a, a + 1, b + 1], axis=1)
+    lower = np.stack([a, b + 1, b], axis=1)
+
+    # Drop the zero-area triangles that touch the poles
+    cell_row = j.reshape(-1)
+    upper = upper[cell_row != 0]
+    lower = lower[cell_row != stacks - 1]
+    indices = np.concatenate([upper, lower]).reshape(-1)
+
+    vertices = np.hstack([points, points]).astype(np.float32)
+    return vertices, indices.astype(np.uint32)
+
+
+# Face normal and its four corners for a unit cube (side 1, centered)
+BOX_FACES = [
+    ((0.0, 0.0, 1.0), [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]),
+    ((0.0, 0.0, -1.0), [(-1, -1, -1), (-1, 1, -1), (1, 1, -1), (1, -1, -1)]),
+    ((0.0, 1.0, 0.0), [(-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1)]),
+    ((0.0, -1.0, 0.0), [(-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1)]),
+    ((1.0, 0.0, 0.0), [(1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1)]),
+    ((-1.0, 0.0, 0.0), [(-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1)]),
+]
+
+
+def build_box(level=1):
+    """Unit cube, 4 vertices per face so every face keeps a flat normal."""
+    rows = []
+    for normal, corners in BOX_FACES:
+        for corner in corners:
+            rows.append(normal + tuple(0.5 * c for c in corner))
+    vertices = np.array(rows, dtype=np.float32)
+
+    quad = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    indices = (np.arange(len(BOX_FACES), dtype=np.uint32)[:, None] * 4 + quad).reshape(-1)
+    return vertices, indices
+
+
+BUILDERS = {
+    "sphere": build_sphere,
+    "box": build_box,
+}
+
+
+# -------------------------
+# GPU mesh
+# -------------------------
+class CachedMesh:
+    def __init__(self, vertices, indices):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self.use_buffers = True
+        self.vbo = None
+        self.ibo = None
+
+    def upload(self):
+        self.vbo, self.ibo = (int(b) for b in glGenBuffers(2))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        if self.use_buffers:
+            try:
+                self.draw_buffers()
+                return
+            except (GLError, NullFunctionError):
+                # No buffer-object support: draw from client-side arrays instead
+                self.use_buffers = False
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(GL_N3F_V3F, 0, self.vertices)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, self.indices)
+        glPopClientAttrib()
+
+    def draw_buffers(self):
+        if self.vbo is None:
+            self.upload()
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glInterleavedArrays(GL_N3F_V3F, 0, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glPopClientAttrib()
+
+    def draw_instanced(self, count):
+        """
+        Draw count instances from the VBO. The caller binds the shader and
+        the per-instance attributes and saves/restores client state.
+        """
+        if self.vbo is None:
+            self.upload()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glInterleavedArrays(GL_N3F_V3F, 0, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glDrawElementsInstanced(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, None, count)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        if self.vbo is not None:
+            glDeleteBuffers(2, [self.vbo, self.ibo])
+        self.vbo = self.ibo = None
+
+
+# -------------------------
+# Cache
+# -------------------------
+class GeometryCache:
+    """Unit meshes keyed by (primitive, tessellation level), built on first use."""
+
+    def __init__(self):
+        self.meshes = {}
+
+    def get(self, primitive, level=1):
+        key = (primitive, level)
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            mesh = CachedMesh(*BUILDERS[primitive](level))
+            self.meshes[key] = mesh
+        return mesh
+
+    def draw(self, primitive, level=1):
+        self.get(primitive, level).draw()
+
+    def release(self):
+        # Free the GPU buffers, e.g. before the GL context goes away
+        for mesh in self.meshes.values():
+            mesh.release()
+        self.meshes.clear()
+
+
+geometry_cache = GeometryCache()
@@ -0,0 +1,173 @@
+"""
+Instanced drawing of opaque scene objects.
+
+Objects that share a unit mesh (same primitive and tessellation) are packed
+into one per-instance attribute buffer (position, scale, color, specular
+strength, shininess) and drawn with a single glDrawElementsInstanced call.
+The fixed-function pipeline has no instancing, so a small GLSL 1.20 program
+reproduces its per-vertex lighting for GL_LIGHT0. When shaders or
+instanced arrays are unavailable the scene keeps drawing object by object.
+"""
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.error import GLError, NullFunctionError
+
+from geometry import geometry_cache
+
+
+VERTEX_SHADER = """
+#version 120
+
+attribute vec4 instance_offset_scale;  // xyz: position, w: uniform scale
+attribute vec4 instance_color;
+attribute vec2 instance_material;      // x: specular strength, y: shininess
+
+varying vec4 lit_color;
+
+void main()
+{
+    vec4 eye = gl_ModelViewMatrix *
+        vec4(gl_Vertex.xyz * instance_offset_scale.w + instance_offset_scale.xyz, 1.0);
+    gl_Position = gl_ProjectionMatrix * eye;
+
+    // Same terms as fixed-function lighting with one light, infinite viewer
+    vec3 n = normalize(gl_NormalMatrix * gl_Normal);
+    vec4 light_pos = gl_LightSource[0].position;
+    vec3 l = light_pos.xyz - eye.xyz * light_pos.w;
+    float dist = length(l);
+    l = l / dist;
+
+    float attenuation = 1.0;
+    if (light_pos.w != 0.0) {
+        attenuation = 1.0 / (gl_LightSource[0].constantAttenuation +
+                             gl_LightSource[0].linearAttenuation * dist +
+                             gl_LightSource[0].quadraticAttenuation * dist * dist);
+    }
+
+    float n_dot_l = max(dot(n, l), 0.0);
+    float spec = 0.0;
+    if (n_dot_l > 0.0) {
+        vec3 h = normalize(l + vec3(0.0, 0.0, 1.0));
+        spec = pow(max(dot(n, h), 0.0), instance_material.y);
+    }
+
+    vec3 base = instance_color.rgb;
+    vec3 color = base * gl_LightModel.ambient.rgb + attenuation * (
+        base * gl_LightSource[0].ambient.rgb +
+        n_dot_l * base * gl_LightSource[0].diffuse.rgb +
+        spec * instance_material.x * gl_LightSource[0].specular.rgb);
+
+    lit_color = vec4(clamp(color, 0.0, 1.0), instance_color.a);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+
+varying vec4 lit_color;
+
+void main()
+{
+    gl_FragColor = lit_color;
+}
+"""
+
+# (name, attribute location, float count) in packed row order. Locations avoid
+# 0, 2, 3 and 8+, which some drivers alias to gl_Vertex, gl_Normal, gl_Color
+# and the texture coordinates.
+INSTANCE_ATTRIBUTES = [
+    ("instance_offset_scale", 1, 4),
+    ("instance_color", 6, 4),
+    ("instance_material", 7, 2),
+]
+INSTANCE_FLOATS = sum(size for _, _, size in INSTANCE_ATTRIBUTES)
+
+
+def pack_instances(store, rows):
+    """(N, INSTANCE_FLOATS) float32 rows matching INSTANCE_ATTRIBUTES."""
+    data = np.empty((len(rows), INSTANCE_FLOATS), dtype=np.float32)
+    data[:, 0:3] = store.position[rows]
+    data[:, 3] = store.scale[rows]
+    data[:, 4:8] = store.color[rows]
+    data[:, 8] = store.material[rows, 1]   # specular strength
+    data[:, 9] = store.material[rows, 0]   # shininess
+    return data
+
+
+class InstanceRenderer:
+    def __init__(self):
+        self.program = None
+        self.instance_vbo = None
+        self.available = None   # None until the first ready() check
+
+    def ready(self):
+        if self.available is None:
+            self.available = self.init_gl()
+        return self.available
+
+    def init_gl(self):
+        if not (bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)):
+            return False
+        try:
+            program = glCreateProgram()
+            glAttachShader(program, shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER))
+            glAttachShader(program, shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+            for name, location, _ in INSTANCE_ATTRIBUTES:
+                glBindAttribLocation(program, location, name)
+            glLinkProgram(program)
+            if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+                glDeleteProgram(program)
+                return False
+
+            self.program = program
+            self.instance_vbo = int(glGenBuffers(1))
+            return True
+        except (GLError, NullFunctionError, RuntimeError):
+            return False
+
+    def draw(self, store, groups):
+        """groups: {(primitive, level): store rows} of opaque, unselected objects."""
+        glDisable(GL_BLEND)
+        glDepthMask(GL_TRUE)
+        glUseProgram(self.program)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        try:
+            for (primitive, level), rows in groups.items():
+                data = pack_instances(store, rows)
+
+                glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+                glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+                self.bind_instance_attributes()
+
+                geometry_cache.get(primitive, level).draw_instanced(len(rows))
+        finally:
+            self.unbind_instance_attributes()
+            glPopClientAttrib()
+            glUseProgram(0)
+
+    def bind_instance_attributes(self):
+        stride = INSTANCE_FLOATS * 4
+        offset = 0
+        for _, location, size in INSTANCE_ATTRIBUTES:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+            glVertexAttribDivisor(location, 1)
+            offset += size * 4
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def unbind_instance_attributes(self):
+        for _, location, _ in INSTANCE_ATTRIBUTES:
+            glVertexAttribDivisor(location, 0)
+            glDisableVertexAttribArray(location)
+
+    def release(self):
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            glDeleteBuffers(1, [self.instance_vbo])
+        self.program = self.instance_vbo = None
+        self.available = None
+
+
+instance_renderer = InstanceRenderer()
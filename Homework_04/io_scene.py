@@ -1,50 +1,298 @@
+"""
+Saving and loading scenes.
+
+Scenes are saved in a binary column format: the scene store's columns are
+written as typed blocks, so saving and loading never go through per-object
+dicts. Uncompressed blocks are read with mmap straight into NumPy arrays;
+compressed ones (zlib, or zstd with the zstandard package) are decoded
+when their column is first read. JSON stays as the readable interchange
+format (export_json); load_scene reads both.
+
+Scene file layout (little endian):
+  magic b"HW4S" | version u32 | codec u32 | object count u64 | column count u32
+  one entry per column:
+    name 16s | dtype 8s (NumPy dtype str, e.g. "<f4") | components u32 |
+    offset u64 | stored size u64
+  column blocks at their offsets (64-byte aligned), count * components
+  values each, compressed with the file's codec (0 none, 1 zlib, 2 zstd)
+"""
+import os
 import json
-from objects import SphereObject, BoxObject
+import mmap
+import struct
+import zlib
+import numpy as np
+from objects import PRIMITIVES
+from store import COLUMNS
+
+# zstd is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+SCENE_FILE = "scene.bin"
+JSON_FILE = "scene.json"
+
+MAGIC = b"HW4S"
+VERSION = 1
+HEADER = struct.Struct("<4sIIQI")
+COLUMN_ENTRY = struct.Struct("<16s8sIQQ")
+BLOCK_ALIGN = 64
+
+CODECS = {None: 0, "zlib": 1, "zstd": 2}
+
+# Store columns kept in a scene file (selection and LOD are not)
+SAVED_COLUMNS = ("type_id", "position", "scale", "color", "material")
+
+# JSON object type <-> store type id, and the key of its scale
+JSON_TYPES = {name: type_id for type_id, name in PRIMITIVES.items()}
+JSON_SCALE_KEYS = {"sphere": "radius", "box": "size"}
+
+
+# -------------------------
+# Binary scene files
+# -------------------------
+def compress(data, codec):
+    if codec == CODECS["zlib"]:
+        return zlib.compress(data, 6)
+    if codec == CODECS["zstd"]:
+        return zstd_module().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data, codec, size):
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(data, bufsize=max(size, 1))
+    if codec == CODECS["zstd"]:
+        return zstd_module().ZstdDecompressor().decompress(data, max_output_size=size)
+    return data
+
+
+def zstd_module():
+    if zstandard is None:
+        raise ValueError("zstd needs zstandard. Install with: python -m pip install zstandard")
+    return zstandard
+
+
+def write_scene_file(store, filename, compression=None):
+    if compression not in CODECS:
+        raise ValueError(f"Unknown compression {compression!r} (use one of {list(CODECS)})")
+    codec = CODECS[compression]
+    count = store.count
+
+    blocks = []
+    for name in SAVED_COLUMNS:
+        column = getattr(store, name)[:count]
+        column = np.ascontiguousarray(column, dtype=column.dtype.newbyteorder("<"))
+        components = column.shape[1] if column.ndim > 1 else 1
+        blocks.append((name, column.dtype.str, components, compress(column.tobytes(), codec)))
+
+    offset = HEADER.size + COLUMN_ENTRY.size * len(blocks)
+    table = []
+    for name, dtype, components, data in blocks:
+        offset = -(-offset // BLOCK_ALIGN) * BLOCK_ALIGN
+        table.append(COLUMN_ENTRY.pack(name.encode(), dtype.encode(), components, offset, len(data)))
+        offset += len(data)
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, codec, count, len(blocks)))
+        f.write(b"".join(table))
+        for entry, (_, _, _, data) in zip(table, blocks):
+            block_offset = COLUMN_ENTRY.unpack(entry)[3]
+            f.write(b"\0" * (block_offset - f.tell()))
+            f.write(data)
+
+
+class SceneFile:
+    """
+    An open scene file. Only the header and column table are read up
+    front; column(name) maps or decodes one block on first use. Arrays of
+    an uncompressed file are read-only views of the mapping; drop them
+    before close() so the mapping can be unmapped there.
+    """
+
+    def __init__(self, filename):
+        self.cache = {}
+        self.file = open(filename, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file (mmap cannot map zero bytes)
+            self.file.close()
+            raise ValueError("empty file")
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError("truncated header")
+        magic, version, self.codec, self.count, n_columns = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or self.codec not in CODECS.values():
+            self.close()
+            raise ValueError("not a scene file of this version")
+
+        self.entries = {}
+        for i in range(n_columns):
+            name, dtype, components, offset, size = COLUMN_ENTRY.unpack_from(
+                self.map, HEADER.size + i * COLUMN_ENTRY.size)
+            if offset + size > len(self.map):
+                self.close()
+                raise ValueError("truncated column block")
+            name = name.rstrip(b"\0").decode()
+            self.entries[name] = (np.dtype(dtype.rstrip(b"\0").decode()), components, offset, size)
 
+    def __enter__(self):
+        return self
 
-def save_scene(scene, filename="scene.json"):
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def column(self, name):
+        """(count,) or (count, components) array of one column."""
+        array = self.cache.get(name)
+        if array is not None:
+            return array
+        if name not in self.entries:
+            raise ValueError(f"missing column '{name}'")
+
+        dtype, components, offset, size = self.entries[name]
+        raw_size = self.count * components * dtype.itemsize
+        if self.codec == CODECS[None]:
+            if size != raw_size:
+                raise ValueError(f"column '{name}' has the wrong size")
+            array = np.frombuffer(self.map, dtype=dtype, count=self.count * components, offset=offset)
+        else:
+            data = decompress(self.map[offset:offset + size], self.codec, raw_size)
+            if len(data) != raw_size:
+                raise ValueError(f"column '{name}' has the wrong size")
+            array = np.frombuffer(data, dtype=dtype)
+        if components > 1:
+            array = array.reshape(self.count, components)
+        self.cache[name] = array
+        return array
+
+    def columns(self, names=SAVED_COLUMNS):
+        return {name: self.column(name) for name in names}
+
+    def close(self):
+        self.cache.clear()
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # Column arrays still alive; the mapping closes with them
+                pass
+            self.map = None
+        self.file.close()
+
+
+def is_scene_file(filename):
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def known_types(columns):
+    # Drop rows of object types this version does not know
+    type_ids = columns["type_id"]
+    known = np.isin(type_ids, list(PRIMITIVES))
+    if known.all():
+        return columns
+    print(f"Warning: {int((~known).sum())} objects of unknown type, skipping")
+    return {name: values[known] for name, values in columns.items()}
+
+
+# -------------------------
+# JSON interchange
+# -------------------------
+def export_json(scene, filename=JSON_FILE):
     data = {
         'version': '1.0',
         'objects': []
     }
-    
+
     for obj in scene.objects:
         data['objects'].append(obj.to_dict())
-    
+
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
-    
+
+    print(f"Scene exported to {filename} ({len(scene.objects)} objects)")
+
+
+def json_columns(data):
+    """Store columns for the objects of a JSON scene (see export_json)."""
+    records, type_ids, scales = [], [], []
+    for obj_data in data.get('objects', []):
+        obj_type = obj_data.get('type')
+        if obj_type not in JSON_TYPES:
+            print(f"Warning: Unknown object type '{obj_type}', skipping")
+            continue
+        records.append(obj_data)
+        type_ids.append(JSON_TYPES[obj_type])
+        scales.append(obj_data[JSON_SCALE_KEYS[obj_type]])
+
+    n = len(records)
+    return {
+        'type_id': np.array(type_ids, dtype=COLUMNS['type_id'][1]),
+        'position': np.array([d['position'] for d in records], dtype=np.float32).reshape(n, 3),
+        'scale': np.array(scales, dtype=np.float32),
+        'color': np.array([d['color'] for d in records], dtype=np.float32).reshape(n, 4),
+        'material': np.array([(d['shininess'], d['specular_strength']) for d in records],
+                             dtype=np.float32).reshape(n, 2),
+    }
+
+
+# -------------------------
+# Save / load
+# -------------------------
+def save_scene(scene, filename=SCENE_FILE, compression=None):
+    """
+    Save scene as a binary scene file, or as JSON when filename ends in
+    .json. compression: None (loads fastest, via mmap), "zlib" or "zstd".
+    """
+    if filename.endswith('.json'):
+        export_json(scene, filename)
+        return
+
+    write_scene_file(scene.store, filename, compression)
     print(f"Scene saved to {filename} ({len(scene.objects)} objects)")
 
 
-def load_scene(scene, filename="scene.json"):
+def load_scene(scene, filename=None):
+    """
+    Replace scene's objects with those of a binary or JSON scene file.
+    By default loads scene.bin, or scene.json when there is no binary save.
+    """
+    if filename is None:
+        filename = SCENE_FILE if os.path.exists(SCENE_FILE) else JSON_FILE
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-    
-        scene.clear()
-        
-        for obj_data in data.get('objects', []):
-            obj_type = obj_data.get('type')
-            
-            if obj_type == 'sphere':
-                obj = SphereObject.from_dict(obj_data)
-                scene.add_object(obj)
-            elif obj_type == 'box':
-                obj = BoxObject.from_dict(obj_data)
-                scene.add_object(obj)
-            else:
-                print(f"Warning: Unknown object type '{obj_type}', skipping")
-        
+        if is_scene_file(filename):
+            with SceneFile(filename) as scene_file:
+                columns = known_types(scene_file.columns())
+                scene.clear()
+                scene.add_columns(columns)
+                # Views of the mapping must go before it is closed
+                del columns
+        else:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+            columns = json_columns(data)
+            scene.clear()
+            scene.add_columns(columns)
+
         print(f"Scene loaded from {filename} ({len(scene.objects)} objects)")
         return True
-        
+
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found")
         return False
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in '{filename}': {e}")
         return False
+    except ValueError as e:
+        print(f"Error: Invalid scene file '{filename}': {e}")
+        return False
     except Exception as e:
         print(f"Error loading scene: {e}")
         return False
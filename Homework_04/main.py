@@ -3,21 +3,22 @@ Interactive Scene Editor - Part C Challenge Homework
 All features C1-C6 implemented
 """
 import os
+import sys
 import math
 import pygame
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
-# Pillow (PIL) for loading textures
-try:
-    from PIL import Image
-except ImportError:
-    raise SystemExit("Missing Pillow. Install with: python -m pip install Pillow")
-
 # Import our modules
 from scene import Scene, initialize_default_scene
 from picking import pick_object
-from io_scene import save_scene, load_scene
+from io_scene import save_scene, load_scene, export_json
+from profiler import profiler
+
+# Overlay text and texture loading shared with the Lab 10 scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Lab_10"))
+from text_overlay import TextRenderer
+from texture_manager import texture_manager
 
 # -------------------------
 # Config
@@ -45,6 +46,12 @@ light_pos = [0.0, 6.0, 2.0, 1.0]
 # C5: Control mode (camera vs light)
 control_mode = "camera"  # "camera" or "light"
 
+# Profiler details and frame-time graph in the overlay (F3)
+show_profiler = False
+
+# Frame-time graph (bottom-left, pixels)
+GRAPH_X, GRAPH_W, GRAPH_H = 10, 240, 80
+
 
 # -------------------------
 # Small math helpers
@@ -69,64 +76,8 @@ def cross(a, b):
 
 
 # -------------------------
-# Texture loading (floor)
-# -------------------------
-def load_texture(path: str) -> int:
-    """Load an image as an OpenGL RGB texture with GL_REPEAT tiling."""
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Texture not found: {path}")
-
-    tex = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, tex)
-
-    img = Image.open(path).convert("RGB").transpose(Image.FLIP_TOP_BOTTOM)
-    data = img.tobytes()
-
-    glTexImage2D(
-        GL_TEXTURE_2D, 0, GL_RGB,
-        img.width, img.height, 0,
-        GL_RGB, GL_UNSIGNED_BYTE, data
-    )
-
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-
-    # Repeat pattern across the floor
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-
-    glBindTexture(GL_TEXTURE_2D, 0)
-    return tex
-
-
-# -------------------------
-# OpenGL overlay text (PyGame font -> GL texture)
+# 2D overlay
 # -------------------------
-def create_text_texture(font, text, color=(255, 255, 255), bg=(0, 0, 0, 180)):
-    """
-    Render text to a PyGame RGBA surface, upload it as an OpenGL texture.
-    Returns (tex_id, w, h).
-    """
-    text_surf = font.render(text, True, color)
-    w, h = text_surf.get_size()
-
-    box = pygame.Surface((w + 10, h + 6), pygame.SRCALPHA)
-    box.fill(bg)
-    box.blit(text_surf, (5, 3))
-
-    tex_data = pygame.image.tostring(box, "RGBA", True)
-    tw, th = box.get_size()
-
-    tex_id = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, tex_id)
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, tw, th, 0, GL_RGBA, GL_UNSIGNED_BYTE, tex_data)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glBindTexture(GL_TEXTURE_2D, 0)
-
-    return tex_id, tw, th
-
-
 def begin_2d():
     """Switch to 2D pixel coordinate rendering (0,0)=top-left."""
     glMatrixMode(GL_PROJECTION)
@@ -159,25 +110,6 @@ def end_2d():
     glMatrixMode(GL_MODELVIEW)
 
 
-def draw_tex_2d(tex_id, x, y, w, h):
-    glDisable(GL_CULL_FACE)           # ensure it can’t be culled
-    glEnable(GL_TEXTURE_2D)
-    glBindTexture(GL_TEXTURE_2D, tex_id)
-
-    glColor4f(1, 1, 1, 1)
-    glBegin(GL_QUADS)
-    # Correct mapping for glOrtho(0, W, H, 0, ...) (top-left origin)
-    glTexCoord2f(0, 1); glVertex2f(x,     y)      # top-left
-    glTexCoord2f(1, 1); glVertex2f(x + w, y)      # top-right
-    glTexCoord2f(1, 0); glVertex2f(x + w, y + h)  # bottom-right
-    glTexCoord2f(0, 0); glVertex2f(x,     y + h)  # bottom-left
-    glEnd()
-
-    glBindTexture(GL_TEXTURE_2D, 0)
-    glDisable(GL_TEXTURE_2D)
-
-
-
 # -------------------------
 # Scene setup
 # -------------------------
@@ -263,7 +195,7 @@ def draw_floor(tex):
 # Input
 # -------------------------
 def handle_input(scene):
-    global last_mouse, orbiting, panning, zooming, yaw, pitch, distance, target, light_pos, control_mode
+    global last_mouse, orbiting, panning, zooming, yaw, pitch, distance, target, light_pos, control_mode, show_profiler
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -283,13 +215,25 @@ def handle_input(scene):
                 save_scene(scene)
             if event.key == pygame.K_l and (mods & pygame.KMOD_CTRL):
                 load_scene(scene)
+            if event.key == pygame.K_e and (mods & pygame.KMOD_CTRL):
+                export_json(scene)
+
+            # Profiler: F3 shows phase times and the graph, F4 records a trace
+            if event.key == pygame.K_F3:
+                show_profiler = not show_profiler
+            if event.key == pygame.K_F4:
+                if profiler.recording:
+                    profiler.stop_recording()
+                else:
+                    profiler.start_recording()
 
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1:
                 # C2: Picking on left click (without dragging)
                 if not orbiting:
                     mouse = pygame.mouse.get_pos()
-                    picked = pick_object(mouse[0], mouse[1], WIN_W, WIN_H, scene.objects)
+                    with profiler.scope("pick"):
+                        picked = pick_object(mouse[0], mouse[1], WIN_W, WIN_H, scene.objects, scene.picking_bvh())
                     scene.select_object(picked)
                     if picked:
                         print(f"Selected object at {picked.position}")
@@ -307,6 +251,7 @@ def handle_input(scene):
     keys = pygame.key.get_pressed()
     mods = pygame.key.get_mods()
     shift = (mods & pygame.KMOD_SHIFT) != 0
+    ctrl = (mods & pygame.KMOD_CTRL) != 0
     
     # C5: Light control mode
     if control_mode == "light":
@@ -325,7 +270,7 @@ def handle_input(scene):
         if keys[pygame.K_w]: light_pos[2] -= 0.2
         if keys[pygame.K_s]: light_pos[2] += 0.2
         if keys[pygame.K_q]: light_pos[1] += 0.2
-        if keys[pygame.K_e]: light_pos[1] -= 0.2
+        if keys[pygame.K_e] and not ctrl: light_pos[1] -= 0.2  # Ctrl+E exports JSON
     
     # C3: Transform controls (move selected object)
     selected = scene.get_selected()
@@ -389,18 +334,26 @@ def main():
     # C1: Initialize scene with 10+ objects
     scene = initialize_default_scene()
 
-    # Load floor texture
-    tex = load_texture("floor.jpg")
+    # Load floor texture (shared and cached on disk; no mipmaps, as before).
+    # It streams in over the first frames, grey until then
+    tex = texture_manager.load_async("floor.jpg", mipmaps=False)
 
     clock = pygame.time.Clock()
     running = True
     
-    # For dynamic overlay text
-    overlay_tex = []
+    # Overlay text; only changed lines are laid out again
+    text = TextRenderer(font)
 
     try:
         while running:
-            running = handle_input(scene)
+            # Phases of the frame are timed by the profiler (F3 / F4)
+            profiler.begin_frame()
+            with profiler.scope("input"):
+                running = handle_input(scene)
+
+            # Upload the next part of the floor texture while it streams
+            with profiler.scope("textures", gpu=True):
+                texture_manager.update()
 
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
@@ -408,10 +361,12 @@ def main():
 
             glLightfv(GL_LIGHT0, GL_POSITION, light_pos)
 
-            draw_floor(tex)
+            with profiler.scope("floor", gpu=True):
+                draw_floor(tex)
             
             eye, _, _ = get_eye_and_basis()
-            scene.render(eye)
+            with profiler.scope("scene", gpu=True):
+                scene.render(eye)
 
             selected = scene.get_selected()
             overlay_lines = [
@@ -421,34 +376,30 @@ def main():
                 "Camera: Left-drag orbit | Shift+Left or Middle pan | Right-drag or Wheel zoom",
                 "Light (camera mode): W/A/S/D/Q/E | Light (light mode): Arrows/PgUp/PgDn",
                 "Transform: I/K (+Z/-Z) J/L (-X/+X) U/O (+Y/-Y) | Shift=fine",
-                "File: Ctrl+S save | Ctrl+L load | ESC quit",
+                "File: Ctrl+S save | Ctrl+L load | Ctrl+E export JSON | ESC quit",
+                "Profiler: F3 phase times + graph | F4 record trace (CSV/JSON)",
             ]
+            overlay_lines += profiler.summary_lines(detail=show_profiler)
             
-            # Cleanup old textures
-            for (tid, _, _) in overlay_tex:
-                glDeleteTextures([tid])
-            overlay_tex.clear()
-            
-            # Create new textures
-            for line in overlay_lines:
-                tid, tw, th = create_text_texture(font, line)
-                overlay_tex.append((tid, tw, th))
-
             # 2D OpenGL overlay
-            begin_2d()
-            x, y = 10, 10
-            for (tid, tw, th) in overlay_tex:
-                draw_tex_2d(tid, x, y, tw, th)
-                y += th + 4
-            end_2d()
-
-            pygame.display.flip()
+            with profiler.scope("overlay", gpu=True):
+                begin_2d()
+                text.draw_lines(overlay_lines, 10, 10, spacing=4)
+                if show_profiler:
+                    profiler.draw_graph(GRAPH_X, WIN_H - GRAPH_H - 10, GRAPH_W, GRAPH_H)
+                end_2d()
+
+            with profiler.scope("flip"):
+                pygame.display.flip()
+            profiler.end_frame()
             clock.tick(FPS)
 
     finally:
-        # Cleanup overlay textures
-        for (tid, _, _) in overlay_tex:
-            glDeleteTextures([tid])
+        if profiler.recording:
+            profiler.stop_recording()
+        profiler.release()
+        text.release()
+        texture_manager.release_all()
         pygame.quit()
 
 
@@ -1,20 +1,208 @@
+import math
+import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from geometry import geometry_cache
+from store import ObjectStore, TYPE_SPHERE, TYPE_BOX, FLAG_SELECTED
+
+PRIMITIVES = {TYPE_SPHERE: "sphere", TYPE_BOX: "box"}
+
+# Tessellation of the shared unit sphere and of the selection wireframe
+SPHERE_DETAIL = 48
+OUTLINE_DETAIL = 24
+
+# Sphere LOD: tessellation levels (slices = stacks), coarse to fine. Level n
+# is used up to a projected radius of (n / pi)^2 pixels, where its chord
+# error r * (1 - cos(pi / n)) ~ r * pi^2 / (2 n^2) reaches half a pixel.
+SPHERE_LODS = (8, 16, 32, SPHERE_DETAIL)
+LOD_MAX_RADIUS = {n: (n / math.pi) ** 2 for n in SPHERE_LODS}
+# Lighting is per vertex (Gouraud), so a specular highlight is only sampled
+# at the vertices and a coarser mesh moves and reshapes it. Spheres with a
+# specular term also keep their vertices at most HIGHLIGHT_SPACING pixels
+# apart (r * 2 pi / n), which leaves large shiny spheres at full detail.
+HIGHLIGHT_SPACING = 8.0
+LOD_MAX_RADIUS_SHINY = {n: min(LOD_MAX_RADIUS[n], n * HIGHLIGHT_SPACING / (2.0 * math.pi))
+                        for n in SPHERE_LODS}
+# Dropping to a coarser level needs the sphere this far below that level's
+# limit, so spheres near a threshold do not pop back and forth
+LOD_HYSTERESIS = 0.8
+
+
+def pick_sphere_lods(screen_radius, current, shiny=False):
+    """
+    Tessellation levels for spheres of screen_radius pixels (arrays), given
+    the levels they used last frame; shiny (bool array) marks spheres with
+    a specular highlight.
+    """
+    levels = np.array(SPHERE_LODS)
+    now = np.minimum(np.searchsorted(levels, current), len(levels) - 1)
+    chosen = lod_indices(screen_radius, now, [LOD_MAX_RADIUS[n] for n in SPHERE_LODS])
+    if np.any(shiny):
+        chosen_shiny = lod_indices(screen_radius, now, [LOD_MAX_RADIUS_SHINY[n] for n in SPHERE_LODS])
+        chosen = np.where(shiny, chosen_shiny, chosen)
+    return levels[chosen]
+
+
+def lod_indices(screen_radius, now, max_radius):
+    # Indices into SPHERE_LODS for one table of per-level radius limits
+    limits = np.array(max_radius)
+    last = len(limits) - 1
+    target = np.minimum(np.searchsorted(limits, screen_radius), last)
+    relaxed = np.minimum(np.searchsorted(limits * LOD_HYSTERESIS, screen_radius), last)
+
+    # Refine at once; coarsen only past the hysteresis margin
+    return np.where(target >= now, target, np.minimum(relaxed, now))
+
+
+def json_floats(values):
+    # Stored as float32; round away the float32 -> float noise
+    return [round(v, 6) for v in values]
+
+
+class RowView:
+    """
+    Live view of one object's row in an (N, k) store column, used for
+    position and color. Item writes go to the store and call the object's
+    notify method (e.g. moved) so the scene can update its indices.
+    """
+    __slots__ = ("obj", "column", "notify")
+
+    def __init__(self, obj, column, notify):
+        self.obj = obj
+        self.column = column
+        self.notify = notify
+
+    def array(self):
+        return getattr(self.obj.store, self.column)[self.obj.row]
+
+    def __getitem__(self, i):
+        return self.array()[i].tolist()
+
+    def __setitem__(self, i, value):
+        self.array()[i] = value
+        getattr(self.obj, self.notify)()
+
+    def __len__(self):
+        return len(self.array())
+
+    def __iter__(self):
+        return iter(self.array().tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.array(), dtype=dtype)
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def tolist(self):
+        return self.array().tolist()
+
+    def __repr__(self):
+        return repr(self.tolist())
 
 
 class SceneObject:
+    """
+    View of one row of an ObjectStore. A new object gets a private one-row
+    store; Scene.add_object moves the row into the scene's store.
+    """
+    __slots__ = ("store", "row", "scene", "index_node")
+    type_id = None
+
     def __init__(self, position=(0.0, 0.0, 0.0), scale=1.0, 
                  color=(1.0, 1.0, 1.0, 1.0), shininess=30.0, specular_strength=0.5):
-        self.position = list(position)
-        self.scale = scale
-        self.color = list(color)  
-        self.shininess = shininess
-        self.specular_strength = specular_strength
-        self.selected = False 
+        self.scene = None   # set by the Scene that owns the object
+        self.index_node = None
+        self.store = ObjectStore(1)
+        self.row = self.store.append(self)
+        
+        store, row = self.store, self.row
+        store.position[row] = position
+        store.scale[row] = scale
+        store.color[row] = color
+        store.material[row] = (shininess, specular_strength)
+        store.type_id[row] = self.type_id
+        store.lod[row] = 1
+    
+    # --- stored attributes ---
+    @property
+    def position(self):
+        return RowView(self, "position", "moved")
+    
+    @position.setter
+    def position(self, value):
+        self.store.position[self.row] = value
+        self.moved()
+    
+    @property
+    def color(self):
+        return RowView(self, "color", "recolored")
+    
+    @color.setter
+    def color(self, value):
+        self.store.color[self.row] = value
+        self.recolored()
+    
+    @property
+    def scale(self):
+        return float(self.store.scale[self.row])
+    
+    @scale.setter
+    def scale(self, value):
+        self.store.scale[self.row] = value
+        self.moved()
+    
+    @property
+    def shininess(self):
+        return float(self.store.material[self.row, 0])
+    
+    @shininess.setter
+    def shininess(self, value):
+        self.store.material[self.row, 0] = value
+    
+    @property
+    def specular_strength(self):
+        return float(self.store.material[self.row, 1])
+    
+    @specular_strength.setter
+    def specular_strength(self, value):
+        self.store.material[self.row, 1] = value
+    
+    @property
+    def selected(self):
+        return bool(self.store.flags[self.row] & FLAG_SELECTED)
+    
+    @selected.setter
+    def selected(self, value):
+        if value:
+            self.store.flags[self.row] |= FLAG_SELECTED
+        else:
+            self.store.flags[self.row] &= ~np.uint8(FLAG_SELECTED)
+    
+    @property
+    def geometry(self):
+        # (primitive, level) of the shared unit mesh
+        return (PRIMITIVES[self.type_id], int(self.store.lod[self.row]))
+    
+    # --- scene bookkeeping ---
+    def moved(self):
+        # Keep the scene's spatial indices in sync. Writes to position[i] and
+        # scale call this automatically.
+        if self.scene is not None:
+            self.scene.object_moved(self)
+    
+    def recolored(self):
+        # Writes to color[i] may move the object between opaque/transparent
+        if self.scene is not None:
+            self.scene.update_bucket(self)
+    
+    @property
+    def bounding_radius(self):
+        return self.scale
     
     @property
     def transparent(self):
-        return self.color[3] < 1.0
+        return bool(self.store.color[self.row, 3] < 1.0)
     
     def render(self, highlight=False):
         raise NotImplementedError("Subclasses must implement render()")
@@ -35,9 +223,10 @@ class SceneObject:
             glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, (0.0, 0.0, 0.0, 1.0))
         
         # Set material properties
-        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.color)
+        color = self.color.tolist()
+        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, color)
         
-        spec_color = [self.specular_strength] * 3 + [self.color[3]]
+        spec_color = [self.specular_strength] * 3 + [color[3]]
         glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, spec_color)
         glMaterialf(GL_FRONT_AND_BACK, GL_SHININESS, self.shininess)
     
@@ -56,10 +245,29 @@ class SceneObject:
 
 
 class SphereObject(SceneObject):
+    __slots__ = ()
+    type_id = TYPE_SPHERE
+
     def __init__(self, position=(0.0, 0.0, 0.0), radius=1.0, 
                  color=(1.0, 1.0, 1.0, 1.0), shininess=30.0, specular_strength=0.5):
         super().__init__(position, radius, color, shininess, specular_strength)
-        self.radius = radius
+        self.lod_level = SPHERE_DETAIL   # updated by Scene.render
+    
+    @property
+    def radius(self):
+        return self.scale
+    
+    @radius.setter
+    def radius(self, value):
+        self.scale = value
+    
+    @property
+    def lod_level(self):
+        return int(self.store.lod[self.row])
+    
+    @lod_level.setter
+    def lod_level(self, value):
+        self.store.lod[self.row] = value
     
     def render(self, highlight=False):
         glPushMatrix()
@@ -67,10 +275,8 @@ class SphereObject(SceneObject):
         
         self.apply_material(highlight)
         
-        quad = gluNewQuadric()
-        gluQuadricNormals(quad, GLU_SMOOTH)
-        gluSphere(quad, self.radius, 48, 48)
-        gluDeleteQuadric(quad)
+        glScalef(self.radius, self.radius, self.radius)
+        geometry_cache.draw(*self.geometry)
         
         if self.selected:
             glDisable(GL_LIGHTING)
@@ -78,9 +284,8 @@ class SphereObject(SceneObject):
             glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
             glLineWidth(2.0)
             
-            quad2 = gluNewQuadric()
-            gluSphere(quad2, self.radius * 1.02, 24, 24)
-            gluDeleteQuadric(quad2)
+            glScalef(1.02, 1.02, 1.02)
+            geometry_cache.draw("sphere", OUTLINE_DETAIL)
             
             glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
             glLineWidth(1.0)
@@ -92,11 +297,11 @@ class SphereObject(SceneObject):
     def to_dict(self):
         return {
             'type': 'sphere',
-            'position': self.position,
-            'radius': self.radius,
-            'color': self.color,
-            'shininess': self.shininess,
-            'specular_strength': self.specular_strength
+            'position': json_floats(self.position),
+            'radius': round(self.radius, 6),
+            'color': json_floats(self.color),
+            'shininess': round(self.shininess, 6),
+            'specular_strength': round(self.specular_strength, 6)
         }
     
     @staticmethod
@@ -111,10 +316,25 @@ class SphereObject(SceneObject):
 
 
 class BoxObject(SceneObject):
+    __slots__ = ()
+    type_id = TYPE_BOX
+
     def __init__(self, position=(0.0, 0.0, 0.0), size=1.0, 
                  color=(1.0, 1.0, 1.0, 1.0), shininess=20.0, specular_strength=0.4):
         super().__init__(position, size, color, shininess, specular_strength)
-        self.size = size
+    
+    @property
+    def size(self):
+        return self.scale
+    
+    @size.setter
+    def size(self, value):
+        self.scale = value
+    
+    @property
+    def bounding_radius(self):
+        # Half the cube diagonal
+        return self.size * math.sqrt(3.0) / 2.0
     
     def render(self, highlight=False):
         glPushMatrix()
@@ -122,61 +342,8 @@ class BoxObject(SceneObject):
         
         self.apply_material(highlight)
         
-        s = self.size / 2.0
-        
-        # Front face
-        glBegin(GL_QUADS)
-        glNormal3f(0.0, 0.0, 1.0)
-        glVertex3f(-s, -s, s)
-        glVertex3f( s, -s, s)
-        glVertex3f( s,  s, s)
-        glVertex3f(-s,  s, s)
-        glEnd()
-        
-        # Back face
-        glBegin(GL_QUADS)
-        glNormal3f(0.0, 0.0, -1.0)
-        glVertex3f(-s, -s, -s)
-        glVertex3f(-s,  s, -s)
-        glVertex3f( s,  s, -s)
-        glVertex3f( s, -s, -s)
-        glEnd()
-        
-        # Top face
-        glBegin(GL_QUADS)
-        glNormal3f(0.0, 1.0, 0.0)
-        glVertex3f(-s, s, -s)
-        glVertex3f(-s, s,  s)
-        glVertex3f( s, s,  s)
-        glVertex3f( s, s, -s)
-        glEnd()
-        
-        # Bottom face
-        glBegin(GL_QUADS)
-        glNormal3f(0.0, -1.0, 0.0)
-        glVertex3f(-s, -s, -s)
-        glVertex3f( s, -s, -s)
-        glVertex3f( s, -s,  s)
-        glVertex3f(-s, -s,  s)
-        glEnd()
-        
-        # Right face
-        glBegin(GL_QUADS)
-        glNormal3f(1.0, 0.0, 0.0)
-        glVertex3f(s, -s, -s)
-        glVertex3f(s,  s, -s)
-        glVertex3f(s,  s,  s)
-        glVertex3f(s, -s,  s)
-        glEnd()
-        
-        # Left face
-        glBegin(GL_QUADS)
-        glNormal3f(-1.0, 0.0, 0.0)
-        glVertex3f(-s, -s, -s)
-        glVertex3f(-s, -s,  s)
-        glVertex3f(-s,  s,  s)
-        glVertex3f(-s,  s, -s)
-        glEnd()
+        glScalef(self.size, self.size, self.size)
+        geometry_cache.draw(*self.geometry)
         
         self.cleanup_material()
         glPopMatrix()
@@ -184,11 +351,11 @@ class BoxObject(SceneObject):
     def to_dict(self):
         return {
             'type': 'box',
-            'position': self.position,
-            'size': self.size,
-            'color': self.color,
-            'shininess': self.shininess,
-            'specular_strength': self.specular_strength
+            'position': json_floats(self.position),
+            'size': round(self.size, 6),
+            'color': json_floats(self.color),
+            'shininess': round(self.shininess, 6),
+            'specular_strength': round(self.specular_strength, 6)
         }
     
     @staticmethod
@@ -200,3 +367,23 @@ class BoxObject(SceneObject):
             shininess=data['shininess'],
             specular_strength=data['specular_strength']
         )
+
+
+# Object class of each type id
+OBJECT_TYPES = {TYPE_SPHERE: SphereObject, TYPE_BOX: BoxObject}
+
+
+def bounding_radii(store, rows):
+    """bounding_radius of the objects in store rows, as an array."""
+    # Spheres: the radius; boxes: half the cube diagonal
+    factor = np.where(store.type_id[rows] == TYPE_BOX, math.sqrt(3.0) / 2.0, 1.0)
+    return store.scale[rows] * factor
+
+
+def make_view(store, row, type_id):
+    """Object for a row already filled in store (see ObjectStore.extend)."""
+    cls = OBJECT_TYPES[type_id]
+    obj = cls.__new__(cls)
+    obj.store, obj.row = store, row
+    obj.scene = obj.index_node = None
+    return obj
@@ -1,7 +1,7 @@
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
-from objects import SphereObject, BoxObject
+from store import TYPE_SPHERE
 
 
 def unproject_mouse(mouse_x, mouse_y, win_w, win_h):
@@ -29,87 +29,241 @@ def unproject_mouse(mouse_x, mouse_y, win_w, win_h):
 
 
 def ray_sphere_intersection(ray_origin, ray_dir, sphere_pos, sphere_radius):
-    # Vector from ray origin to sphere center
-    oc = ray_origin - np.array(sphere_pos)
+    t = ray_spheres_intersection(ray_origin, ray_dir, np.array([sphere_pos], dtype=np.float64),
+                                 np.array([sphere_radius], dtype=np.float64))[0]
+    return None if t == np.inf else t
+
+
+def ray_spheres_intersection(ray_origin, ray_dir, centers, radii):
+    """Distance t along the ray to each of N spheres, inf where it misses."""
+    # Vector from ray origin to sphere centers
+    oc = ray_origin - centers
     
-    # Quadratic equation
+    # Quadratic equation, one per sphere
     a = np.dot(ray_dir, ray_dir)
-    b = 2.0 * np.dot(oc, ray_dir)
-    c = np.dot(oc, oc) - sphere_radius * sphere_radius
+    b = 2.0 * (oc @ ray_dir)
+    c = np.einsum("ij,ij->i", oc, oc) - radii * radii
     
     # delta
     discriminant = b*b - 4*a*c
+    hit = discriminant >= 0
     
-    if discriminant < 0:
-        return None  
-    
-    sqrt_disc = np.sqrt(discriminant)
+    sqrt_disc = np.sqrt(np.where(hit, discriminant, 0.0))
     t1 = (-b - sqrt_disc) / (2.0 * a)
     t2 = (-b + sqrt_disc) / (2.0 * a)
     
-    # return t 
-    if t1 > 0:
-        return t1
-    elif t2 > 0:
-        return t2
-    else:
-        return None
+    # Nearest hit in front of the origin (the far one when inside)
+    t = np.where(t1 > 0, t1, np.where(t2 > 0, t2, np.inf))
+    return np.where(hit, t, np.inf)
 
 
 def ray_box_intersection(ray_origin, ray_dir, box_pos, box_size):
-    box_pos = np.array(box_pos)
-    half_size = box_size / 2.0
+    t = ray_boxes_intersection(ray_origin, ray_dir, np.array([box_pos], dtype=np.float64),
+                               np.array([box_size], dtype=np.float64))[0]
+    return None if t == np.inf else t
+
+
+def slab_intervals(ray_origin, ray_dir, box_min, box_max):
+    """
+    Slab test against N axis-aligned boxes ((N, 3) corners): the (t_min,
+    t_max) interval of the ray inside each box, empty when t_min > t_max.
+    """
+    # Ray parallel to a slab: no limit if the origin is within it, miss otherwise
+    parallel = np.abs(ray_dir) < 1e-8
+    safe_dir = np.where(parallel, 1.0, ray_dir)
     
-    box_min = box_pos - half_size
-    box_max = box_pos + half_size
+    # Compute intersection t values with the two planes of every slab
+    t1 = (box_min - ray_origin) / safe_dir
+    t2 = (box_max - ray_origin) / safe_dir
+    t_near = np.minimum(t1, t2)
+    t_far = np.maximum(t1, t2)
     
-    t_min = -np.inf
-    t_max = np.inf
+    if parallel.any():
+        inside = (ray_origin >= box_min) & (ray_origin <= box_max)
+        t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), t_near)
+        t_far = np.where(parallel, np.inf, t_far)
     
-    for i in range(3):
-        if abs(ray_dir[i]) < 1e-8:
-            # Ray is parallel to slab, check if origin is within slab
-            if ray_origin[i] < box_min[i] or ray_origin[i] > box_max[i]:
-                return None
-        else:
-            # Compute intersection t values with the two planes
-            t1 = (box_min[i] - ray_origin[i]) / ray_dir[i]
-            t2 = (box_max[i] - ray_origin[i]) / ray_dir[i]
-            
-            if t1 > t2:
-                t1, t2 = t2, t1
-        
-            t_min = max(t_min, t1)
-            t_max = min(t_max, t2)
-            
-            if t_min > t_max:
-                return None
+    return t_near.max(axis=1), t_far.min(axis=1)
+
+
+def ray_boxes_intersection(ray_origin, ray_dir, centers, sizes):
+    """Distance t along the ray to each of N cubes, inf where it misses."""
+    half_size = (sizes / 2.0)[:, None]
+    t_min, t_max = slab_intervals(ray_origin, ray_dir, centers - half_size, centers + half_size)
     
-    if t_max < 0:
-        return None  
+    hit = (t_min <= t_max) & (t_max >= 0)
+    t = np.where(t_min > 0, t_min, t_max)
+    return np.where(hit, t, np.inf)
+
+
+def pick_rows(ray_origin, ray_dir, store, rows=None):
+    """
+    Nearest hit among rows of an ObjectStore (all rows when None), testing
+    all spheres and all boxes at once. Returns (row, t); t is inf on a miss.
+    """
+    if rows is None:
+        rows = np.arange(store.count)
+    if len(rows) == 0:
+        return -1, np.inf
+    
+    centers = store.position[rows].astype(np.float64)
+    scales = store.scale[rows].astype(np.float64)
+    spheres = store.type_id[rows] == TYPE_SPHERE
+    boxes = ~spheres
     
-    if t_min > 0:
-        return t_min
-    else:
-        return t_max
+    t = np.full(len(rows), np.inf)
+    t[spheres] = ray_spheres_intersection(ray_origin, ray_dir, centers[spheres], scales[spheres])
+    t[boxes] = ray_boxes_intersection(ray_origin, ray_dir, centers[boxes], scales[boxes])
+    
+    # argmin keeps the first of equal distances, like the per-object loop
+    i = int(np.argmin(t))
+    return int(rows[i]), float(t[i])
 
 
-def pick_object(mouse_x, mouse_y, win_w, win_h, objects):
-    ray_origin, ray_dir = unproject_mouse(mouse_x, mouse_y, win_w, win_h)
+def split_by_store(objects):
+    """
+    [(store, rows)]: objects grouped per store (rows None when objects is
+    the store's whole object list).
+    """
+    if not objects:
+        return []
     
-    closest_obj = None
-    closest_dist = float('inf')
+    first_store = objects[0].store
+    if first_store.objects is objects:
+        return [(first_store, None)]
     
+    groups = {}
     for obj in objects:
-        dist = None
+        groups.setdefault(id(obj.store), (obj.store, []))[1].append(obj.row)
+    return [(store, np.array(rows, dtype=np.intp)) for store, rows in groups.values()]
+
+
+# -------------------------
+# BVH
+# -------------------------
+# Objects per BVH leaf; leaves are tested as one batch
+BVH_LEAF_SIZE = 64
+
+# Bits per axis of the Morton codes that order objects along the BVH
+MORTON_BITS = 10
+
+
+def morton_codes(points):
+    """Z-order codes of (N, 3) points, quantized to MORTON_BITS per axis."""
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, 1e-12)
+    cells = ((points - low) / span * ((1 << MORTON_BITS) - 1)).astype(np.int64)
+    
+    codes = np.zeros(len(points), dtype=np.int64)
+    for bit in range(MORTON_BITS):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> bit) & 1) << (3 * bit + axis)
+    return codes
+
+
+class ObjectBVH:
+    """
+    Bounding volume hierarchy over the rows of an ObjectStore. Objects are
+    sorted along a Morton curve and cut into leaves of BVH_LEAF_SIZE; the
+    leaves sit under a complete binary tree in heap layout (node k has
+    children 2k and 2k + 1, the root is 1), so the whole build is a few
+    array operations. A pick slab-tests every node box at once, then walks
+    only the nodes the ray enters, near child first, skipping nodes that
+    start beyond the closest hit. Built from a snapshot of the store:
+    rebuild it after objects are added, removed or moved.
+    """
+    
+    def __init__(self, store, leaf_size=BVH_LEAF_SIZE):
+        self.store = store
+        self.leaf_size = leaf_size
+        n = store.count
+        centers = store.position[:n].astype(np.float64)
+        # Half extent of each object's bounding box
+        extent = store.scale[:n].astype(np.float64)
+        extent = np.where(store.type_id[:n] == TYPE_SPHERE, extent, extent / 2.0)[:, None]
+        
+        self.order = np.argsort(morton_codes(centers), kind="stable") if n else np.arange(0)
+        
+        # Leaves are nodes first_leaf .. 2 * first_leaf - 1; the padding
+        # leaves past the last object are empty
+        leaves = max(1, -(-n // leaf_size))
+        self.first_leaf = 1 << (leaves - 1).bit_length()
+        nodes = 2 * self.first_leaf
+        
+        self.box_min = np.full((nodes, 3), np.inf)
+        self.box_max = np.full((nodes, 3), -np.inf)
+        self.empty = np.ones(nodes, dtype=bool)
+        if n:
+            starts = np.arange(0, n, leaf_size)
+            leaf_ids = self.first_leaf + np.arange(len(starts))
+            self.box_min[leaf_ids] = np.minimum.reduceat((centers - extent)[self.order], starts)
+            self.box_max[leaf_ids] = np.maximum.reduceat((centers + extent)[self.order], starts)
+            self.empty[leaf_ids] = False
+        
+        # Parents bound their two children, one tree level at a time
+        level = self.first_leaf // 2
+        while level >= 1:
+            parents = np.arange(level, 2 * level)
+            self.box_min[parents] = np.minimum(self.box_min[2 * parents], self.box_min[2 * parents + 1])
+            self.box_max[parents] = np.maximum(self.box_max[2 * parents], self.box_max[2 * parents + 1])
+            self.empty[parents] = self.empty[2 * parents] & self.empty[2 * parents + 1]
+            level //= 2
+    
+    def pick(self, ray_origin, ray_dir):
+        """Nearest hit (row, t) in the store, or (-1, inf)."""
+        best_row, best_t = -1, np.inf
+        if len(self.order) == 0:
+            return best_row, best_t
+        
+        t_min, t_max = slab_intervals(ray_origin, ray_dir, self.box_min, self.box_max)
+        hit = (t_min <= t_max) & (t_max >= 0) & ~self.empty
+        entry = np.where(hit, np.maximum(t_min, 0.0), np.inf).tolist()
         
-        if isinstance(obj, SphereObject):
-            dist = ray_sphere_intersection(ray_origin, ray_dir, obj.position, obj.radius)
-        elif isinstance(obj, BoxObject):
-            dist = ray_box_intersection(ray_origin, ray_dir, obj.position, obj.size)
-  
-        if dist is not None and dist < closest_dist:
+        stack = [1]
+        while stack:
+            node = stack.pop()
+            if entry[node] >= best_t:
+                continue
+            
+            if node >= self.first_leaf:
+                start = (node - self.first_leaf) * self.leaf_size
+                rows = self.order[start:start + self.leaf_size]
+                row, t = pick_rows(ray_origin, ray_dir, self.store, rows)
+                if t < best_t:
+                    best_row, best_t = row, t
+            elif entry[2 * node] <= entry[2 * node + 1]:
+                stack += [2 * node + 1, 2 * node]
+            else:
+                stack += [2 * node, 2 * node + 1]
+        return best_row, best_t
+
+
+# -------------------------
+# Picking
+# -------------------------
+def pick_object(mouse_x, mouse_y, win_w, win_h, objects, bvh=None):
+    ray_origin, ray_dir = unproject_mouse(mouse_x, mouse_y, win_w, win_h)
+    return pick_ray(ray_origin, ray_dir, objects, bvh)
+
+
+def pick_ray(ray_origin, ray_dir, objects, bvh=None):
+    """
+    Closest object hit by a world-space ray (no OpenGL state needed).
+    Scene objects are tested in batches per store; bvh (an ObjectBVH of
+    the store that owns objects) is used when objects is that whole store.
+    """
+    ray_origin = np.asarray(ray_origin, dtype=np.float64)
+    ray_dir = np.asarray(ray_dir, dtype=np.float64)
+    closest_obj = None
+    closest_dist = float('inf')
+    
+    for store, rows in split_by_store(objects):
+        if bvh is not None and bvh.store is store and rows is None:
+            row, dist = bvh.pick(ray_origin, ray_dir)
+        else:
+            row, dist = pick_rows(ray_origin, ray_dir, store, rows)
+        if dist < closest_dist:
             closest_dist = dist
-            closest_obj = obj
+            closest_obj = store.objects[row]
     
     return closest_obj
@@ -0,0 +1,356 @@
+"""
+Frame-time profiler for the scene editor.
+
+Phases of a frame are wrapped in named scopes:
+
+    profiler.begin_frame()
+    with profiler.scope("scene", gpu=True):
+        scene.render(eye)
+    profiler.end_frame()
+
+CPU time comes from time.perf_counter(). GPU scopes also write GL timestamp
+queries, whose results are read a few frames later without stalling;
+without timer queries only CPU times are kept. The last HISTORY frames of
+each phase give the averages and percentiles shown in the overlay, and
+while recording every frame is kept for a CSV or JSON trace.
+"""
+import csv
+import ctypes
+import json
+import time
+from collections import deque
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError, NullFunctionError
+
+# The wrapped glGetQueryObjectui64v has no array type for 64-bit results
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+
+
+# Frames kept for averages, percentiles and the graph
+HISTORY = 240
+
+# Seconds between refreshes of the overlay numbers (steadier to read, and
+# unchanged lines are not laid out again)
+SUMMARY_INTERVAL = 0.25
+
+# Frame time the graph is scaled to (ms); taller frames are clipped
+GRAPH_MAX_MS = 50.0
+
+
+# -------------------------
+# GPU timer queries
+# -------------------------
+class GpuTimer:
+    """
+    GL_TIMESTAMP query pairs around GPU scopes. Timestamps (unlike
+    GL_TIME_ELAPSED queries) can nest and overlap, as CPU scopes do.
+    """
+
+    def __init__(self):
+        self.available = None   # None until the first ready() check
+        self.free = []
+        self.frame = []         # (name, start query, end query) this frame
+        self.pending = deque()  # (frame record, queries) awaiting results
+        self.result = ctypes.c_uint64()
+
+    def ready(self):
+        if self.available is None:
+            self.available = self.init_gl()
+        return self.available
+
+    def init_gl(self):
+        if not (bool(glGenQueries) and bool(glQueryCounter)):
+            return False
+        try:
+            glGetIntegerv(GL_TIMESTAMP)
+            return True
+        except (GLError, NullFunctionError):
+            return False
+
+    def query(self):
+        if not self.free:
+            self.free.extend(int(q) for q in glGenQueries(16))
+        return self.free.pop()
+
+    def begin(self):
+        q = self.query()
+        glQueryCounter(q, GL_TIMESTAMP)
+        return q
+
+    def end(self, name, start):
+        q = self.query()
+        glQueryCounter(q, GL_TIMESTAMP)
+        self.frame.append((name, start, q))
+
+    def end_frame(self, record):
+        if self.frame:
+            self.pending.append((record, self.frame))
+            self.frame = []
+
+    def timestamp(self, q):
+        glGetQueryObjectui64v(q, GL_QUERY_RESULT, ctypes.byref(self.result))
+        return self.result.value
+
+    def collect(self):
+        """Frame records whose GPU times just arrived, oldest first."""
+        done = []
+        while self.pending:
+            record, queries = self.pending[0]
+            # Queries complete in order: the last one stands for the frame
+            if not glGetQueryObjectiv(queries[-1][2], GL_QUERY_RESULT_AVAILABLE):
+                break
+            self.pending.popleft()
+            gpu = record["gpu"]
+            for name, start, end in queries:
+                ms = (self.timestamp(end) - self.timestamp(start)) / 1e6
+                gpu[name] = gpu.get(name, 0.0) + ms
+                self.free.extend((start, end))
+            done.append(record)
+        return done
+
+    def release(self):
+        queries = self.free + [q for _, a, b in self.frame for q in (a, b)]
+        for _, frame in self.pending:
+            queries.extend(q for _, a, b in frame for q in (a, b))
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self.free, self.frame = [], []
+        self.pending.clear()
+        self.available = None
+
+
+# -------------------------
+# Profiler
+# -------------------------
+class Scope:
+    __slots__ = ("profiler", "name", "gpu", "start", "query")
+
+    def __init__(self, profiler, name, gpu):
+        self.profiler = profiler
+        self.name = name
+        self.gpu = gpu
+
+    def __enter__(self):
+        if self.gpu:
+            self.query = self.profiler.gpu_timer.begin()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1e3
+        cpu = self.profiler.record["cpu"]
+        # A phase run several times in a frame (e.g. two picks) adds up
+        cpu[self.name] = cpu.get(self.name, 0.0) + ms
+        if self.gpu:
+            self.profiler.gpu_timer.end(self.name, self.query)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self.gpu_timer = GpuTimer()
+        self.frame_index = 0
+        self.frame_start = None
+        self.record = {"cpu": {}, "gpu": {}}
+
+        # ms per frame: the frame interval, and each phase in the frames it ran
+        self.frame_ms = deque(maxlen=history)
+        self.cpu = {}
+        self.gpu = {}
+
+        self.recording = False
+        self.trace = []   # frame records while recording
+
+        self.summary = []
+        self.summary_time = 0.0
+        self.summary_detail = None
+
+    def scope(self, name, gpu=False):
+        """Context manager timing one phase; gpu=True also times its GL work."""
+        return Scope(self, name, gpu and self.gpu_timer.ready())
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            # The frame interval includes the buffer swap and clock.tick()
+            self.frame_ms.append((now - self.frame_start) * 1e3)
+        self.frame_start = now
+        self.record = {"frame": self.frame_index, "time": now, "cpu": {}, "gpu": {}}
+
+    def end_frame(self):
+        record = self.record
+        for name, ms in record["cpu"].items():
+            self.series(self.cpu, name).append(ms)
+        if self.gpu_timer.available:
+            self.gpu_timer.end_frame(record)
+            self.collect_gpu()
+        if self.recording:
+            self.trace.append(record)
+        self.frame_index += 1
+
+    def collect_gpu(self):
+        for record in self.gpu_timer.collect():
+            for name, ms in record["gpu"].items():
+                self.series(self.gpu, name).append(ms)
+
+    def series(self, table, name):
+        values = table.get(name)
+        if values is None:
+            values = table[name] = deque(maxlen=self.history)
+        return values
+
+    # -------------------------
+    # Statistics
+    # -------------------------
+    def stats(self, values):
+        """(mean, p50, p95, p99) in ms of a deque, or None when empty."""
+        if not values:
+            return None
+        a = np.fromiter(values, dtype=np.float64, count=len(values))
+        p50, p95, p99 = np.percentile(a, (50, 95, 99))
+        return float(a.mean()), float(p50), float(p95), float(p99)
+
+    def summary_lines(self, detail=True):
+        """Overlay text, refreshed every SUMMARY_INTERVAL seconds."""
+        now = time.perf_counter()
+        if self.summary_detail == detail and now - self.summary_time < SUMMARY_INTERVAL:
+            return self.summary
+
+        lines = []
+        frame = self.stats(self.frame_ms)
+        if frame is None:
+            lines.append("Frame: -")
+        else:
+            mean, p50, p95, p99 = frame
+            fps = 1000.0 / mean if mean > 0 else 0.0
+            lines.append(f"Frame: {mean:.1f} ms avg ({fps:.0f} FPS) | p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f}"
+                         + (" | REC" if self.recording else ""))
+        if detail:
+            for name, values in self.cpu.items():
+                mean, _, p95, _ = self.stats(values)
+                line = f"  {name:<8} cpu {mean:6.2f} ms (p95 {p95:6.2f})"
+                gpu = self.stats(self.gpu.get(name))
+                if gpu is not None:
+                    line += f" | gpu {gpu[0]:6.2f} ms (p95 {gpu[2]:6.2f})"
+                lines.append(line)
+
+        self.summary = lines
+        self.summary_time = now
+        self.summary_detail = detail
+        return lines
+
+    # -------------------------
+    # Graph
+    # -------------------------
+    def draw_graph(self, x, y, w, h, max_ms=GRAPH_MAX_MS):
+        """
+        Frame-time graph (newest frame on the right) in 2D pixel coordinates,
+        with guide lines at 60 and 30 FPS. Call between begin_2d/end_2d.
+        """
+        glDisable(GL_CULL_FACE)
+        glDisable(GL_TEXTURE_2D)
+
+        glColor4f(0.0, 0.0, 0.0, 0.55)
+        glBegin(GL_QUADS)
+        glVertex2f(x, y); glVertex2f(x + w, y); glVertex2f(x + w, y + h); glVertex2f(x, y + h)
+        glEnd()
+
+        glBegin(GL_LINES)
+        for ms, color in ((1000.0 / 60.0, (0.3, 1.0, 0.3, 0.6)), (1000.0 / 30.0, (1.0, 0.8, 0.2, 0.6))):
+            gy = y + h - h * ms / max_ms
+            glColor4f(*color)
+            glVertex2f(x, gy); glVertex2f(x + w, gy)
+        glEnd()
+
+        n = len(self.frame_ms)
+        if n > 1:
+            ms = np.minimum(np.fromiter(self.frame_ms, dtype=np.float32, count=n), max_ms)
+            points = np.empty((n, 2), dtype=np.float32)
+            points[:, 0] = x + w - (n - 1 - np.arange(n)) * (w / (self.history - 1))
+            points[:, 1] = y + h - h * ms / max_ms
+
+            glColor4f(1.0, 1.0, 1.0, 0.9)
+            glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glVertexPointer(2, GL_FLOAT, 0, points)
+            glDrawArrays(GL_LINE_STRIP, 0, n)
+            glPopClientAttrib()
+
+        glColor4f(1, 1, 1, 1)
+
+    # -------------------------
+    # Traces
+    # -------------------------
+    def start_recording(self):
+        self.trace = []
+        self.recording = True
+        print("Profiler: recording frames")
+
+    def stop_recording(self, basename="profile_trace"):
+        """Stop recording and write basename.csv and basename.json."""
+        self.recording = False
+        if not self.trace:
+            return
+        if self.gpu_timer.available:
+            # Wait for the GPU times of the last recorded frames
+            glFinish()
+            self.collect_gpu()
+        self.export_csv(basename + ".csv")
+        self.export_json(basename + ".json")
+
+    def phases(self):
+        names = {"cpu": [], "gpu": []}
+        for record in self.trace:
+            for kind, seen in names.items():
+                seen.extend(name for name in record[kind] if name not in seen)
+        return names
+
+    def trace_rows(self):
+        # Frame interval of a recorded frame = its start to the next start
+        starts = [record["time"] for record in self.trace]
+        for i, record in enumerate(self.trace):
+            frame_ms = (starts[i + 1] - starts[i]) * 1e3 if i + 1 < len(starts) else None
+            yield record, frame_ms
+
+    def export_csv(self, filename):
+        names = self.phases()
+        header = ["frame", "time_s", "frame_ms"]
+        header += [f"cpu_{name}_ms" for name in names["cpu"]]
+        header += [f"gpu_{name}_ms" for name in names["gpu"]]
+        t0 = self.trace[0]["time"]
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for record, frame_ms in self.trace_rows():
+                row = [record["frame"], f"{record['time'] - t0:.6f}", "" if frame_ms is None else f"{frame_ms:.4f}"]
+                for kind in ("cpu", "gpu"):
+                    row += [f"{record[kind][name]:.4f}" if name in record[kind] else "" for name in names[kind]]
+                writer.writerow(row)
+        print(f"Profile trace saved to {filename} ({len(self.trace)} frames)")
+
+    def export_json(self, filename):
+        t0 = self.trace[0]["time"]
+        frames = [{
+            "frame": record["frame"],
+            "time_s": record["time"] - t0,
+            "frame_ms": frame_ms,
+            "cpu_ms": record["cpu"],
+            "gpu_ms": record["gpu"],
+        } for record, frame_ms in self.trace_rows()]
+        data = {
+            "version": "1.0",
+            "phases": self.phases(),
+            "gpu_timers": bool(self.gpu_timer.available),
+            "frames": frames,
+        }
+        with open(filename, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"Profile trace saved to {filename} ({len(frames)} frames)")
+
+    def release(self):
+        self.gpu_timer.release()
+
+
+profiler = FrameProfiler()
@@ -1,20 +1,134 @@
-import math
-from objects import SphereObject, BoxObject
+import numpy as np
+from objects import SphereObject, BoxObject, PRIMITIVES, SPHERE_DETAIL, pick_sphere_lods, make_view, bounding_radii
+from store import ObjectStore, TYPE_SPHERE, FLAG_SELECTED, FLAG_TRANSPARENT
+from instancing import instance_renderer
+from spatial import LooseOctree, current_frustum_planes, pixels_per_unit
+from picking import ObjectBVH
+
+# Scenes with at least this many objects pick through a BVH; below that
+# one batched test over the store is faster
+PICK_BVH_MIN_OBJECTS = 10000
+
 
 class Scene:
     def __init__(self):
-        self.objects = []
+        # Object attributes live in the store's columns; self.objects is the
+        # store's list of row views (row i <-> objects[i])
+        self.store = ObjectStore()
+        self.objects = self.store.objects
         self.selected_object = None
+        # Persistent render buckets; transparent is kept in last frame's
+        # back-to-front order so re-sorting starts from a nearly sorted list.
+        # A row's FLAG_TRANSPARENT bit names its bucket and its slot column
+        # its index there.
+        self.opaque = []
+        self.transparent = []
+        # Store rows inside the view frustum, set by update_visibility
+        self.visible = np.zeros(0, dtype=bool)
+        # Draw opaque objects with one instanced call per unit mesh when the
+        # GL context supports it
+        self.use_instancing = True
+        # Loose octree over the objects' bounding spheres for frustum culling
+        self.index = LooseOctree()
+        self.use_culling = True
+        # Pick sphere tessellation from projected size (objects.SPHERE_LODS)
+        self.use_lod = True
+        # BVH for picking in large scenes; dropped on any change and rebuilt
+        # by the next pick
+        self.use_pick_bvh = True
+        self.pick_bvh = None
     
     def add_object(self, obj):
-        self.objects.append(obj)
+        if obj.scene is not None:
+            obj.scene.remove_object(obj)
+        self.store.adopt(obj)
+        obj.scene = self
+        self.index.insert(obj)
+        self.pick_bvh = None
+        self.bucket_add(obj)
+    
+    def add_columns(self, columns):
+        """
+        Add many objects at once from store columns ({name: array}, see
+        store.COLUMNS; type_id is required), e.g. read from a scene file.
+        Returns the new objects.
+        """
+        store = self.store
+        start = store.count
+        rows = store.extend(columns, make_view)
+        if "lod" not in columns:
+            # Same start as a new SphereObject; render() picks the LOD
+            store.lod[rows] = np.where(store.type_id[rows] == TYPE_SPHERE, SPHERE_DETAIL, 1)
+        
+        added = self.objects[start:]
+        for obj in added:
+            obj.scene = self
+        self.index.insert_many(added, store.position[rows], bounding_radii(store, rows))
+        self.pick_bvh = None
+        
+        transparent = store.color[rows, 3] < 1.0
+        store.flags[rows[transparent]] |= FLAG_TRANSPARENT
+        for bucket, mask in ((self.opaque, ~transparent), (self.transparent, transparent)):
+            store.slot[rows[mask]] = len(bucket) + np.arange(np.count_nonzero(mask))
+            bucket.extend(added[i] for i in np.flatnonzero(mask).tolist())
+        return added
     
     def remove_object(self, obj):
-        if obj in self.objects:
-            self.objects.remove(obj)
+        if obj.scene is self:
+            self.index.remove(obj)
+            self.bucket_remove(obj)
+            self.store.detach(obj)
+            self.pick_bvh = None
+            obj.scene = None
             if self.selected_object == obj:
                 self.selected_object = None
     
+    def object_moved(self, obj):
+        # Called when obj's position or size changed
+        self.index.update(obj)
+        self.pick_bvh = None
+    
+    def picking_bvh(self):
+        """BVH to pass to picking.pick_object, or None for small scenes."""
+        if not self.use_pick_bvh or len(self.objects) < PICK_BVH_MIN_OBJECTS:
+            return None
+        if self.pick_bvh is None:
+            self.pick_bvh = ObjectBVH(self.store)
+        return self.pick_bvh
+    
+    def update_bucket(self, obj):
+        # Called when obj's alpha may have crossed 1.0
+        in_transparent = bool(self.store.flags[obj.row] & FLAG_TRANSPARENT)
+        if obj.transparent != in_transparent:
+            self.bucket_remove(obj)
+            self.bucket_add(obj)
+    
+    def bucket_add(self, obj):
+        store, row = self.store, obj.row
+        if obj.transparent:
+            store.flags[row] |= FLAG_TRANSPARENT
+            bucket = self.transparent
+        else:
+            store.flags[row] &= ~np.uint8(FLAG_TRANSPARENT)
+            bucket = self.opaque
+        store.slot[row] = len(bucket)
+        bucket.append(obj)
+    
+    def bucket_remove(self, obj):
+        # Move the bucket's last object into obj's slot; a transparent
+        # bucket gets back in order with the next sort_transparent
+        store, row = self.store, obj.row
+        if store.flags[row] & FLAG_TRANSPARENT:
+            bucket = self.transparent
+            store.flags[row] &= ~np.uint8(FLAG_TRANSPARENT)
+        else:
+            bucket = self.opaque
+        slot = int(store.slot[row])
+        last = bucket.pop()
+        if last is not obj:
+            bucket[slot] = last
+            store.slot[last.row] = slot
+    
     def select_object(self, obj):
         # Deselect previous
         if self.selected_object:
@@ -28,28 +142,102 @@ class Scene:
     def get_selected(self):
         return self.selected_object
     
+    def sort_transparent(self, camera_eye):
+        """Re-sort the transparent bucket back to front for this camera."""
+        if len(self.transparent) < 2:
+            return
+        
+        rows = self.store.rows(self.transparent)
+        offset = self.store.position[rows] - np.asarray(camera_eye, dtype=np.float32)
+        distance_sq = np.einsum("ij,ij->i", offset, offset)
+        
+        # Stable sort (timsort) of last frame's order: linear when the order
+        # is nearly unchanged, and equal distances keep their order
+        order = np.argsort(-distance_sq, kind="stable")
+        if np.any(order != np.arange(len(order))):
+            self.transparent = [self.transparent[i] for i in order.tolist()]
+            self.store.slot[rows[order]] = np.arange(len(order))
+    
+    def update_visibility(self):
+        """
+        Set self.visible (one bool per store row) to the rows whose bounding
+        sphere intersects the current GL view frustum, and return it.
+        """
+        count = self.store.count
+        if not self.use_culling:
+            self.visible = np.ones(count, dtype=bool)
+        else:
+            self.visible = np.zeros(count, dtype=bool)
+            self.visible[self.store.rows(self.index.query(current_frustum_planes()))] = True
+        return self.visible
+    
+    def update_lod(self, rows, camera_eye):
+        store = self.store
+        rows = rows[store.type_id[rows] == TYPE_SPHERE]
+        if len(rows) == 0:
+            return
+        
+        radii = store.scale[rows].astype(np.float64)
+        offset = store.position[rows] - np.asarray(camera_eye, dtype=np.float64)
+        distance_sq = np.einsum("ij,ij->i", offset, offset)
+        
+        # tan of the sphere's angular radius; camera inside a sphere -> huge
+        tan_radius = radii / np.sqrt(np.maximum(distance_sq - radii * radii, 1e-12))
+        screen_radius = tan_radius * pixels_per_unit()
+        shiny = store.material[rows, 1] > 0.0
+        store.lod[rows] = pick_sphere_lods(screen_radius, store.lod[rows], shiny)
+    
+    def reset_lod(self):
+        # Full detail for every sphere, as without LOD
+        store = self.store
+        spheres = store.type_id[:store.count] == TYPE_SPHERE
+        store.lod[:store.count][spheres] = SPHERE_DETAIL
+    
     def render(self, camera_eye):
-        # Separate opaque and transparent objects
-        opaque = [obj for obj in self.objects if not obj.transparent]
-        transparent = [obj for obj in self.objects if obj.transparent]
+        visible = self.update_visibility()
+        if self.use_lod:
+            self.update_lod(np.flatnonzero(visible), camera_eye)
+        else:
+            self.reset_lod()
         
-        for obj in opaque:
-            obj.render()
+        self.sort_transparent(camera_eye)
+        # Visible rows of each bucket, in bucket order
+        store = self.store
+        rows = store.rows(self.opaque)
+        rows = rows[visible[rows]]
+        transparent = store.rows(self.transparent)
+        transparent = transparent[visible[transparent]]
         
-        if transparent:
-            def distance_to_camera(obj):
-                dx = obj.position[0] - camera_eye[0]
-                dy = obj.position[1] - camera_eye[1]
-                dz = obj.position[2] - camera_eye[2]
-                return -(dx*dx + dy*dy + dz*dz) 
+        if self.use_instancing and instance_renderer.ready():
+            # The selected object keeps its own path for the emissive
+            # highlight and wireframe overlay
+            selected = (store.flags[rows] & FLAG_SELECTED) != 0
+            for row in rows[selected].tolist():
+                self.objects[row].render()
             
-            transparent.sort(key=distance_to_camera)
-            
-            for obj in transparent:
-                obj.render()
+            # One group per (type, lod) unit mesh
+            rows = rows[~selected]
+            keys = store.type_id[rows].astype(np.int32) * 256 + store.lod[rows]
+            groups = {}
+            for key in np.unique(keys).tolist():
+                groups[(PRIMITIVES[key >> 8], key & 255)] = rows[keys == key]
+            instance_renderer.draw(store, groups)
+        else:
+            for row in rows.tolist():
+                self.objects[row].render()
+        
+        for row in transparent.tolist():
+            self.objects[row].render()
     
     def clear(self):
-        self.objects.clear()
+        for obj in self.objects:
+            obj.scene = None
+        self.store.flags[:self.store.count] &= ~np.uint8(FLAG_TRANSPARENT)
+        self.index.clear()
+        self.store.detach_all()
+        self.pick_bvh = None
+        self.opaque.clear()
+        self.transparent.clear()
         self.selected_object = None
 
 
@@ -0,0 +1,259 @@
+"""
+View-frustum culling for the scene editor.
+
+Objects are kept in a loose octree over their bounding spheres. A node's
+loose bounds are twice its cell, so an object can be stored in any node
+whose cell contains its center and whose half-size is at least its radius.
+Leaves hold up to LEAF_CAPACITY objects before they split and push their
+objects one level down, so sparse scenes do not grow a chain of nodes per
+object.
+Moving an object only re-files it when it leaves that node, which keeps
+per-frame updates O(1) for small moves. Rendering walks only the nodes that
+intersect the current frustum.
+"""
+import numpy as np
+from OpenGL.GL import *
+
+
+# -------------------------
+# Frustum
+# -------------------------
+def extract_frustum_planes(projection, modelview):
+    """
+    Six world-space planes (a, b, c, d), normals pointing inward, from the
+    4x4 matrices as returned by glGetDoublev (column-major, i.e. transposed).
+    A point p is inside when a*x + b*y + c*z + d >= 0 for every plane.
+    """
+    clip = np.asarray(projection, dtype=np.float64).reshape(4, 4).T @ \
+        np.asarray(modelview, dtype=np.float64).reshape(4, 4).T
+    planes = np.array([
+        clip[3] + clip[0],   # left
+        clip[3] - clip[0],   # right
+        clip[3] + clip[1],   # bottom
+        clip[3] - clip[1],   # top
+        clip[3] + clip[2],   # near
+        clip[3] - clip[2],   # far
+    ])
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return [tuple(p) for p in planes.tolist()]
+
+
+def current_frustum_planes():
+    """Frustum of the current GL projection and modelview matrices."""
+    return extract_frustum_planes(glGetDoublev(GL_PROJECTION_MATRIX),
+                                  glGetDoublev(GL_MODELVIEW_MATRIX))
+
+
+def pixels_per_unit():
+    """
+    Screen pixels covered by one world unit at distance 1 from a perspective
+    camera: divide by distance for the projected size of an object.
+    """
+    projection = glGetDoublev(GL_PROJECTION_MATRIX)
+    viewport = glGetIntegerv(GL_VIEWPORT)
+    # projection[1][1] = 1 / tan(fovy / 2)
+    return float(projection[1][1]) * float(viewport[3]) / 2.0
+
+
+def sphere_in_frustum(planes, center, radius):
+    x, y, z = center
+    for a, b, c, d in planes:
+        if a * x + b * y + c * z + d < -radius:
+            return False
+    return True
+
+
+# -------------------------
+# Loose octree
+# -------------------------
+OUTSIDE, INTERSECTING, INSIDE = 0, 1, 2
+
+
+class OctreeNode:
+    __slots__ = ("center", "half_size", "depth", "parent", "children", "objects", "count")
+
+    def __init__(self, center, half_size, depth, parent=None):
+        self.center = center
+        self.half_size = half_size
+        self.depth = depth
+        self.parent = parent
+        self.children = None   # 8 slots, filled on first use
+        self.objects = []
+        self.count = 0   # objects in this node and all of its descendants
+
+    def contains(self, obj):
+        return self.contains_sphere(list(obj.position), obj.bounding_radius)
+
+    def contains_sphere(self, position, radius):
+        # Center inside the cell and radius within the loose margin
+        if radius > self.half_size:
+            return False
+        h = self.half_size
+        cx, cy, cz = self.center
+        return abs(position[0] - cx) <= h and abs(position[1] - cy) <= h and abs(position[2] - cz) <= h
+
+    def child_for(self, position):
+        cx, cy, cz = self.center
+        k = (position[0] >= cx) | (position[1] >= cy) << 1 | (position[2] >= cz) << 2
+        if self.children is None:
+            self.children = [None] * 8
+        child = self.children[k]
+        if child is None:
+            h = self.half_size / 2.0
+            center = (cx + (h if k & 1 else -h), cy + (h if k & 2 else -h), cz + (h if k & 4 else -h))
+            child = self.children[k] = OctreeNode(center, h, self.depth + 1, self)
+        return child
+
+    def classify(self, planes):
+        # Loose bounds: a cube of half-size 2 * half_size around the center
+        x, y, z = self.center
+        e = 2.0 * self.half_size
+        result = INSIDE
+        for a, b, c, d in planes:
+            dist = a * x + b * y + c * z + d
+            reach = e * (abs(a) + abs(b) + abs(c))
+            if dist < -reach:
+                return OUTSIDE
+            if dist < reach:
+                result = INTERSECTING
+        return result
+
+
+# The root doubles (up to this half-size) when an object lands outside it
+MAX_ROOT_HALF_SIZE = float(1 << 20)
+
+# Objects a leaf holds before it is split
+LEAF_CAPACITY = 8
+
+
+class LooseOctree:
+    def __init__(self, center=(0.0, 0.0, 0.0), half_size=256.0, max_depth=8):
+        self.root = OctreeNode(tuple(center), half_size, 0)
+        self.max_depth = max_depth
+        # Objects too big for the root, or beyond its largest size, are
+        # tested one by one
+        self.outside = []
+
+    def __len__(self):
+        return self.root.count + len(self.outside)
+
+    def insert(self, obj):
+        self.insert_sphere(obj, list(obj.position), obj.bounding_radius)
+
+    def insert_many(self, objects, positions, radii):
+        """insert() for many objects whose positions and radii are known."""
+        for obj, position, radius in zip(objects, positions.tolist(), radii.tolist()):
+            self.insert_sphere(obj, position, radius)
+
+    def insert_sphere(self, obj, position, radius):
+        if not self.root.contains_sphere(position, radius):
+            if self.root.half_size < MAX_ROOT_HALF_SIZE and radius <= self.root.half_size:
+                self.grow()
+                self.insert_sphere(obj, position, radius)
+                return
+            self.outside.append(obj)
+            obj.index_node = None
+            return
+
+        node = self.root
+        while node.depth < self.max_depth and radius <= node.half_size / 2.0:
+            if node.children is None and len(node.objects) < LEAF_CAPACITY:
+                break
+            node = node.child_for(position)
+
+        node.objects.append(obj)
+        obj.index_node = node
+        leaf = node
+        while node is not None:
+            node.count += 1
+            node = node.parent
+
+        if leaf.children is None and len(leaf.objects) > LEAF_CAPACITY and leaf.depth < self.max_depth:
+            self.split(leaf)
+
+    def split(self, node):
+        # Push down the objects small enough for a child; counts above the
+        # node do not change
+        limit = node.half_size / 2.0
+        keep = []
+        for obj in node.objects:
+            if obj.bounding_radius > limit:
+                keep.append(obj)
+                continue
+            child = node.child_for(list(obj.position))
+            child.objects.append(obj)
+            child.count += 1
+            obj.index_node = child
+        node.objects = keep
+
+    def remove(self, obj):
+        node = obj.index_node
+        if node is None:
+            if obj in self.outside:
+                self.outside.remove(obj)
+            return
+
+        node.objects.remove(obj)
+        obj.index_node = None
+        while node is not None:
+            node.count -= 1
+            node = node.parent
+
+    def update(self, obj):
+        """Re-file obj after its position or size changed."""
+        node = obj.index_node
+        if node is not None and node.contains(obj):
+            return
+        self.remove(obj)
+        self.insert(obj)
+
+    def grow(self):
+        # Rebuild with the root doubled around the same center
+        objects = self.all_objects()
+        self.root = OctreeNode(self.root.center, self.root.half_size * 2.0, 0)
+        self.max_depth += 1
+        self.outside = []
+        for obj in objects:
+            self.insert(obj)
+
+    def clear(self):
+        for obj in self.all_objects():
+            obj.index_node = None
+        self.root = OctreeNode(self.root.center, self.root.half_size, 0)
+        self.outside = []
+
+    def all_objects(self):
+        out = list(self.outside)
+        self.collect(self.root, out)
+        return out
+
+    def collect(self, node, out):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            out.extend(node.objects)
+            if node.children is not None:
+                stack.extend(child for child in node.children if child is not None and child.count)
+
+    def query(self, planes):
+        """Objects whose bounding sphere intersects the frustum planes."""
+        visible = [obj for obj in self.outside
+                   if sphere_in_frustum(planes, obj.position, obj.bounding_radius)]
+
+        stack = [self.root] if self.root.count else []
+        while stack:
+            node = stack.pop()
+            side = node.classify(planes)
+            if side == OUTSIDE:
+                continue
+            if side == INSIDE:
+                # Whole loose cube is visible: take the subtree untested
+                self.collect(node, visible)
+                continue
+
+            for obj in node.objects:
+                if sphere_in_frustum(planes, obj.position, obj.bounding_radius):
+                    visible.append(obj)
+            if node.children is not None:
+                stack.extend(child for child in node.children if child is not None and child.count)
+        return visible
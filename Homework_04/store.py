@@ -0,0 +1,129 @@
+"""
+Structure-of-arrays storage for scene objects.
+
+A Scene keeps every object attribute in one contiguous NumPy column (row i
+belongs to objects[i]); SceneObject instances are small views holding only
+(store, row). Scene-wide work (LOD, sorting, instancing, picking) can then
+slice the columns instead of walking Python objects.
+"""
+import numpy as np
+
+
+# Object type ids (type_id column)
+TYPE_SPHERE = 0
+TYPE_BOX = 1
+
+# Bits of the flags column
+FLAG_SELECTED = 1
+FLAG_TRANSPARENT = 2   # row is in its scene's transparent render bucket
+
+# name -> (shape of one row, dtype)
+COLUMNS = {
+    "position": ((3,), np.float32),
+    "scale": ((), np.float32),          # sphere radius / box size
+    "color": ((4,), np.float32),        # RGBA
+    "material": ((2,), np.float32),     # shininess, specular strength
+    "type_id": ((), np.uint8),
+    "flags": ((), np.uint8),
+    "lod": ((), np.uint8),              # tessellation level of the unit mesh
+    "slot": ((), np.int32),             # index in its scene's render bucket
+}
+
+
+class ObjectStore:
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.objects = []   # view objects in row order
+        self.capacity = 0
+        self.reserve(max(1, capacity))
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+        for name, (shape, dtype) in COLUMNS.items():
+            column = np.zeros((capacity,) + shape, dtype=dtype)
+            if self.capacity:
+                column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def append(self, obj):
+        """Give obj a new zeroed row at the end and return its index."""
+        if self.count == self.capacity:
+            self.reserve(2 * self.capacity)
+        row = self.count
+        for name in COLUMNS:
+            getattr(self, name)[row] = 0
+        self.count += 1
+        self.objects.append(obj)
+        return row
+
+    def extend(self, columns, make_view):
+        """
+        Append one row per entry of columns ({name: array}, all the same
+        length; missing columns are zeroed). make_view(store, row, type_id)
+        creates the view object of each new row. Returns the new rows.
+        """
+        n = len(columns["type_id"])
+        start = self.count
+        if start + n > self.capacity:
+            self.reserve(max(start + n, 2 * self.capacity))
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[start:start + n] = columns[name] if name in columns else 0
+        self.count += n
+        type_ids = self.type_id[start:start + n].tolist()
+        self.objects.extend(make_view(self, start + i, t) for i, t in enumerate(type_ids))
+        return np.arange(start, start + n)
+
+    def copy_row(self, src, src_row, dst_row):
+        for name in COLUMNS:
+            getattr(self, name)[dst_row] = getattr(src, name)[src_row]
+
+    def adopt(self, obj):
+        """Move obj's row from its current store into this one."""
+        row = self.append(obj)
+        self.copy_row(obj.store, obj.row, row)
+        obj.store.remove(obj)
+        obj.store, obj.row = self, row
+
+    def detach(self, obj):
+        """Move obj out into a private one-row store."""
+        private = ObjectStore(1)
+        private.adopt(obj)
+
+    def detach_all(self):
+        # Like detach() for every object, emptying this store in one pass
+        for obj in self.objects:
+            private = ObjectStore(1)
+            row = private.append(obj)
+            private.copy_row(self, obj.row, row)
+            obj.store, obj.row = private, row
+        self.objects.clear()
+        self.count = 0
+
+    def remove(self, obj):
+        # Move the last row into the gap: O(1), but the last object takes
+        # obj's place in the object order
+        row = obj.row
+        last = self.count - 1
+        if row != last:
+            for name in COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.objects[last]
+            self.objects[row] = moved
+            moved.row = row
+        self.objects.pop()
+        self.count = last
+
+    def rows(self, objects):
+        """Row indices of objects (which must all live in this store)."""
+        return np.fromiter((obj.row for obj in objects), dtype=np.intp, count=len(objects))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
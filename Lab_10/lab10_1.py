@@ -1,14 +1,10 @@
-import os
 import math
 import pygame
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
-# Pillow (PIL) for loading textures
-try:
-    from PIL import Image
-except ImportError:
-    raise SystemExit("Missing Pillow. Install with: python -m pip install Pillow")
+from text_overlay import TextRenderer
+from texture_manager import texture_manager
 
 # -------------------------
 # Config
@@ -57,76 +53,8 @@ def cross(a, b):
 
 
 # -------------------------
-# Texture loading
+# 2D overlay
 # -------------------------
-def load_texture(path: str, use_alpha=False) -> int:
-    """Load an image as an OpenGL texture."""
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Texture not found: {path}")
-
-    tex = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, tex)
-
-    img = Image.open(path)
-    
-    # Check if we need transparency
-    if use_alpha or img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-        img = img.convert("RGBA")
-        mode = GL_RGBA
-    else:
-        img = img.convert("RGB")
-        mode = GL_RGB
-    
-    img = img.transpose(Image.FLIP_TOP_BOTTOM)
-    data = img.tobytes()
-
-    glTexImage2D(
-        GL_TEXTURE_2D, 0, mode,
-        img.width, img.height, 0,
-        mode, GL_UNSIGNED_BYTE, data
-    )
-
-    # Generate mipmaps for better quality
-    glGenerateMipmap(GL_TEXTURE_2D)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-
-    # Set wrapping mode
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-
-    glBindTexture(GL_TEXTURE_2D, 0)
-    return tex
-
-
-# -------------------------
-# OpenGL overlay text (PyGame font -> GL texture)
-# -------------------------
-def create_text_texture(font, text, color=(255, 255, 255), bg=(0, 0, 0, 180)):
-    """
-    Render text to a PyGame RGBA surface, upload it as an OpenGL texture.
-    Returns (tex_id, w, h).
-    """
-    text_surf = font.render(text, True, color)
-    w, h = text_surf.get_size()
-
-    box = pygame.Surface((w + 10, h + 6), pygame.SRCALPHA)
-    box.fill(bg)
-    box.blit(text_surf, (5, 3))
-
-    tex_data = pygame.image.tostring(box, "RGBA", True)
-    tw, th = box.get_size()
-
-    tex_id = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, tex_id)
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, tw, th, 0, GL_RGBA, GL_UNSIGNED_BYTE, tex_data)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glBindTexture(GL_TEXTURE_2D, 0)
-
-    return tex_id, tw, th
-
-
 def begin_2d():
     """Switch to 2D pixel coordinate rendering (0,0)=top-left."""
     glMatrixMode(GL_PROJECTION)
@@ -159,23 +87,6 @@ def end_2d():
     glMatrixMode(GL_MODELVIEW)
 
 
-def draw_tex_2d(tex_id, x, y, w, h):
-    glDisable(GL_CULL_FACE)
-    glEnable(GL_TEXTURE_2D)
-    glBindTexture(GL_TEXTURE_2D, tex_id)
-
-    glColor4f(1, 1, 1, 1)
-    glBegin(GL_QUADS)
-    glTexCoord2f(0, 1); glVertex2f(x,     y)
-    glTexCoord2f(1, 1); glVertex2f(x + w, y)
-    glTexCoord2f(1, 0); glVertex2f(x + w, y + h)
-    glTexCoord2f(0, 0); glVertex2f(x,     y + h)
-    glEnd()
-
-    glBindTexture(GL_TEXTURE_2D, 0)
-    glDisable(GL_TEXTURE_2D)
-
-
 # -------------------------
 # Scene setup
 # -------------------------
@@ -423,15 +334,15 @@ def main():
     setup_scene()
     set_projection()
 
-    # Load textures
-    floor_tex = load_texture("floor.jpg")
-    cube_tex = load_texture("KMITL.png", use_alpha=True)  # Load with transparency
+    # Load textures, decoded in parallel in the background; they show a
+    # grey placeholder and stream in over the first frames
+    floor_tex, cube_tex = texture_manager.load_many([
+        "floor.jpg",
+        ("KMITL.png", {"alpha": True}),  # Load with transparency
+    ], stream=True)
 
-    # Pre-create text textures
-    overlay_tex = []
-    for line in overlay_lines:
-        tid, tw, th = create_text_texture(font, line)
-        overlay_tex.append((tid, tw, th))
+    # Overlay text, laid out once and drawn as one batch
+    text = TextRenderer(font)
 
     clock = pygame.time.Clock()
     running = True
@@ -440,6 +351,9 @@ def main():
         while running:
             running = handle_input()
 
+            # Upload the next part of any texture still streaming
+            texture_manager.update()
+
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
             apply_camera()
@@ -451,10 +365,7 @@ def main():
 
             # 2D OpenGL overlay
             begin_2d()
-            x, y = 10, 10
-            for (tid, tw, th) in overlay_tex:
-                draw_tex_2d(tid, x, y, tw, th)
-                y += th + 6
+            text.draw_lines(overlay_lines, 10, 10, spacing=6)
             end_2d()
 
             pygame.display.flip()
@@ -462,8 +373,8 @@ def main():
 
     finally:
         # Cleanup
-        for (tid, _, _) in overlay_tex:
-            glDeleteTextures([tid])
+        text.release()
+        texture_manager.release_all()
         pygame.quit()
 
 
@@ -0,0 +1,216 @@
+"""
+Batched 2D overlay text for the PyGame + OpenGL labs.
+
+Glyphs are rendered once per font into a GlyphAtlas texture. A line of
+text becomes a run of textured quads (plus one background box) that is
+laid out once and cached by its content; the quads of all overlay lines go
+to the GPU in a single glDrawArrays call. Frames whose lines did not
+change reuse last frame's batch as is.
+"""
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+
+ATLAS_SIZE = 512
+
+# Glyphs rendered up front; others are added on first use
+FIRST_CHAR, LAST_CHAR = 32, 126
+
+# Padding of the background box around a line of text
+PAD_X, PAD_Y = 5, 3
+
+# SDL_ttf places glyphs at fractional advances, so a glyph's advance is
+# measured over a run of this many copies instead of one (rounded) glyph
+ADVANCE_RUN = 16
+
+# One vertex for glInterleavedArrays(GL_T2F_C4UB_V3F)
+VERTEX = np.dtype([("uv", np.float32, 2), ("rgba", np.uint8, 4), ("xyz", np.float32, 3)])
+
+
+# -------------------------
+# Glyph atlas
+# -------------------------
+class GlyphAtlas:
+    """
+    White antialiased glyphs of one font packed in shelves on an RGBA
+    texture; quads tint them with their vertex color.
+    """
+
+    def __init__(self, font, size=ATLAS_SIZE):
+        self.font = font
+        self.size = size
+        self.surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        self.texture = None
+        self.dirty = True
+
+        # char -> (u0, v0, u1, v1, w, h, advance); row 0 of the texture is the top
+        self.glyphs = {}
+        # Shelf packer state (1 px gaps keep glyphs from bleeding)
+        self.cursor_x, self.cursor_y, self.shelf_h = 1, 1, 0
+
+        # Opaque white texel for untextured quads (the line backgrounds)
+        self.surface.fill((255, 255, 255, 255), (1, 1, 2, 2))
+        self.white_uv = (2.0 / size, 2.0 / size)
+        self.cursor_x = 4
+
+        for code in range(FIRST_CHAR, LAST_CHAR + 1):
+            self.add(chr(code))
+
+    def add(self, ch):
+        glyph_surf = self.font.render(ch, True, (255, 255, 255))
+        w, h = glyph_surf.get_size()
+        if self.cursor_x + w + 1 > self.size:
+            self.cursor_x, self.cursor_y = 1, self.cursor_y + self.shelf_h + 1
+            self.shelf_h = 0
+        if w + 2 > self.size or self.cursor_y + h + 1 > self.size:
+            return None   # atlas full
+
+        x, y = self.cursor_x, self.cursor_y
+        self.surface.blit(glyph_surf, (x, y))
+        self.cursor_x += w + 1
+        self.shelf_h = max(self.shelf_h, h)
+
+        advance = self.font.size(ch * ADVANCE_RUN)[0] / ADVANCE_RUN
+
+        s = float(self.size)
+        glyph = (x / s, y / s, (x + w) / s, (y + h) / s, w, h, advance)
+        self.glyphs[ch] = glyph
+        self.dirty = True
+        return glyph
+
+    def glyph(self, ch):
+        glyph = self.glyphs.get(ch)
+        if glyph is None:
+            glyph = self.add(ch) or self.glyphs["?"]
+        return glyph
+
+    def bind(self):
+        if self.texture is None:
+            self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        if self.dirty:
+            # Only when glyphs were added since the last upload
+            data = pygame.image.tostring(self.surface, "RGBA", False)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.size, self.size, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            self.dirty = False
+
+    def release(self):
+        if self.texture is not None:
+            glDeleteTextures([self.texture])
+        self.texture = None
+        self.dirty = True
+
+
+# -------------------------
+# Text renderer
+# -------------------------
+def quad_vertices(rects, uvs, rgba):
+    """
+    VERTEX rows for N screen-space quads (top-left origin), four per quad.
+    rects and uvs are (N, 4) arrays of (x0, y0, x1, y1) and (u0, v0, u1, v1).
+    """
+    rects = np.asarray(rects, dtype=np.float32).reshape(-1, 4)
+    uvs = np.asarray(uvs, dtype=np.float32).reshape(-1, 4)
+    # Corner order: top-left, top-right, bottom-right, bottom-left
+    xs, ys = [0, 2, 2, 0], [1, 1, 3, 3]
+
+    quads = np.zeros((len(rects), 4), dtype=VERTEX)
+    quads["xyz"][..., 0] = rects[:, xs]
+    quads["xyz"][..., 1] = rects[:, ys]
+    quads["uv"][..., 0] = uvs[:, xs]
+    quads["uv"][..., 1] = uvs[:, ys]
+    quads["rgba"] = rgba
+    return quads.reshape(-1)
+
+
+class TextRenderer:
+    """
+    Draws lines of overlay text with one font. Call draw_lines() every
+    frame between the caller's 2D begin/end; only lines whose text changed
+    are laid out again.
+    """
+
+    def __init__(self, font):
+        self.atlas = GlyphAtlas(font)
+        # (text, color, bg) -> (vertices at the origin, box w, box h)
+        self.lines = {}
+        self.batch_key = None
+        self.batch = np.zeros(0, dtype=VERTEX)
+
+    def layout(self, text, color, bg):
+        key = (text, color, bg)
+        cached = self.lines.get(key)
+        if cached is not None:
+            return cached
+
+        atlas = self.atlas
+        rgba = tuple(color) + (255,) * (4 - len(color))
+        rects, uvs = [], []
+        # Pen positions: running sum of the glyph advances (no kerning),
+        # rounded to whole pixels like the font's own layout
+        pen = 0.0
+        for ch in text:
+            u0, v0, u1, v1, w, h, advance = atlas.glyph(ch)
+            if w:
+                x = PAD_X + round(pen)
+                rects.append((x, PAD_Y, x + w, PAD_Y + h))
+                uvs.append((u0, v0, u1, v1))
+            pen += advance
+
+        box_w, box_h = round(pen) + 2 * PAD_X, atlas.font.get_height() + 2 * PAD_Y
+        u, v = atlas.white_uv
+        box = quad_vertices((0, 0, box_w, box_h), (u, v, u, v), bg)
+        glyphs = quad_vertices(rects, uvs, rgba)
+
+        cached = (np.concatenate([box, glyphs]), box_w, box_h)
+        self.lines[key] = cached
+        return cached
+
+    def draw_lines(self, lines, x, y, spacing=4, color=(255, 255, 255), bg=(0, 0, 0, 180)):
+        """Draw lines top-down from (x, y) in pixels, each on its own box."""
+        key = (tuple(lines), x, y, spacing, tuple(color), tuple(bg))
+        if key != self.batch_key:
+            self.build_batch(key)
+        if len(self.batch) == 0:
+            return
+
+        glDisable(GL_CULL_FACE)
+        glEnable(GL_TEXTURE_2D)
+        self.atlas.bind()
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(GL_T2F_C4UB_V3F, 0, self.batch.view(np.uint8))
+        glDrawArrays(GL_QUADS, 0, len(self.batch))
+        glPopClientAttrib()
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        glColor4f(1, 1, 1, 1)
+
+    def build_batch(self, key):
+        lines, x, y, spacing, color, bg = key
+        parts = []
+        used = {}
+        for text in lines:
+            vertices, _, box_h = self.layout(text, color, bg)
+            used[(text, color, bg)] = self.lines[(text, color, bg)]
+
+            placed = vertices.copy()
+            placed["xyz"][:, 0] += x
+            placed["xyz"][:, 1] += y
+            parts.append(placed)
+            y += box_h + spacing
+
+        # Forget lines that are no longer shown
+        self.lines = used
+        self.batch = np.concatenate(parts) if parts else np.zeros(0, dtype=VERTEX)
+        self.batch_key = key
+
+    def release(self):
+        self.atlas.release()
+        self.lines.clear()
+        self.batch_key = None
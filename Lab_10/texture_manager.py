@@ -0,0 +1,466 @@
+"""
+Shared texture loading for the PyGame + OpenGL labs.
+
+TextureManager hands out reference-counted GL texture ids. The same file
+(or two files with identical content) loaded twice share one texture.
+
+Decoded images are kept in a disk cache next to the source: pixel rows
+already flipped for OpenGL, plus the mipmap chain, so a later start loads a
+texture with a single read instead of a Pillow decode. load_many() decodes
+several textures at once on a thread pool; GL uploads stay on the calling
+thread. load_async() returns at once with a 1x1 placeholder texture and
+streams the image in: update(), called once per frame, uploads finished
+decodes coarsest mip level first and at most a byte budget per frame.
+
+Cache layout (little endian):
+  magic b"TEXC" | version u32 | source mtime_ns u64 | source size u64 |
+  sha1 of source 20s | width u32 | height u32 | channels u32 | levels u32 |
+  level 0 .. levels-1 pixels (level i is max(1, w >> i) x max(1, h >> i))
+"""
+import io
+import os
+import struct
+import zlib
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from OpenGL.GL import *
+
+# Pillow (PIL) for decoding images
+try:
+    from PIL import Image
+except ImportError:
+    raise SystemExit("Missing Pillow. Install with: python -m pip install Pillow")
+
+
+CACHE_DIR = "__texcache__"
+MAGIC = b"TEXC"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ20sIIII")
+
+# Decode threads for load_many() and load_async()
+MAX_WORKERS = 4
+
+# Shown until an asynchronously loaded texture is ready
+PLACEHOLDER_RGBA = (128, 128, 128, 255)
+
+# Bytes update() uploads per frame by default
+UPLOAD_BUDGET = 1 << 20
+
+
+# -------------------------
+# Decoding and disk cache
+# -------------------------
+class ImageData:
+    """Pixels ready for glTexImage2D: one bytes-like per mipmap level."""
+
+    def __init__(self, width, height, channels, levels, content_hash):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.levels = levels
+        self.content_hash = content_hash
+
+    @property
+    def nbytes(self):
+        return sum(len(level) for level in self.levels)
+
+
+def level_size(width, height, level):
+    return max(1, width >> level), max(1, height >> level)
+
+
+def cache_path(filename, alpha, mipmaps):
+    # One cache file per source path and variant:
+    # <dir>/__texcache__/<name>.<hash of abs path>.<variant>.bin
+    source = os.path.abspath(filename)
+    key = "%08x" % zlib.crc32(source.encode("utf-8"))
+    variant = ("rgba" if alpha else "auto") + (".mip" if mipmaps else "")
+    folder = os.path.join(os.path.dirname(source), CACHE_DIR)
+    return os.path.join(folder, "%s.%s.%s.bin" % (os.path.basename(source), key, variant))
+
+
+def load_cached(filename, alpha, mipmaps):
+    """ImageData read from the cache, or None if stale/missing."""
+    try:
+        st = os.stat(filename)
+        with open(cache_path(filename, alpha, mipmaps), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, mtime_ns, size, content_hash, width, height, channels, count = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or mtime_ns != st.st_mtime_ns or size != st.st_size:
+        return None
+
+    view = memoryview(data)
+    levels = []
+    offset = HEADER.size
+    for level in range(count):
+        w, h = level_size(width, height, level)
+        end = offset + w * h * channels
+        levels.append(view[offset:end])
+        offset = end
+    if offset != len(data):
+        return None
+    return ImageData(width, height, channels, levels, content_hash)
+
+
+def save_cached(filename, alpha, mipmaps, image):
+    """Write the cache for filename; failures (e.g. read-only folder) are ignored."""
+    path = cache_path(filename, alpha, mipmaps)
+    try:
+        st = os.stat(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".%d.%d.tmp" % (os.getpid(), id(image))
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, st.st_mtime_ns, st.st_size, image.content_hash,
+                                image.width, image.height, image.channels, len(image.levels)))
+            for level in image.levels:
+                f.write(level)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        return False
+
+
+def decode_image(filename, alpha=False, mipmaps=True):
+    """
+    ImageData for filename, from the cache when it is up to date. RGBA when
+    alpha is set or the image has transparency, RGB otherwise.
+    """
+    cached = load_cached(filename, alpha, mipmaps)
+    if cached is not None:
+        return cached
+
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"Texture not found: {filename}")
+    with open(filename, "rb") as f:
+        source = f.read()
+
+    img = Image.open(io.BytesIO(source))
+    # Check if we need transparency
+    if alpha or img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert("RGBA")
+    else:
+        img = img.convert("RGB")
+    img = img.transpose(Image.FLIP_TOP_BOTTOM)
+    width, height = img.size
+
+    levels = [img.tobytes()]
+    if mipmaps:
+        # Each level box-filtered from the one above, down to 1x1
+        while img.width > 1 or img.height > 1:
+            img = img.resize((max(1, img.width // 2), max(1, img.height // 2)), Image.BOX)
+            levels.append(img.tobytes())
+
+    image = ImageData(width, height, len(img.getbands()), levels, hashlib.sha1(source).digest())
+    save_cached(filename, alpha, mipmaps, image)
+    return image
+
+
+# -------------------------
+# GL textures
+# -------------------------
+def upload_texture(image, tex=None):
+    """Upload every level of image into texture tex (a new one if None)."""
+    if tex is None:
+        tex = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, tex)
+
+    fmt = GL_RGBA if image.channels == 4 else GL_RGB
+    # RGB rows of odd widths are not 4-byte aligned
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    for level, pixels in enumerate(image.levels):
+        w, h = level_size(image.width, image.height, level)
+        glTexImage2D(GL_TEXTURE_2D, level, fmt, w, h, 0, fmt, GL_UNSIGNED_BYTE, bytes(pixels))
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+
+    set_sampling(len(image.levels))
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return tex
+
+
+def set_sampling(levels):
+    # Filtering and wrapping for the bound texture with its levels 0 .. levels-1
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, 0)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, levels - 1)
+    if levels > 1:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+    else:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+    # Repeat pattern (floors tile the texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+
+
+def show_level(level):
+    # Sample only this level of the bound texture, without mipmapping
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, level)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, level)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+
+
+def upload_placeholder(tex, level=0):
+    glBindTexture(GL_TEXTURE_2D, tex)
+    glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, 1, 1, 0, GL_RGBA, GL_UNSIGNED_BYTE, bytes(PLACEHOLDER_RGBA))
+    set_sampling(1)
+    show_level(level)
+    glBindTexture(GL_TEXTURE_2D, 0)
+
+
+class StreamJob:
+    """
+    An image being streamed into an existing texture. Levels are uploaded
+    from the coarsest (1x1) to level 0, a few rows at a time; the texture
+    samples the finest finished level meanwhile, so it is never incomplete.
+    """
+
+    def __init__(self, entry, future):
+        self.entry = entry
+        self.future = future
+        self.image = None
+        self.level = -1   # level being uploaded
+        self.row = 0      # next row of that level
+
+    def start(self, image):
+        """Allocate every level; returns the bytes of the 1x1 level sent."""
+        self.image = image
+        self.level = len(image.levels) - 1
+        self.row = 0
+        self.entry.width, self.entry.height = image.width, image.height
+        if self.level == 0:
+            # Single level: keep the placeholder on level 1 while level 0
+            # fills (only the base level is sampled without mipmapping)
+            upload_placeholder(self.entry.tex, level=1)
+
+        # Storage for the whole chain first; allocating it coarse to fine
+        # leaves drivers guessing the base size from a small level
+        fmt = GL_RGBA if image.channels == 4 else GL_RGB
+        glBindTexture(GL_TEXTURE_2D, self.entry.tex)
+        for level in range(len(image.levels)):
+            w, h = level_size(image.width, image.height, level)
+            glTexImage2D(GL_TEXTURE_2D, level, fmt, w, h, 0, fmt, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        # That replaced the placeholder on level 0, so the 1x1 level goes now
+        return self.upload(0, min_rows=1) if self.level else 0
+
+    def upload(self, budget, min_rows=0):
+        """Upload the rows that fit in budget bytes; returns bytes sent."""
+        image = self.image
+        w, h = level_size(image.width, image.height, self.level)
+        fmt = GL_RGBA if image.channels == 4 else GL_RGB
+        row_bytes = w * image.channels
+        rows = max(min_rows, min(h - self.row, budget // row_bytes))
+        if rows == 0:
+            return 0
+        start = self.row * row_bytes
+        pixels = bytes(image.levels[self.level][start:start + rows * row_bytes])
+
+        glBindTexture(GL_TEXTURE_2D, self.entry.tex)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(GL_TEXTURE_2D, self.level, 0, self.row, w, rows, fmt, GL_UNSIGNED_BYTE, pixels)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+
+        self.row += rows
+        if self.row == h:
+            if self.level == 0:
+                set_sampling(len(image.levels))
+            else:
+                show_level(self.level)
+            self.level -= 1
+            self.row = 0
+        glBindTexture(GL_TEXTURE_2D, 0)
+        return rows * row_bytes
+
+    @property
+    def done(self):
+        return self.image is not None and self.level < 0
+
+
+class TextureEntry:
+    def __init__(self, tex, key, content_key, width, height):
+        self.tex = tex
+        self.keys = [key]            # (path, alpha, mipmaps) names of this texture
+        self.content_key = content_key
+        self.width = width
+        self.height = height
+        self.refs = 0
+
+
+class TextureManager:
+    """
+    Reference-counted textures, shared by source path and by content.
+    Every load()/load_many()/load_async() result must be given back with
+    release().
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.pool = None
+        self.by_key = {}       # (abs path, alpha, mipmaps) -> TextureEntry
+        self.by_content = {}   # (sha1, alpha, mipmaps) -> TextureEntry
+        self.by_tex = {}       # GL id -> TextureEntry
+        self.streaming = []    # StreamJobs in request order
+
+    def key(self, path, alpha=False, mipmaps=True):
+        return (os.path.abspath(path), bool(alpha), bool(mipmaps))
+
+    def load(self, path, alpha=False, mipmaps=True):
+        """GL texture id for the image at path (see decode_image)."""
+        entry = self.by_key.get(self.key(path, alpha, mipmaps))
+        if entry is None:
+            entry = self.add(path, alpha, mipmaps, decode_image(path, alpha, mipmaps))
+        entry.refs += 1
+        return entry.tex
+
+    def load_many(self, specs, stream=False):
+        """
+        Texture ids for several images, decoded in parallel. specs are
+        paths or (path, options) pairs, options being load() keywords.
+        With stream=True this returns at once, as load_async() does for
+        each image, and update() uploads the images as they finish.
+        """
+        specs = [(spec, {}) if isinstance(spec, str) else spec for spec in specs]
+        if stream:
+            return [self.load_async(path, **options) for path, options in specs]
+        entries = [self.by_key.get(self.key(path, **options)) for path, options in specs]
+
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if len(missing) > 1:
+            futures = {self.executor().submit(decode_image, specs[i][0], **specs[i][1]): i for i in missing}
+            # Upload each image as soon as its decode finishes
+            for future in as_completed(futures):
+                i = futures[future]
+                path, options = specs[i]
+                entries[i] = self.add(path, options.get("alpha", False), options.get("mipmaps", True),
+                                      future.result())
+        for i in missing:
+            if entries[i] is None:
+                path, options = specs[i]
+                entries[i] = self.add(path, options.get("alpha", False), options.get("mipmaps", True),
+                                      decode_image(path, **options))
+
+        for entry in entries:
+            entry.refs += 1
+        return [entry.tex for entry in entries]
+
+    def load_async(self, path, alpha=False, mipmaps=True):
+        """
+        Like load(), but returns at once: the id shows a 1x1 placeholder
+        until update() has streamed the decoded image into it (for good,
+        if the image cannot be decoded). Shared by
+        path only, since the content is not known yet.
+        """
+        key = self.key(path, alpha, mipmaps)
+        entry = self.by_key.get(key)
+        if entry is None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Texture not found: {path}")
+            entry = TextureEntry(glGenTextures(1), key, None, 1, 1)
+            upload_placeholder(entry.tex)
+            self.by_key[key] = entry
+            self.by_tex[entry.tex] = entry
+            future = self.executor().submit(decode_image, path, alpha, mipmaps)
+            self.streaming.append(StreamJob(entry, future))
+        entry.refs += 1
+        return entry.tex
+
+    def update(self, budget=UPLOAD_BUDGET):
+        """
+        Upload decoded async images, whole rows up to budget bytes (the
+        first row always goes, however wide). Call once per frame on the GL thread.
+        Returns the bytes uploaded.
+        """
+        spent = 0
+        for job in list(self.streaming):
+            if self.by_tex.get(job.entry.tex) is not job.entry:
+                # Released before it finished
+                job.future.cancel()
+                self.streaming.remove(job)
+                continue
+            if job.image is None:
+                if not job.future.done():
+                    continue
+                try:
+                    image = job.future.result()
+                except Exception as e:
+                    # Missing, truncated or corrupt file: keep the placeholder
+                    print(f"Error: Could not load texture '{job.entry.keys[0][0]}': {e}")
+                    self.streaming.remove(job)
+                    continue
+                spent += job.start(image)
+
+            while not job.done:
+                sent = job.upload(budget - spent, min_rows=0 if spent else 1)
+                if sent == 0:
+                    return spent
+                spent += sent
+            if job.done:
+                self.streaming.remove(job)
+                # Later loads of the same content can share it now
+                content_key = (job.image.content_hash,) + job.entry.keys[0][1:]
+                if content_key not in self.by_content:
+                    job.entry.content_key = content_key
+                    self.by_content[content_key] = job.entry
+        return spent
+
+    @property
+    def pending(self):
+        return len(self.streaming)
+
+    def executor(self):
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self.pool
+
+    def add(self, path, alpha, mipmaps, image):
+        # Upload image unless the same path or content is already loaded
+        key = self.key(path, alpha, mipmaps)
+        entry = self.by_key.get(key)
+        if entry is not None:
+            return entry
+
+        content_key = (image.content_hash, bool(alpha), bool(mipmaps))
+        entry = self.by_content.get(content_key)
+        if entry is None:
+            entry = TextureEntry(upload_texture(image), key, content_key, image.width, image.height)
+            self.by_content[content_key] = entry
+            self.by_tex[entry.tex] = entry
+        else:
+            entry.keys.append(key)
+        self.by_key[key] = entry
+        return entry
+
+    def release(self, tex):
+        entry = self.by_tex.get(tex)
+        if entry is None:
+            return
+        entry.refs -= 1
+        if entry.refs <= 0:
+            self.forget(entry)
+
+    def forget(self, entry):
+        for key in entry.keys:
+            del self.by_key[key]
+        if entry.content_key is not None:
+            del self.by_content[entry.content_key]
+        del self.by_tex[entry.tex]
+        glDeleteTextures([entry.tex])
+
+    def release_all(self):
+        # Free every texture, e.g. before the GL context goes away
+        for entry in list(self.by_tex.values()):
+            self.forget(entry)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        self.streaming.clear()
+
+
+texture_manager = TextureManager()
@@ -0,0 +1,508 @@
+"""
+Headless benchmark suite for the software render paths in this repo.
+
+Times each hot path on fixed scenes at several resolutions / mesh sizes and
+reports pixels/s, rays/s, triangles/s or MB/s. Results are written as JSON so
+two commits can be compared:
+
+    python benchmarks/run_benchmarks.py                      # full run
+    python benchmarks/run_benchmarks.py --quick              # small sizes only
+    python benchmarks/run_benchmarks.py --only lab4 lab8     # name filter
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json
+
+No window is opened (SDL dummy video driver). Scene.render needs an OpenGL
+context and is reported as skipped when one cannot be created.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+import subprocess
+
+# Headless: must be set before pygame is imported anywhere
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for lab_dir in ("lab4", "lab5", "lab8", "Homework_04"):
+    sys.path.insert(0, os.path.join(ROOT, lab_dir))
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# -------------------------
+# Timing helpers
+# -------------------------
+def time_call(fn, repeat=3, min_time=0.2):
+    """Best wall time of fn() over `repeat` runs (each run at least once)."""
+    best = float("inf")
+    total = 0.0
+    runs = 0
+    while runs < repeat or (total < min_time and runs < repeat * 10):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+    return best
+
+
+def result(name, params, seconds, **work):
+    """work: amounts per call, e.g. pixels=..., rays=..., triangles=..., mb=..."""
+    entry = {"name": name, "params": params, "seconds": seconds}
+    for unit, amount in work.items():
+        key = "MB_per_s" if unit == "mb" else unit + "_per_s"
+        entry[key] = amount / seconds if seconds > 0 else float("inf")
+    return entry
+
+
+def file_mb(path):
+    return os.path.getsize(path) / (1024.0 * 1024.0)
+
+
+# -------------------------
+# lab4: ray tracers
+# -------------------------
+def bench_lab4_sphere(sizes, repeat):
+    import lab04_1_Real_Ray_Tracing as rt
+
+    out = []
+    rng = random.Random(1)
+    n = 20000
+    rays = []
+    for _ in range(n):
+        d = rt.normalize((rng.uniform(-0.6, 0.6), rng.uniform(-0.6, 0.6), 1.0))
+        rays.append(d)
+
+    def scalar():
+        for d in rays:
+            rt.ray_sphere_intersect(rt.EYE, d, rt.SPHERE_CENTER, rt.SPHERE_RADIUS)
+
+    out.append(result("lab4.ray_sphere_intersect", {"rays": n}, time_call(scalar, repeat), rays=n))
+
+    dirs = np.array(rays)
+    batch = lambda: rt.ray_sphere_intersect_batch(rt.EYE, dirs, rt.SPHERE_CENTER, rt.SPHERE_RADIUS)
+    out.append(result("lab4.ray_sphere_intersect_batch", {"rays": n}, time_call(batch, repeat), rays=n))
+
+    for w, h in sizes:
+        fn = lambda: rt.render_image(w, h, rt.EYE, (-5.0, 5.0, -5.0), rt.SPHERE_CENTER, rt.SPHERE_RADIUS)
+        out.append(result("lab4.sphere_render_image", {"width": w, "height": h},
+                          time_call(fn, repeat), pixels=w * h, rays=w * h))
+    return out
+
+
+def teapot_triangles():
+    from LoadMesh import LoadMesh
+    from OpenGL.GL import GL_TRIANGLES
+
+    mesh = LoadMesh(os.path.join(ROOT, "lab5", "teapot.obj"), GL_TRIANGLES)
+    verts = np.asarray(mesh.vertices, dtype=np.float64)
+    idx = np.asarray(mesh.triangles, dtype=np.int64).reshape(-1, 3)
+
+    # Fit into the unit-ish box the camera in lab04_2 looks at
+    verts = verts - (verts.min(axis=0) + verts.max(axis=0)) * 0.5
+    verts = verts / np.abs(verts).max() * 1.5
+    return [tuple(map(tuple, verts[tri])) for tri in idx]
+
+
+def bench_lab4_triangles(sizes, repeat, quick):
+    import lab04_2_OpenGL as rt
+    from tri_packet import TriangleSoA
+
+    out = []
+    meshes = [("box", rt.build_rotated_box_mesh(13.0))]
+    meshes.append(("teapot", teapot_triangles()))
+
+    for mesh_name, tris in meshes:
+        params = {"mesh": mesh_name, "triangles": len(tris)}
+
+        t = time_call(lambda: rt.build_bvh(tris), repeat)
+        out.append(result("lab4.build_bvh", params, t, triangles=len(tris)))
+
+        bvh = rt.build_bvh(tris)
+        t = time_call(lambda: rt.refit_bvh(bvh, tris), repeat)
+        out.append(result("lab4.refit_bvh", params, t, triangles=len(tris)))
+
+        # trace_ray on the primary rays of a small fixed image
+        gw, gh = (40, 30) if quick else (80, 60)
+        n = gw * gh
+        camera = rt.setup_camera(gw, gh)
+        dirs = [rt.camera_ray_dir(camera, gw, gh, i + 0.5, j + 0.5)
+                for j in range(gh) for i in range(gw)]
+        eye = camera[0]
+
+        def trace():
+            cache = {}
+            for d in dirs:
+                rt.trace_ray(eye, d, bvh, rt.LIGHTS, rt.BACKGROUND_COLOR, cache)
+
+        out.append(result("lab4.trace_ray", dict(params, rays=n), time_call(trace, repeat), rays=n))
+
+        soa = TriangleSoA(tris)
+        packet_dirs = np.array(dirs)
+        packet = lambda: rt.trace_packet(eye, packet_dirs, soa, rt.LIGHTS, rt.BACKGROUND_COLOR)
+        out.append(result("lab4.trace_packet", dict(params, rays=n), time_call(packet, repeat), rays=n))
+
+        for w, h in sizes:
+            if mesh_name != "box" and w * h > 160 * 120:
+                continue
+            p = dict(params, width=w, height=h)
+            fn = lambda: rt.render(w, h, 13.0, bvh)
+            out.append(result("lab4.render", p, time_call(fn, 1), pixels=w * h))
+            if mesh_name != "box" and w * h > 80 * 60:
+                continue  # brute-force packets over thousands of triangles
+            fn = lambda: rt.render_packet(w, h, 13.0, soa)
+            out.append(result("lab4.render_packet", p, time_call(fn, repeat), pixels=w * h))
+    return out
+
+
+# -------------------------
+# lab8: software rasterizers
+# -------------------------
+def bench_lab8(repeat):
+    import lab8_1
+    import lab8_2
+    from framebuffer import Framebuffer
+
+    out = []
+    fb = Framebuffer(lab8_2.WINDOW_WIDTH, lab8_2.WINDOW_HEIGHT)
+    colors = ((255, 0, 0), (0, 255, 0), (0, 0, 255))
+    triangles = {
+        "small": ((100, 100), (120, 140), (140, 105)),
+        "medium": ((200, 120), (120, 420), (520, 380)),
+        "full": ((0, 0), (0, 599), (799, 300)),
+    }
+    for size, (a, b, c) in triangles.items():
+        area = abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) * 0.5
+        fn = lambda: lab8_2.rasterize_triangle(fb, a, b, c, *colors)
+        out.append(result("lab8.rasterize_triangle", {"size": size, "area_px": area},
+                          time_call(fn, repeat), pixels=area, triangles=1))
+
+    lines = [(0, 0, 799, 599), (10, 590, 790, 20), (400, 0, 401, 599)]
+    line_pixels = sum(max(abs(x1 - x0), abs(y1 - y0)) + 1 for x0, y0, x1, y1 in lines)
+
+    def bresenham():
+        for line in lines:
+            lab8_1.bresenham_line(*line)
+
+    out.append(result("lab8.bresenham_line", {"lines": len(lines)}, time_call(bresenham, repeat),
+                      pixels=line_pixels))
+
+    def draw_lines():
+        for line in lines:
+            lab8_1.draw_line(fb, *line, (255, 255, 255))
+
+    out.append(result("lab8.draw_line", {"lines": len(lines)}, time_call(draw_lines, repeat),
+                      pixels=line_pixels))
+    return out
+
+
+# -------------------------
+# Mesh loading
+# -------------------------
+def bench_mesh_loading(repeat):
+    from LoadMesh import LoadMesh
+    from ObjParser import parse_obj_file
+    from lab8_4 import OBJModel
+    from OpenGL.GL import GL_TRIANGLES
+
+    out = []
+    files = [
+        os.path.join(ROOT, "lab5", "cube.obj"),
+        os.path.join(ROOT, "lab5", "teapot.obj"),
+        os.path.join(ROOT, "lab8", "icecream.obj"),
+    ]
+    for path in files:
+        mb = file_mb(path)
+        params = {"file": os.path.relpath(path, ROOT)}
+
+        data = parse_obj_file(path)
+        out.append(result("mesh.ObjParser.parse_obj_file", params,
+                          time_call(lambda: parse_obj_file(path), repeat),
+                          mb=mb, triangles=len(data.tri_v)))
+
+        mesh = LoadMesh(path, GL_TRIANGLES)
+        tris = len(mesh.triangles) // 3
+
+        def load_drawing():
+            mesh.vertices = []
+            mesh.triangles = []
+            mesh.load_drawing()
+
+        out.append(result("mesh.LoadMesh.load_drawing", params, time_call(load_drawing, repeat),
+                          mb=mb, triangles=tris))
+
+        # Uncached path: the OBJ text parse load_drawing falls back to
+        out.append(result("mesh.LoadMesh.parse_obj", params, time_call(mesh.parse_obj, repeat),
+                          mb=mb, triangles=tris))
+
+        model = OBJModel.__new__(OBJModel)
+
+        def obj_load():
+            OBJModel.__init__(model, path)
+
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                t = time_call(obj_load, repeat)
+            finally:
+                sys.stdout = stdout
+        out.append(result("mesh.OBJModel.load", params, t, mb=mb, triangles=model.triangle_count()))
+    return out
+
+
+# -------------------------
+# Homework_04: picking and scene rendering
+# -------------------------
+def random_scene(n, seed=7):
+    from objects import SphereObject, BoxObject
+    from scene import Scene
+
+    rng = random.Random(seed)
+    scene = Scene()
+    extent = max(10.0, math.sqrt(n) * 2.0)
+    for i in range(n):
+        pos = (rng.uniform(-extent, extent), rng.uniform(0.5, 4.0), rng.uniform(-extent, extent))
+        color = (rng.random(), rng.random(), rng.random(), 1.0 if rng.random() < 0.8 else 0.5)
+        if i % 5 == 4:
+            scene.add_object(BoxObject(position=pos, size=rng.uniform(0.5, 2.0), color=color))
+        else:
+            scene.add_object(SphereObject(position=pos, radius=rng.uniform(0.3, 1.5), color=color))
+    return scene
+
+
+def bench_picking(counts, repeat):
+    from picking import pick_ray, ObjectBVH
+
+    out = []
+    rng = np.random.default_rng(3)
+    for n in counts:
+        scene = random_scene(n)
+        rays = []
+        for _ in range(20):
+            origin = np.array([0.0, 8.0, 30.0])
+            target = np.array([rng.uniform(-10, 10), rng.uniform(0, 4), rng.uniform(-10, 10)])
+            d = target - origin
+            rays.append((origin, d / np.linalg.norm(d)))
+
+        def pick():
+            for origin, d in rays:
+                pick_ray(origin, d, scene.objects)
+
+        t = time_call(pick, repeat) / len(rays)
+        out.append(result("hw4.pick_object", {"objects": n}, t, rays=1))
+
+        t = time_call(lambda: ObjectBVH(scene.store), repeat)
+        out.append(result("hw4.ObjectBVH.build", {"objects": n}, t, objects=n))
+
+        bvh = ObjectBVH(scene.store)
+
+        def pick_bvh():
+            for origin, d in rays:
+                pick_ray(origin, d, scene.objects, bvh)
+
+        t = time_call(pick_bvh, repeat) / len(rays)
+        out.append(result("hw4.pick_object", {"objects": n, "bvh": True}, t, rays=1))
+    return out
+
+
+def bench_scene_io(counts, repeat):
+    import tempfile
+    import io_scene
+    from scene import Scene
+
+    out = []
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            for n in counts:
+                scene = random_scene(n)
+                params = {"objects": n}
+                formats = [("binary", os.path.join(tmp, "scene.bin"), None),
+                           ("binary+zlib", os.path.join(tmp, "scene_zlib.bin"), "zlib"),
+                           ("json", os.path.join(tmp, "scene.json"), None)]
+                for label, path, compression in formats:
+                    t = time_call(lambda: io_scene.save_scene(scene, path, compression), repeat)
+                    mb = os.path.getsize(path) / 1e6
+                    out.append(result("hw4.save_scene", dict(params, format=label), t, mb=mb, objects=n))
+
+                    t = time_call(lambda: io_scene.load_scene(Scene(), path), repeat)
+                    out.append(result("hw4.load_scene", dict(params, format=label), t, mb=mb, objects=n))
+        finally:
+            sys.stdout = stdout
+    return out
+
+
+def create_gl_context(width, height):
+    """Hidden OpenGL window, or None when no GL context is available."""
+    import pygame
+
+    try:
+        pygame.display.init()
+        pygame.display.set_mode((width, height), pygame.OPENGL | pygame.DOUBLEBUF | pygame.HIDDEN)
+        from OpenGL.GL import glGetString, GL_VERSION
+        from OpenGL.platform import GetCurrentContext
+        if not glGetString(GL_VERSION):
+            raise RuntimeError("no GL version")
+        # SDL's offscreen driver makes an EGL context, which PyOpenGL only
+        # sees with PYOPENGL_PLATFORM=egl (client arrays need it)
+        if not GetCurrentContext():
+            raise RuntimeError("context not visible to PyOpenGL")
+        return pygame
+    except Exception:
+        pygame.display.quit()
+        return None
+
+
+def bench_scene_render(counts, repeat):
+    saved_driver = os.environ.get("SDL_VIDEODRIVER")
+    if saved_driver == "dummy":
+        del os.environ["SDL_VIDEODRIVER"]
+    try:
+        pygame = create_gl_context(320, 240)
+    finally:
+        if saved_driver is not None:
+            os.environ["SDL_VIDEODRIVER"] = saved_driver
+
+    if pygame is None:
+        return [{"name": "hw4.Scene.render", "skipped": "no OpenGL context available"}]
+
+    from OpenGL.GL import (glFinish, glClear, glMatrixMode, glLoadIdentity, GL_COLOR_BUFFER_BIT,
+                           GL_DEPTH_BUFFER_BIT, GL_PROJECTION, GL_MODELVIEW)
+    from OpenGL.GLU import gluPerspective, gluLookAt
+
+    # Same camera as the editor's default view (frustum culling reads it)
+    eye = (0.0, 8.0, 30.0)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(60.0, 320 / 240, 0.1, 500.0)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    gluLookAt(*eye, 0.0, 1.0, 0.0, 0.0, 1.0, 0.0)
+
+    out = []
+    try:
+        for n in counts:
+            scene = random_scene(n)
+
+            def render():
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                scene.render(eye)
+                glFinish()
+
+            t = time_call(render, repeat)
+            out.append(result("hw4.Scene.render", {"objects": n}, t, objects=n))
+    finally:
+        # Cached unit meshes and the instancing shader belong to this context
+        from geometry import geometry_cache
+        from instancing import instance_renderer
+        geometry_cache.release()
+        instance_renderer.release()
+        pygame.display.quit()
+    return out
+
+
+# -------------------------
+# Driver
+# -------------------------
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def entry_key(entry):
+    return entry["name"] + " " + json.dumps(entry.get("params", {}), sort_keys=True)
+
+
+def print_results(results, baseline=None):
+    base = {}
+    if baseline:
+        base = {entry_key(e): e for e in baseline["results"] if "seconds" in e}
+
+    for entry in results:
+        label = entry["name"] + " " + ", ".join(f"{k}={v}" for k, v in entry.get("params", {}).items())
+        if "skipped" in entry:
+            print(f"{label:70s} skipped: {entry['skipped']}")
+            continue
+
+        rates = ", ".join(f"{v:,.0f} {k.replace('_per_s', '/s')}"
+                          for k, v in entry.items() if k.endswith("_per_s"))
+        line = f"{label:70s} {entry['seconds'] * 1000:10.3f} ms  {rates}"
+        old = base.get(entry_key(entry))
+        if old:
+            line += f"  ({old['seconds'] / entry['seconds']:.2f}x vs baseline)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the software render paths.")
+    parser.add_argument("--quick", action="store_true", help="small sizes only")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", default=None, help="only run groups containing these names")
+    parser.add_argument("--out", default=None, help="JSON output path (default: benchmarks/results/<rev>.json)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [(80, 60), (160, 120)] if args.quick else [(80, 60), (160, 120), (320, 240), (800, 600)]
+    tracer_sizes = sizes[:2] if args.quick else sizes[:3]
+    counts = [13, 1000] if args.quick else [13, 1000, 10000]
+
+    groups = [
+        ("lab4.sphere", lambda: bench_lab4_sphere(sizes, args.repeat)),
+        ("lab4.triangles", lambda: bench_lab4_triangles(tracer_sizes, args.repeat, args.quick)),
+        ("lab8", lambda: bench_lab8(args.repeat)),
+        ("mesh", lambda: bench_mesh_loading(args.repeat)),
+        ("hw4.picking", lambda: bench_picking(counts, args.repeat)),
+        ("hw4.scene", lambda: bench_scene_render(counts, args.repeat)),
+        ("hw4.io", lambda: bench_scene_io(counts, args.repeat)),
+    ]
+
+    results = []
+    for name, run in groups:
+        if args.only and not any(key in name for key in args.only):
+            continue
+        print(f"== {name}")
+        group_results = run()
+        print_results(group_results)
+        results.extend(group_results)
+
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    out_path = args.out
+    if out_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out_path = os.path.join(RESULTS_DIR, f"{revision or 'results'}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n== Compared with {args.compare} (revision {baseline.get('revision')})")
+        print_results(results, baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
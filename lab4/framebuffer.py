@@ -0,0 +1,46 @@
+import numpy as np
+import pygame
+
+# Software framebuffer shared by the CPU ray tracers (lab4) and rasterizers (lab8).
+# Pixels live in one contiguous (H, W, 3) uint8 array; presenting it is a single
+# blit from a pygame Surface that views the same memory, no per-pixel calls.
+
+
+class Framebuffer:
+    def __init__(self, width, height, buffer=None):
+        """
+        buffer: optional writable buffer (e.g. SharedMemory.buf) of at least
+        width * height * 3 bytes to use instead of a private allocation.
+        """
+        self.width = width
+        self.height = height
+
+        if buffer is None:
+            self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        else:
+            self.pixels = np.ndarray((height, width, 3), dtype=np.uint8, buffer=buffer)
+
+        # Zero-copy view of self.pixels, only valid while the array is alive
+        self.surface = pygame.image.frombuffer(self.pixels, (width, height), "RGB")
+
+    def clear(self, color=(0, 0, 0)):
+        self.pixels[:] = color
+
+    def plot(self, xs, ys, color):
+        """Write one color to many pixels; out-of-range coordinates are skipped."""
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.pixels[ys[inside], xs[inside]] = color
+
+    def present(self, target, rect=None):
+        """Blit the whole framebuffer, or just rect=(x, y, w, h), onto target."""
+        if rect is None:
+            target.blit(self.surface, (0, 0))
+        else:
+            target.blit(self.surface, rect[:2], rect)
+
+    def release(self):
+        # Drop the surface and array views so an external buffer can be closed
+        self.surface = None
+        self.pixels = None
@@ -1,7 +1,9 @@
 import sys
 import math
+import numpy as np
 import pygame
 from pygame.locals import *
+from framebuffer import Framebuffer
 
 # Window size
 WIDTH, HEIGHT = 800, 600
@@ -64,75 +66,117 @@ def ray_sphere_intersect(e, d, c, r):
     return t_min
 
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ray–Sphere Intersection (Part 2)")
+def normalize_rows(v):
+    return v / np.linalg.norm(v, axis=-1, keepdims=True)
 
-    clock = pygame.time.Clock()
 
-    aspect = WIDTH / HEIGHT
+def ray_sphere_intersect_batch(e, d, c, r):
+    # Same quadratic as ray_sphere_intersect, solved for every row of d (N, 3).
+    # Returns t per ray, np.inf where the ray misses.
+    oc = np.asarray(e, dtype=np.float64) - np.asarray(c, dtype=np.float64)
+
+    a = np.einsum("ij,ij->i", d, d)
+    b = 2.0 * (d @ oc)
+    c_val = oc @ oc - r * r
+
+    disc = b * b - 4 * a * c_val
+    hit = disc >= 0
+
+    sqrt_disc = np.sqrt(np.where(hit, disc, 0.0))
+    t1 = (-b - sqrt_disc) / (2 * a)
+    t2 = (-b + sqrt_disc) / (2 * a)
+
+    t = np.where(t1 > 0, t1, np.where(t2 > 0, t2, np.inf))
+    t[~hit] = np.inf
+    return t
+
+
+def render_image(width, height, eye, light_pos, sphere_center, sphere_radius):
+    # Whole frame at once: returns an (height, width, 3) uint8 image
+    aspect = width / height
     scale = math.tan(math.radians(FOV_Y * 0.5))
 
     # Camera basis
-    forward = normalize((0.0, -0.5, 4.0))
-    right = normalize((1.0, 0.0, 0.0))
-    up = normalize((0.0, 1.0, 0.0))
+    forward = np.array(normalize((0.0, -0.5, 4.0)))
+    right = np.array(normalize((1.0, 0.0, 0.0)))
+    up = np.array(normalize((0.0, 1.0, 0.0)))
 
-    # Light (same idea as OpenGL light)
-    light_pos = (-5.0, 5.0, -5.0)
-    light_color = (1.0, 1.0, 1.0)
+    # NDC -> image plane for every pixel center
+    px = (2 * (np.arange(width) + 0.5) / width - 1) * aspect * scale
+    py = (1 - 2 * (np.arange(height) + 0.5) / height) * scale
 
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                running = False
-            elif event.type == KEYDOWN and event.key == K_ESCAPE:
-                running = False
+    # Primary ray directions, (height * width, 3)
+    d = (forward
+         + px[None, :, None] * right
+         + py[:, None, None] * up)
+    d = normalize_rows(d.reshape(-1, 3))
+
+    t = ray_sphere_intersect_batch(eye, d, sphere_center, sphere_radius)
+    hit = np.isfinite(t)
+
+    image = np.empty((height * width, 3), dtype=np.uint8)
+    image[:] = (64, 64, 64)
+
+    if hit.any():
+        e = np.asarray(eye, dtype=np.float64)
 
-        for y in range(HEIGHT):
-            for x in range(WIDTH):
-                # NDC
-                ndc_x = (2 * (x + 0.5) / WIDTH - 1) * aspect
-                ndc_y = 1 - 2 * (y + 0.5) / HEIGHT
+        # Intersection points and normals
+        p = e + d[hit] * t[hit, None]
+        n = normalize_rows(p - np.asarray(sphere_center, dtype=np.float64))
 
-                # Image plane
-                px = ndc_x * scale
-                py = ndc_y * scale
+        # Lighting (diffuse + specular)
+        l = normalize_rows(np.asarray(light_pos, dtype=np.float64) - p)
+        v = normalize_rows(e - p)
+        h = normalize_rows(l + v)
 
-                # Ray direction
-                d = normalize((
-                    forward[0] + px * right[0] + py * up[0],
-                    forward[1] + px * right[1] + py * up[1],
-                    forward[2] + px * right[2] + py * up[2],
-                ))
+        diff = np.maximum(np.einsum("ij,ij->i", n, l), 0.0)
+        spec = np.maximum(np.einsum("ij,ij->i", n, h), 0.0) ** 50
 
-                t = ray_sphere_intersect(EYE, d, SPHERE_CENTER, SPHERE_RADIUS)
+        r = np.minimum(255, ((diff + 0.6 * spec) * 255).astype(np.int32))
+        image[hit, 0] = r
+        image[hit, 1:] = 0
 
-                if t is not None:
-                    # Intersection point
-                    p = add(EYE, mul(d, t))
+    return image.reshape(height, width, 3)
 
-                    # Normal
-                    n = normalize(sub(p, SPHERE_CENTER))
 
-                    # Lighting (diffuse + specular)
-                    l = normalize(sub(light_pos, p))
-                    v = normalize(sub(EYE, p))
-                    h = normalize(add(l, v))
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Ray–Sphere Intersection (Part 2)")
 
-                    diff = max(dot(n, l), 0.0)
-                    spec = pow(max(dot(n, h), 0.0), 50)
+    clock = pygame.time.Clock()
+    framebuffer = Framebuffer(WIDTH, HEIGHT)
 
-                    r = min(255, int((diff + 0.6 * spec) * 255))
-                    color = (r, 0, 0)
-                else:
-                    color = (64, 64, 64)
+    # Light (same idea as OpenGL light), arrow keys / PgUp / PgDn move it
+    light_pos = [-5.0, 5.0, -5.0]
+
+    # Only re-render when something in the scene actually changed
+    last_state = None
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                running = False
+            elif event.type == KEYDOWN and event.key == K_ESCAPE:
+                running = False
 
-                screen.set_at((x, y), color)
+        keys = pygame.key.get_pressed()
+        if keys[K_LEFT]: light_pos[0] -= 0.2
+        if keys[K_RIGHT]: light_pos[0] += 0.2
+        if keys[K_UP]: light_pos[2] += 0.2
+        if keys[K_DOWN]: light_pos[2] -= 0.2
+        if keys[K_PAGEUP]: light_pos[1] += 0.2
+        if keys[K_PAGEDOWN]: light_pos[1] -= 0.2
+
+        state = (EYE, tuple(light_pos), SPHERE_CENTER, SPHERE_RADIUS)
+        if state != last_state:
+            framebuffer.pixels[:] = render_image(WIDTH, HEIGHT, EYE, light_pos,
+                                                 SPHERE_CENTER, SPHERE_RADIUS)
+            framebuffer.present(screen)
+            pygame.display.flip()
+            last_state = state
 
-        pygame.display.flip()
         clock.tick(30)
 
     pygame.quit()
@@ -1,5 +1,13 @@
+import os
+import sys
 import math
+import time
+import numpy as np
 import pygame
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from tri_packet import TriangleSoA, intersect_packet
+from framebuffer import Framebuffer
 
 # ========== Basic vector helpers ==========
 
@@ -140,35 +148,308 @@ def build_rotated_box_mesh(angle_y_deg):
 
     return triangles
 
-# ========== Shading ==========
+# ========== BVH (binned SAH) ==========
+
+BVH_BINS = 12
+BVH_LEAF_SIZE = 2
+BVH_MAX_LEAF_SIZE = 8
+RAY_INV_BIG = 1e30
+
+class BVHNode:
+    def __init__(self, first, count):
+        self.bmin = None
+        self.bmax = None
+        self.left = None
+        self.right = None
+        self.first = first   # range into BVH.tri_ids (used by leaves)
+        self.count = count
+
+class BVH:
+    def __init__(self, triangles):
+        self.triangles = triangles
+        self.tri_ids = list(range(len(triangles)))
+        self.root = None
+
+def triangle_bounds(tri):
+    v0, v1, v2 = tri
+    bmin = (min(v0[0], v1[0], v2[0]), min(v0[1], v1[1], v2[1]), min(v0[2], v1[2], v2[2]))
+    bmax = (max(v0[0], v1[0], v2[0]), max(v0[1], v1[1], v2[1]), max(v0[2], v1[2], v2[2]))
+    return bmin, bmax
+
+def bounds_union(amin, amax, bmin, bmax):
+    return ((min(amin[0], bmin[0]), min(amin[1], bmin[1]), min(amin[2], bmin[2])),
+            (max(amax[0], bmax[0]), max(amax[1], bmax[1]), max(amax[2], bmax[2])))
+
+def bounds_area(bmin, bmax):
+    dx = bmax[0] - bmin[0]
+    dy = bmax[1] - bmin[1]
+    dz = bmax[2] - bmin[2]
+    return dx*dy + dy*dz + dz*dx
+
+def build_bvh(triangles):
+    bvh = BVH(triangles)
+    if not triangles:
+        return bvh
+
+    bounds = [triangle_bounds(t) for t in triangles]
+    centroids = [
+        ((bmin[0] + bmax[0]) * 0.5, (bmin[1] + bmax[1]) * 0.5, (bmin[2] + bmax[2]) * 0.5)
+        for bmin, bmax in bounds
+    ]
 
-def trace_ray(ray_origin, ray_dir, triangles, lights, background_color):
+    bvh.root = BVHNode(0, len(triangles))
+    stack = [bvh.root]
+    while stack:
+        node = stack.pop()
+        ids = bvh.tri_ids[node.first:node.first + node.count]
+
+        node.bmin, node.bmax = bounds[ids[0]]
+        cmin = cmax = centroids[ids[0]]
+        for i in ids[1:]:
+            node.bmin, node.bmax = bounds_union(node.bmin, node.bmax, *bounds[i])
+            cmin, cmax = bounds_union(cmin, cmax, centroids[i], centroids[i])
+
+        if node.count <= BVH_LEAF_SIZE:
+            continue
+
+        split = find_sah_split(ids, bounds, centroids, cmin, cmax)
+        leaf_cost = node.count * bounds_area(node.bmin, node.bmax)
+        if split is None or (split[0] >= leaf_cost and node.count <= BVH_MAX_LEAF_SIZE):
+            continue
+
+        _, axis, pos = split
+        left_ids = [i for i in ids if centroids[i][axis] < pos]
+        right_ids = [i for i in ids if centroids[i][axis] >= pos]
+        if not left_ids or not right_ids:
+            # All centroids landed on one side: fall back to a median split
+            ids.sort(key=lambda i: centroids[i][axis])
+            half = len(ids) // 2
+            left_ids, right_ids = ids[:half], ids[half:]
+
+        bvh.tri_ids[node.first:node.first + node.count] = left_ids + right_ids
+        node.left = BVHNode(node.first, len(left_ids))
+        node.right = BVHNode(node.first + len(left_ids), len(right_ids))
+        stack.append(node.left)
+        stack.append(node.right)
+
+    return bvh
+
+def find_sah_split(ids, bounds, centroids, cmin, cmax):
+    # Returns (cost, axis, split_position) of the cheapest bin boundary, or None
+    best = None
+    for axis in range(3):
+        extent = cmax[axis] - cmin[axis]
+        if extent <= 0.0:
+            continue
+        scale = BVH_BINS / extent
+
+        bin_count = [0] * BVH_BINS
+        bin_bounds = [None] * BVH_BINS
+        for i in ids:
+            b = min(BVH_BINS - 1, int((centroids[i][axis] - cmin[axis]) * scale))
+            bin_count[b] += 1
+            if bin_bounds[b] is None:
+                bin_bounds[b] = bounds[i]
+            else:
+                bin_bounds[b] = bounds_union(*bin_bounds[b], *bounds[i])
+
+        # Sweep from the right to get the area/count of every right side
+        right_area = [0.0] * BVH_BINS
+        right_count = [0] * BVH_BINS
+        acc, n = None, 0
+        for b in range(BVH_BINS - 1, 0, -1):
+            if bin_bounds[b] is not None:
+                acc = bin_bounds[b] if acc is None else bounds_union(*acc, *bin_bounds[b])
+                n += bin_count[b]
+            right_area[b] = bounds_area(*acc) if acc is not None else 0.0
+            right_count[b] = n
+
+        acc, n = None, 0
+        for b in range(BVH_BINS - 1):
+            if bin_bounds[b] is not None:
+                acc = bin_bounds[b] if acc is None else bounds_union(*acc, *bin_bounds[b])
+                n += bin_count[b]
+            if n == 0 or right_count[b + 1] == 0:
+                continue
+            cost = bounds_area(*acc) * n + right_area[b + 1] * right_count[b + 1]
+            if best is None or cost < best[0]:
+                best = (cost, axis, cmin[axis] + (b + 1) / scale)
+    return best
+
+def refit_bvh(bvh, triangles):
+    # Same topology, new vertex positions: recompute bounds bottom-up
+    bvh.triangles = triangles
+    if bvh.root is None:
+        return bvh
+
+    order = []
+    stack = [bvh.root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.left is not None:
+            stack.append(node.left)
+            stack.append(node.right)
+
+    for node in reversed(order):
+        if node.left is None:
+            ids = bvh.tri_ids[node.first:node.first + node.count]
+            node.bmin, node.bmax = triangle_bounds(triangles[ids[0]])
+            for i in ids[1:]:
+                node.bmin, node.bmax = bounds_union(node.bmin, node.bmax,
+                                                    *triangle_bounds(triangles[i]))
+        else:
+            node.bmin, node.bmax = bounds_union(node.left.bmin, node.left.bmax,
+                                                node.right.bmin, node.right.bmax)
+    return bvh
+
+def inverse_dir(ray_dir):
+    return tuple(1.0 / d if d != 0.0 else RAY_INV_BIG for d in ray_dir)
+
+def ray_aabb(ray_origin, inv_dir, bmin, bmax, t_max):
+    # Slab test, returns the entry distance or None
+    t1 = (bmin[0] - ray_origin[0]) * inv_dir[0]
+    t2 = (bmax[0] - ray_origin[0]) * inv_dir[0]
+    t_near, t_far = min(t1, t2), max(t1, t2)
+
+    t1 = (bmin[1] - ray_origin[1]) * inv_dir[1]
+    t2 = (bmax[1] - ray_origin[1]) * inv_dir[1]
+    t_near, t_far = max(t_near, min(t1, t2)), min(t_far, max(t1, t2))
+
+    t1 = (bmin[2] - ray_origin[2]) * inv_dir[2]
+    t2 = (bmax[2] - ray_origin[2]) * inv_dir[2]
+    t_near, t_far = max(t_near, min(t1, t2)), min(t_far, max(t1, t2))
+
+    if t_far < max(t_near, 0.0) or t_near > t_max:
+        return None
+    return t_near
+
+def bvh_closest_hit(bvh, ray_origin, ray_dir):
+    # Returns (t, normal), or (inf, None) on a miss
     t_min = float('inf')
     hit_normal = None
+    if bvh.root is None:
+        return t_min, hit_normal
+
+    inv_dir = inverse_dir(ray_dir)
+    triangles = bvh.triangles
+    tri_ids = bvh.tri_ids
+
+    if ray_aabb(ray_origin, inv_dir, bvh.root.bmin, bvh.root.bmax, t_min) is None:
+        return t_min, hit_normal
+
+    stack = [(bvh.root, 0.0)]
+    while stack:
+        node, t_enter = stack.pop()
+        if t_enter > t_min:
+            continue
+
+        if node.left is None:
+            for k in range(node.first, node.first + node.count):
+                v0, v1, v2 = triangles[tri_ids[k]]
+                hit, t, n = intersect_triangle(ray_origin, ray_dir, v0, v1, v2)
+                if hit and t < t_min:
+                    t_min = t
+                    hit_normal = n
+            continue
+
+        tl = ray_aabb(ray_origin, inv_dir, node.left.bmin, node.left.bmax, t_min)
+        tr = ray_aabb(ray_origin, inv_dir, node.right.bmin, node.right.bmax, t_min)
+
+        # Push the far child first so the near one is visited first
+        if tl is not None and tr is not None:
+            if tl < tr:
+                stack.append((node.right, tr))
+                stack.append((node.left, tl))
+            else:
+                stack.append((node.left, tl))
+                stack.append((node.right, tr))
+        elif tl is not None:
+            stack.append((node.left, tl))
+        elif tr is not None:
+            stack.append((node.right, tr))
+
+    return t_min, hit_normal
+
+def bvh_any_hit(bvh, ray_origin, ray_dir, t_max):
+    # Shadow query: id of the first triangle found with eps < t < t_max, or -1.
+    # Stops at the first occluder, no front-to-back ordering needed.
+    if bvh.root is None:
+        return -1
+
+    inv_dir = inverse_dir(ray_dir)
+    triangles = bvh.triangles
+    tri_ids = bvh.tri_ids
+
+    stack = [bvh.root]
+    while stack:
+        node = stack.pop()
+        if ray_aabb(ray_origin, inv_dir, node.bmin, node.bmax, t_max) is None:
+            continue
+
+        if node.left is None:
+            for k in range(node.first, node.first + node.count):
+                v0, v1, v2 = triangles[tri_ids[k]]
+                hit, t, _ = intersect_triangle(ray_origin, ray_dir, v0, v1, v2)
+                if hit and t < t_max:
+                    return tri_ids[k]
+            continue
+
+        stack.append(node.left)
+        stack.append(node.right)
+
+    return -1
+
+# ========== Shading ==========
 
-    for v0, v1, v2 in triangles:
-        hit, t, n = intersect_triangle(ray_origin, ray_dir, v0, v1, v2)
-        if hit and t < t_min:
-            t_min = t
-            hit_normal = n
+BASE_COLOR = (1.0, 0.0, 0.0)
+SPEC_COLOR = (0.6, 0.6, 0.6)
+AMBIENT_K = 0.1
+SHININESS = 50.0
+SHADOW_EPS = 1e-4
+
+def in_shadow(bvh, p, n, light_pos, light_index, shadow_cache):
+    # Shadow ray from p (pushed off the surface along n) towards the light.
+    # shadow_cache maps light index -> last occluding triangle id; neighbouring
+    # pixels are usually blocked by the same triangle, so try it first.
+    origin = v_add(p, v_mul(n, SHADOW_EPS))
+    to_light = v_sub(light_pos, origin)
+    dist = v_length(to_light)
+    L = v_mul(to_light, 1.0 / dist)
+
+    if shadow_cache is not None:
+        cached = shadow_cache.get(light_index, -1)
+        if cached >= 0:
+            v0, v1, v2 = bvh.triangles[cached]
+            hit, t, _ = intersect_triangle(origin, L, v0, v1, v2)
+            if hit and t < dist:
+                return True
+
+    occluder = bvh_any_hit(bvh, origin, L, dist)
+    if shadow_cache is not None and occluder >= 0:
+        shadow_cache[light_index] = occluder
+    return occluder >= 0
+
+def trace_ray(ray_origin, ray_dir, bvh, lights, background_color, shadow_cache=None):
+    t_min, hit_normal = bvh_closest_hit(bvh, ray_origin, ray_dir)
 
     if hit_normal is None:
         return background_color
 
     p = v_add(ray_origin, v_mul(ray_dir, t_min))
 
-    base_color = (1.0, 0.0, 0.0)
-    spec_color = (0.6, 0.6, 0.6)
-    ambient_k = 0.1
-    shininess = 50.0
+    base_color = BASE_COLOR
+    spec_color = SPEC_COLOR
+    ambient_k = AMBIENT_K
+    shininess = SHININESS
 
     r, g, b = [ambient_k * c for c in base_color]
     view_dir = v_norm(v_mul(ray_dir, -1.0))
 
-    for light_pos, light_col in lights:
+    for light_index, (light_pos, light_col) in enumerate(lights):
         L = v_norm(v_sub(light_pos, p))
         ndotl = v_dot(hit_normal, L)
-        if ndotl > 0.0:
+        if ndotl > 0.0 and not in_shadow(bvh, p, hit_normal, light_pos, light_index, shadow_cache):
             diff = ndotl
             refl = v_reflect(v_mul(L, -1.0), hit_normal)
             rv = max(0.0, v_dot(refl, view_dir))
@@ -183,9 +464,66 @@ def trace_ray(ray_origin, ray_dir, triangles, lights, background_color):
     b = max(0.0, min(1.0, b))
     return (r, g, b)
 
+def trace_packet(origins, dirs, soa, lights, background_color):
+    # Packet version of trace_ray: (N, 3) rays against a TriangleSoA,
+    # returns (N, 3) float colors in [0, 1]
+    dirs = np.asarray(dirs, dtype=np.float64)
+    origins = np.broadcast_to(np.asarray(origins, dtype=np.float64), dirs.shape)
+
+    t, tri_id, _, _ = intersect_packet(origins, dirs, soa)
+
+    colors = np.empty(dirs.shape)
+    colors[:] = background_color
+
+    hit = tri_id >= 0
+    if not hit.any():
+        return colors
+
+    d = dirs[hit]
+    n = soa.normal[tri_id[hit]]
+    p = origins[hit] + d * t[hit, None]
+
+    base_color = np.array(BASE_COLOR)
+    spec_color = np.array(SPEC_COLOR)
+    color = np.tile(AMBIENT_K * base_color, (len(d), 1))
+    view_dir = -d / np.linalg.norm(d, axis=1, keepdims=True)
+
+    for light_pos, light_col in lights:
+        L = np.asarray(light_pos) - p
+        L /= np.linalg.norm(L, axis=1, keepdims=True)
+        ndotl = np.einsum("ij,ij->i", n, L)
+
+        # reflect(-L, n) = -L + 2 (L . n) n
+        refl = -L + 2.0 * ndotl[:, None] * n
+        rv = np.maximum(0.0, np.einsum("ij,ij->i", refl, view_dir))
+        spec = rv ** SHININESS
+
+        lit = ndotl > 0.0
+
+        # Shadow rays for the lit points only; any hit closer than the light blocks it
+        shadow_idx = np.nonzero(lit)[0]
+        if len(shadow_idx):
+            origin = p[shadow_idx] + n[shadow_idx] * SHADOW_EPS
+            to_light = np.asarray(light_pos) - origin
+            dist = np.linalg.norm(to_light, axis=1)
+            t_occ, _, _, _ = intersect_packet(origin, to_light / dist[:, None], soa)
+            lit[shadow_idx[t_occ < dist]] = False
+
+        lit = lit[:, None]
+        color += lit * np.asarray(light_col) * (base_color * ndotl[:, None] + spec_color * spec[:, None])
+
+    colors[hit] = np.clip(color, 0.0, 1.0)
+    return colors
+
 # ========== Render one frame ==========
 
-def render(width, height, angle_y_deg):
+LIGHTS = [
+    ((-5.0,  5.0, -5.0), (1.0, 1.0, 1.0)),
+    (( 6.0, -6.0, -6.0), (0.25, 0.25, 0.25)),
+]
+BACKGROUND_COLOR = (0.25, 0.25, 0.25)
+
+def setup_camera(width, height):
     eye     = (0.0, 0.5, -4.0)
     look_at = (0.0, 0.0,  0.0)
     up      = (0.0, 1.0,  0.0)
@@ -199,20 +537,19 @@ def render(width, height, angle_y_deg):
 
     half_h = math.tan(fov_y / 2.0)
     half_w = aspect * half_h
+    return eye, forward, right, up_cam, half_w, half_h
 
-    triangles = build_rotated_box_mesh(angle_y_deg)
-
-    lights = [
-        ((-5.0,  5.0, -5.0), (1.0, 1.0, 1.0)),
-        (( 6.0, -6.0, -6.0), (0.25, 0.25, 0.25)),
-    ]
-    background_color = (0.25, 0.25, 0.25)
-
-    framebuffer = [[(0, 0, 0) for _ in range(width)] for _ in range(height)]
+def render_region(pixels, x0, y0, region_w, region_h, bvh):
+    # Trace the pixels [x0, x0+region_w) x [y0, y0+region_h) of an
+    # (height, width, 3) uint8 array in place
+    height, width = pixels.shape[:2]
+    eye, forward, right, up_cam, half_w, half_h = setup_camera(width, height)
+    shadow_cache = {}
 
-    for j in range(height):
+    for j in range(y0, y0 + region_h):
         ndc_y = 1.0 - 2.0 * (j + 0.5) / float(height)
-        for i in range(width):
+        row = pixels[j]
+        for i in range(x0, x0 + region_w):
             ndc_x = 2.0 * (i + 0.5) / float(width) - 1.0
 
             px = ndc_x * half_w
@@ -224,14 +561,194 @@ def render(width, height, angle_y_deg):
             )
             dir_world = v_norm(dir_world)
 
-            color = trace_ray(eye, dir_world, triangles, lights, background_color)
-            framebuffer[j][i] = (
+            color = trace_ray(eye, dir_world, bvh, LIGHTS, BACKGROUND_COLOR, shadow_cache)
+            row[i] = (
                 int(color[0]*255),
                 int(color[1]*255),
                 int(color[2]*255),
             )
 
-    return framebuffer
+def render(width, height, angle_y_deg, bvh=None):
+    # Returns an (height, width, 3) uint8 image
+    # Reuse the caller's tree (refit each frame) or build one for this frame
+    if bvh is None:
+        bvh = build_bvh(build_rotated_box_mesh(angle_y_deg))
+
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    render_region(pixels, 0, 0, width, height, bvh)
+    return pixels
+
+def render_packet(width, height, angle_y_deg, soa=None):
+    # Whole frame as one ray packet, returns an (height, width, 3) uint8 image
+    if soa is None:
+        soa = TriangleSoA(build_rotated_box_mesh(angle_y_deg))
+
+    eye, forward, right, up_cam, half_w, half_h = setup_camera(width, height)
+
+    px = (2.0 * (np.arange(width) + 0.5) / float(width) - 1.0) * half_w
+    py = (1.0 - 2.0 * (np.arange(height) + 0.5) / float(height)) * half_h
+
+    dirs = (np.asarray(forward)
+            + px[None, :, None] * np.asarray(right)
+            + py[:, None, None] * np.asarray(up_cam)).reshape(-1, 3)
+    dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+
+    colors = trace_packet(eye, dirs, soa, LIGHTS, BACKGROUND_COLOR)
+    return (colors * 255).astype(np.uint8).reshape(height, width, 3)
+
+# ========== Progressive refinement + adaptive supersampling ==========
+
+PREVIEW_BLOCK_SIZES = (8, 4, 2, 1)
+AA_THRESHOLD = 24      # max channel difference (0-255) to a neighbour that triggers AA
+AA_GRID = 4            # AA pixels get AA_GRID x AA_GRID stratified samples
+PREVIEW_FRAME_TIME = 1.0 / 30.0   # seconds of refinement per presented frame
+
+def camera_ray_dir(camera, width, height, x, y):
+    # Direction through the continuous pixel position (x, y), (0.5, 0.5) = center of pixel 0
+    eye, forward, right, up_cam, half_w, half_h = camera
+    px = (2.0 * x / float(width) - 1.0) * half_w
+    py = (1.0 - 2.0 * y / float(height)) * half_h
+    return v_norm(v_add(forward, v_add(v_mul(right, px), v_mul(up_cam, py))))
+
+def to_rgb8(color):
+    return (int(color[0]*255), int(color[1]*255), int(color[2]*255))
+
+def find_aa_pixels(pixels, threshold=AA_THRESHOLD):
+    # Pixels whose color differs from a 4-neighbour by more than threshold
+    img = pixels.astype(np.int16)
+    dx = np.abs(img[:, 1:] - img[:, :-1]).max(axis=2) > threshold
+    dy = np.abs(img[1:, :] - img[:-1, :]).max(axis=2) > threshold
+
+    mask = np.zeros(pixels.shape[:2], dtype=bool)
+    mask[:, 1:] |= dx
+    mask[:, :-1] |= dx
+    mask[1:, :] |= dy
+    mask[:-1, :] |= dy
+    return mask
+
+def render_progressive(pixels, bvh, block_sizes=PREVIEW_BLOCK_SIZES,
+                       aa_threshold=AA_THRESHOLD, aa_grid=AA_GRID):
+    """
+    Refine an (height, width, 3) uint8 image in place over several passes.
+    Yields (pass_name, rays_traced) after every row of blocks (and every
+    supersampled pixel), with the rays traced so far in that pass, so the
+    caller can present between steps and stop iterating at any time (e.g.
+    when the camera moves).
+
+    Coarse passes trace one ray per block and fill the block with it; every
+    pass only traces the pixels not covered by an earlier one, so the final
+    1x1 pass costs the same as a plain render. The last pass supersamples
+    only pixels that differ from a neighbour by more than aa_threshold.
+    """
+    height, width = pixels.shape[:2]
+    camera = setup_camera(width, height)
+    eye = camera[0]
+    traced = np.zeros((height, width), dtype=bool)
+    shadow_cache = {}
+
+    for step in block_sizes:
+        rays = 0
+        for j in range(0, height, step):
+            for i in range(0, width, step):
+                if traced[j, i]:
+                    continue
+                d = camera_ray_dir(camera, width, height, i + 0.5, j + 0.5)
+                color = trace_ray(eye, d, bvh, LIGHTS, BACKGROUND_COLOR, shadow_cache)
+                pixels[j:j + step, i:i + step] = to_rgb8(color)
+                traced[j, i] = True
+                rays += 1
+            yield ("%dx%d" % (step, step), rays)
+
+    if not aa_grid or aa_grid < 2 or block_sizes[-1] != 1:
+        return
+
+    rays = 0
+    offsets = [(k + 0.5) / aa_grid for k in range(aa_grid)]
+    inv_n = 1.0 / (aa_grid * aa_grid)
+    for j, i in zip(*np.nonzero(find_aa_pixels(pixels, aa_threshold))):
+        r = g = b = 0.0
+        for oy in offsets:
+            for ox in offsets:
+                d = camera_ray_dir(camera, width, height, i + ox, j + oy)
+                color = trace_ray(eye, d, bvh, LIGHTS, BACKGROUND_COLOR, shadow_cache)
+                r += color[0]
+                g += color[1]
+                b += color[2]
+        pixels[j, i] = to_rgb8((r * inv_n, g * inv_n, b * inv_n))
+        rays += aa_grid * aa_grid
+        yield ("aa", rays)
+
+# ========== Tiled multiprocess renderer ==========
+
+TILE_SIZE = 32
+
+# Per-process state, filled once by init_tile_worker
+worker_state = {}
+
+def make_tiles(width, height, tile_size=TILE_SIZE):
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+def attach_shared_memory(name):
+    try:
+        # Python 3.13+: the creating process owns the segment's lifetime
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def init_tile_worker(shm_name, width, height):
+    # Runs once per worker: attach the framebuffer and load the scene
+    shm = attach_shared_memory(shm_name)
+    worker_state['shm'] = shm
+    worker_state['framebuffer'] = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf)
+    worker_state['angle'] = 0.0
+    worker_state['bvh'] = build_bvh(build_rotated_box_mesh(0.0))
+
+def render_tile_task(tile, angle_y_deg):
+    if angle_y_deg != worker_state['angle']:
+        refit_bvh(worker_state['bvh'], build_rotated_box_mesh(angle_y_deg))
+        worker_state['angle'] = angle_y_deg
+
+    x0, y0, tile_w, tile_h = tile
+    render_region(worker_state['framebuffer'], x0, y0, tile_w, tile_h, worker_state['bvh'])
+    return tile
+
+class TiledRenderer:
+    def __init__(self, width, height, workers=None, tile_size=TILE_SIZE):
+        self.width = width
+        self.height = height
+        self.tiles = make_tiles(width, height, tile_size)
+
+        # Workers write their tiles straight into this shared (H, W, 3) buffer
+        self.shm = shared_memory.SharedMemory(create=True, size=width * height * 3)
+        self.framebuffer = Framebuffer(width, height, buffer=self.shm.buf)
+        self.framebuffer.clear()
+
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=init_tile_worker,
+            initargs=(self.shm.name, width, height),
+        )
+
+    def render(self, angle_y_deg):
+        # Yields each (x, y, w, h) tile as soon as it is in the framebuffer
+        futures = [self.pool.submit(render_tile_task, tile, angle_y_deg) for tile in self.tiles]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.framebuffer.release()
+        self.framebuffer = None
+        self.shm.close()
+        self.shm.unlink()
 
 # ========== Main loop (animation) ==========
 
@@ -242,29 +759,87 @@ def main():
     screen = pygame.display.set_mode((width, height))
     pygame.display.set_caption("CPU Ray Tracer - Rotating Box Mesh")
 
-    surface = pygame.Surface((width, height))
     clock = pygame.time.Clock()
 
+    # Each worker loads the scene once and refits its own BVH per frame
+    renderer = TiledRenderer(width, height)
+
     angle = 0.0
     running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+    try:
+        while running:
+            # Tiles stream back as they finish so the window fills in progressively
+            for tile in renderer.render(angle):
+                renderer.framebuffer.present(screen, tile)
+                pygame.display.update(tile)
+
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                if not running:
+                    break
+
+            angle += 8.0   # degree per frame
+            clock.tick(15) # fps (ray tracing แบบ python ขอลดลงหน่อย)
+    finally:
+        renderer.close()
 
-        framebuffer = render(width, height, angle)
+    pygame.quit()
 
-        for y in range(height):
-            for x in range(width):
-                surface.set_at((x, y), framebuffer[y][x])
+def main_progressive():
+    # Interactive preview: Left/Right rotate the box, the image refines while idle
+    width, height = 320, 240
 
-        screen.blit(surface, (0, 0))
-        pygame.display.flip()
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("CPU Ray Tracer - Progressive Preview")
+
+    framebuffer = Framebuffer(width, height)
+    clock = pygame.time.Clock()
+
+    angle = 0.0
+    bvh = build_bvh(build_rotated_box_mesh(angle))
+    passes = render_progressive(framebuffer.pixels, bvh)
 
-        angle += 8.0   # degree per frame
-        clock.tick(15) # fps (ray tracing แบบ python ขอลดลงหน่อย)
+    running = True
+    while running:
+        changed = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]:
+            angle -= 4.0
+            changed = True
+        if keys[pygame.K_RIGHT]:
+            angle += 4.0
+            changed = True
+
+        if changed:
+            # Drop the unfinished refinement and start again from the coarse pass
+            passes.close()
+            refit_bvh(bvh, build_rotated_box_mesh(angle))
+            passes = render_progressive(framebuffer.pixels, bvh)
+
+        # Refine row by row for up to one frame's time, then present
+        step = None
+        deadline = time.perf_counter() + PREVIEW_FRAME_TIME
+        while time.perf_counter() < deadline:
+            progress = next(passes, None)
+            if progress is None:
+                break
+            step = progress
+        if step is not None:
+            framebuffer.present(screen)
+            pygame.display.flip()
+            pygame.display.set_caption("CPU Ray Tracer - Progressive Preview (%s, %d rays)" % step)
+
+        clock.tick(60)
 
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
+    if "--progressive" in sys.argv:
+        main_progressive()
+    else:
+        main()
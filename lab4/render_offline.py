@@ -0,0 +1,111 @@
+"""
+Headless offline renderer for the rotating-box ray tracer (lab04_2_OpenGL.py).
+
+Writes PNG/PPM frames straight to disk without opening a window. Frames are
+rendered in parallel across processes and frames whose output file already
+exists are skipped, so an interrupted job can simply be run again.
+
+    python render_offline.py --frames 90 --width 1280 --height 720 --out frames
+    python render_offline.py --still 30 --width 1920 --height 1080 --out still
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pygame
+
+from lab04_2_OpenGL import render, render_packet
+from framebuffer import Framebuffer
+
+
+def write_ppm(path, pixels):
+    height, width = pixels.shape[:2]
+    with open(path, 'wb') as f:
+        f.write(b"P6\n%d %d\n255\n" % (width, height))
+        f.write(pixels.tobytes())
+
+
+def write_image(path, pixels, fmt):
+    # Write to a temp name first so a killed job never leaves a half frame
+    # that would be skipped on resume
+    tmp_path = path + ".part"
+    if fmt == "ppm":
+        write_ppm(tmp_path, pixels)
+    else:
+        height, width = pixels.shape[:2]
+        framebuffer = Framebuffer(width, height)
+        framebuffer.pixels[:] = pixels
+        with open(tmp_path, 'wb') as f:
+            pygame.image.save(framebuffer.surface, f, "png")
+    os.replace(tmp_path, path)
+
+
+def render_frame(path, width, height, angle_y_deg, tracer, fmt):
+    if tracer == "bvh":
+        pixels = render(width, height, angle_y_deg)
+    else:
+        pixels = render_packet(width, height, angle_y_deg)
+    write_image(path, pixels, fmt)
+    return path
+
+
+def frame_jobs(args):
+    # (path, angle) for every frame of the request
+    ext = "." + args.format
+    if args.still is not None:
+        return [(os.path.join(args.out, args.name + ext), args.still)]
+
+    return [
+        (os.path.join(args.out, "%s_%04d%s" % (args.name, k, ext)), args.start_angle + k * args.step)
+        for k in range(args.frames)
+    ]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Render the rotating box mesh to image files.")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--frames", type=int, default=45, help="number of animation frames")
+    parser.add_argument("--start-angle", type=float, default=0.0, help="Y angle of frame 0 (degrees)")
+    parser.add_argument("--step", type=float, default=8.0, help="Y rotation per frame (degrees)")
+    parser.add_argument("--still", type=float, default=None, metavar="ANGLE",
+                        help="render a single still at this angle instead of an animation")
+    parser.add_argument("--out", default="frames", help="output directory")
+    parser.add_argument("--name", default="frame", help="output file name prefix")
+    parser.add_argument("--format", choices=("png", "ppm"), default="png")
+    parser.add_argument("--tracer", choices=("packet", "bvh"), default="packet",
+                        help="packet: NumPy ray packets, bvh: per-ray BVH traversal")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--overwrite", action="store_true", help="re-render frames that already exist")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    jobs = frame_jobs(args)
+    todo = [(path, angle) for path, angle in jobs if args.overwrite or not os.path.exists(path)]
+    print(f"{len(jobs)} frame(s), {len(jobs) - len(todo)} already on disk, rendering {len(todo)}")
+    if not todo:
+        return 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(render_frame, path, args.width, args.height, angle, args.tracer, args.format)
+            for path, angle in todo
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            print(f"[{done}/{len(todo)}] {future.result()}")
+
+    elapsed = time.perf_counter() - start
+    pixels = len(todo) * args.width * args.height
+    print(f"Done in {elapsed:.2f}s ({pixels / elapsed:,.0f} pixels/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Packet (many rays at once) Möller–Trumbore ray–triangle intersection.
+# Shared by the CPU ray tracer (lab04_2_OpenGL.py) and Homework_04 picking.
+
+EPS = 1e-6
+
+# Upper bound on rays x triangles handled per step, keeps temporaries small
+MAX_PAIRS = 1 << 20
+
+# Triangles tested together per step at least, so a big packet is split
+# into ray chunks instead of walking the triangles one at a time
+TRI_BLOCK = 64
+
+
+class TriangleSoA:
+    """Structure-of-arrays triangle buffer with the edges precomputed."""
+
+    def __init__(self, triangles):
+        tris = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        self.v0 = np.ascontiguousarray(tris[:, 0])
+        self.edge1 = np.ascontiguousarray(tris[:, 1] - tris[:, 0])
+        self.edge2 = np.ascontiguousarray(tris[:, 2] - tris[:, 0])
+
+        n = np.cross(self.edge1, self.edge2)
+        length = np.linalg.norm(n, axis=1, keepdims=True)
+        self.normal = np.divide(n, length, out=np.zeros_like(n), where=length > 0)
+
+    def __len__(self):
+        return len(self.v0)
+
+
+def intersect_packet(origins, dirs, soa):
+    """
+    Nearest hit of every ray against every triangle.
+    origins, dirs: (N, 3) arrays (a single (3,) origin is broadcast).
+    Returns (t, tri_id, u, v); t is inf and tri_id is -1 where a ray misses.
+    """
+    dirs = np.atleast_2d(np.asarray(dirs, dtype=np.float64))
+    n_rays = len(dirs)
+    origins = np.broadcast_to(np.asarray(origins, dtype=np.float64), (n_rays, 3))
+
+    best_t = np.full(n_rays, np.inf)
+    best_id = np.full(n_rays, -1, dtype=np.int64)
+    best_u = np.zeros(n_rays)
+    best_v = np.zeros(n_rays)
+
+    n_tris = len(soa)
+    if n_rays == 0 or n_tris == 0:
+        return best_t, best_id, best_u, best_v
+
+    tri_block = min(n_tris, TRI_BLOCK)
+    ray_step = max(1, min(n_rays, MAX_PAIRS // tri_block))
+    tri_step = max(tri_block, MAX_PAIRS // ray_step)
+    rows = np.arange(ray_step)
+
+    for r0 in range(0, n_rays, ray_step):
+        r1 = min(r0 + ray_step, n_rays)
+        o = origins[r0:r1, None, :]
+        d = dirs[r0:r1, None, :]
+
+        for t0 in range(0, n_tris, tri_step):
+            t1 = min(t0 + tri_step, n_tris)
+            v0 = soa.v0[None, t0:t1]
+            edge1 = soa.edge1[None, t0:t1]
+            edge2 = soa.edge2[None, t0:t1]
+
+            h = np.cross(d, edge2)
+            a = np.einsum("ijk,ijk->ij", np.broadcast_to(edge1, h.shape), h)
+            parallel = np.abs(a) < EPS
+            f = 1.0 / np.where(parallel, 1.0, a)
+
+            s = o - v0
+            u = f * np.einsum("ijk,ijk->ij", s, h)
+            q = np.cross(s, edge1)
+            v = f * np.einsum("ijk,ijk->ij", np.broadcast_to(d, q.shape), q)
+            t = f * np.einsum("ijk,ijk->ij", np.broadcast_to(edge2, q.shape), q)
+
+            hit = ~parallel & (u >= 0.0) & (u <= 1.0) & (v >= 0.0) & (u + v <= 1.0) & (t > EPS)
+            t = np.where(hit, t, np.inf)
+
+            k = np.argmin(t, axis=1)
+            idx = rows[:r1 - r0]
+            t_k = t[idx, k]
+            closer = t_k < best_t[r0:r1]
+
+            sel = np.nonzero(closer)[0]
+            best_t[r0 + sel] = t_k[sel]
+            best_id[r0 + sel] = t0 + k[sel]
+            best_u[r0 + sel] = u[sel, k[sel]]
+            best_v[r0 + sel] = v[sel, k[sel]]
+
+    return best_t, best_id, best_u, best_v
@@ -1,5 +1,8 @@
 from OpenGL.GL import *
 from Mesh import *
+from MeshCache import load_cached, save_cached
+from ObjParser import parse_obj_file
+import numpy as np
 import pygame
 
 class LoadMesh(Mesh):
@@ -12,16 +15,19 @@ class LoadMesh(Mesh):
         self.load_drawing()
 
     def load_drawing(self):
-        with open(self.filename) as fp:
-            line = fp.readline()
-            while line:
-                if line[:2] == "v ":
-                    vx, vy, vz = [float(value) for value in line[2:].split()]
-                    # print((vx, vy, vz))
-                    self.vertices.append((vx, vy, vz))
-                if line[:2] == "f ":
-                    t1, t2, t3 = [value for value in line[2:].split()]
-                    self.triangles.append([int(value) for value in t1.split('/')][0] - 1)
-                    self.triangles.append([int(value) for value in t2.split('/')][0] - 1)
-                    self.triangles.append([int(value) for value in t3.split('/')][0] - 1)
-                line = fp.readline()
+        # Memory-map the compiled mesh if the OBJ has not changed since it was cached
+        cached = load_cached(self.filename)
+        if cached is not None:
+            self.vertices, self.triangles = cached
+            return
+
+        self.parse_obj()
+        self.vertices = np.array(self.vertices, dtype=np.float32).reshape(-1, 3)
+        self.triangles = np.array(self.triangles, dtype=np.uint32)
+        save_cached(self.filename, self.vertices, self.triangles)
+
+    def parse_obj(self):
+        # Chunked bulk parse; n-gons come back fan-triangulated
+        data = parse_obj_file(self.filename)
+        self.vertices = data.positions
+        self.triangles = data.tri_v.reshape(-1).astype(np.uint32)
@@ -1,7 +1,25 @@
 from OpenGL.GL import *
+from OpenGL.error import GLError, NullFunctionError
+import numpy as np
 import pygame
 
+# Per-triangle draw types -> (mode for glDrawElements, index pattern per triangle)
+ELEMENT_LAYOUTS = {
+    GL_TRIANGLES: (GL_TRIANGLES, (0, 1, 2)),
+    GL_POLYGON: (GL_TRIANGLES, (0, 1, 2)),
+    GL_LINE_LOOP: (GL_LINES, (0, 1, 1, 2, 2, 0)),
+    GL_LINE_STRIP: (GL_LINES, (0, 1, 1, 2)),
+    GL_POINTS: (GL_POINTS, (0, 1, 2)),
+}
+
 class Mesh:
+    # GPU buffer state (class defaults: subclasses set their geometry without calling __init__)
+    use_buffers = True
+    vbo = None
+    ibo = None
+    gpu_key = None
+    element_mode = None
+    element_count = 0
 
     def __init__(self):
         self.vertices = [(0.5, -0.5, 0.5),
@@ -14,7 +32,71 @@ class Mesh:
         self.triangles = [0, 2, 3, 0, 3, 1]
         self.draw_type = GL_LINE_LOOP
 
+    def geometry_key(self):
+        # Changes when the vertex/index containers or their sizes change
+        return (id(self.vertices), len(self.vertices),
+                id(self.triangles), len(self.triangles), self.draw_type)
+
+    def mark_dirty(self):
+        # Call after editing vertices/triangles in place without resizing them
+        self.gpu_key = None
+
+    def upload(self):
+        # Copy the geometry into a VBO (positions) and IBO (indices) once
+        vertices = np.ascontiguousarray(self.vertices, dtype=np.float32).reshape(-1, 3)
+        triangles = np.asarray(self.triangles, dtype=np.uint32).reshape(-1, 3)
+
+        mode, pattern = ELEMENT_LAYOUTS[self.draw_type]
+        indices = np.ascontiguousarray(triangles[:, pattern]).reshape(-1)
+
+        if self.vbo is None:
+            self.vbo, self.ibo = (int(b) for b in glGenBuffers(2))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        self.element_mode = mode
+        self.element_count = len(indices)
+        self.gpu_key = self.geometry_key()
+
     def draw(self):
+        if self.use_buffers and self.draw_type in ELEMENT_LAYOUTS:
+            try:
+                self.draw_buffers()
+                return
+            except (GLError, NullFunctionError):
+                # No buffer-object support in this context: stay on immediate mode
+                self.use_buffers = False
+        self.draw_immediate()
+
+    def draw_buffers(self):
+        if self.gpu_key != self.geometry_key():
+            self.upload()
+        if self.element_count == 0:
+            return
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glDrawElements(self.element_mode, self.element_count, GL_UNSIGNED_INT, None)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete_buffers(self):
+        if self.vbo is not None:
+            glDeleteBuffers(2, [self.vbo, self.ibo])
+        self.vbo = self.ibo = self.gpu_key = None
+
+    def draw_immediate(self):
         for t in range(0, len(self.triangles) , 3):
             glBegin(self.draw_type)
             glVertex3fv(self.vertices[self.triangles[t]])
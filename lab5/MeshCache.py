@@ -0,0 +1,75 @@
+import os
+import struct
+import zlib
+import numpy as np
+
+# Compiled mesh cache: positions (float32) + triangle indices (uint32) in a raw
+# header + buffer file, so later loads are a memory map instead of an OBJ parse.
+#
+# Layout (little endian):
+#   magic  b"MSHC" | version u32 | source mtime_ns u64 | source size u64
+#   vertex count u32 | index count u32 | float32[vertex count * 3] | uint32[index count]
+
+CACHE_DIR = "__meshcache__"
+MAGIC = b"MSHC"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQII")
+
+
+def cache_path(filename):
+    # One cache file per source path: <dir>/__meshcache__/<name>.<hash of abs path>.bin
+    source = os.path.abspath(filename)
+    key = "%08x" % zlib.crc32(source.encode("utf-8"))
+    folder = os.path.join(os.path.dirname(source), CACHE_DIR)
+    return os.path.join(folder, "%s.%s.bin" % (os.path.basename(source), key))
+
+
+def load_cached(filename):
+    """Return (vertices, triangles) memory-mapped from the cache, or None if stale/missing."""
+    path = cache_path(filename)
+    try:
+        st = os.stat(filename)
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+
+    if len(header) != HEADER.size:
+        return None
+    magic, version, mtime_ns, size, n_vertices, n_indices = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or mtime_ns != st.st_mtime_ns or size != st.st_size:
+        return None
+
+    expected = HEADER.size + n_vertices * 3 * 4 + n_indices * 4
+    if os.path.getsize(path) != expected:
+        return None
+
+    offset = HEADER.size
+    vertices = np.zeros((0, 3), dtype=np.float32)
+    triangles = np.zeros(0, dtype=np.uint32)
+    if n_vertices:
+        vertices = np.memmap(path, dtype=np.float32, mode="r", offset=offset, shape=(n_vertices, 3))
+    offset += n_vertices * 3 * 4
+    if n_indices:
+        triangles = np.memmap(path, dtype=np.uint32, mode="r", offset=offset, shape=(n_indices,))
+    return vertices, triangles
+
+
+def save_cached(filename, vertices, triangles):
+    """Write the cache for filename; failures (e.g. read-only folder) are ignored."""
+    path = cache_path(filename)
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    triangles = np.ascontiguousarray(triangles, dtype=np.uint32).reshape(-1)
+    try:
+        st = os.stat(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".%d.tmp" % os.getpid()
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, st.st_mtime_ns, st.st_size,
+                                len(vertices), len(triangles)))
+            f.write(vertices.tobytes())
+            f.write(triangles.tobytes())
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        return False
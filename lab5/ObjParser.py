@@ -0,0 +1,332 @@
+import time
+import numpy as np
+
+# Streaming, chunked Wavefront OBJ parser shared by lab5 LoadMesh and the lab8
+# OBJModel viewer.
+#
+# The file is read in fixed-size chunks cut at a newline, so memory for the
+# text side stays bounded by the chunk size whatever the file size. Inside a
+# chunk, lines are classified in bulk from their first two bytes, every
+# record kind (v / vt / vn / f) is gathered into one byte run and decoded with a
+# single NumPy text parse, and faces are fan-triangulated with array ops.
+# Comments (from "#" to the end of a line) are blanked and lines ending in
+# "\" are joined with the next one before a chunk is classified.
+
+CHUNK_SIZE = 16 * 1024 * 1024
+
+SPACE, TAB, CR, LF, SLASH, HASH, BACKSLASH = 32, 9, 13, 10, 47, 35, 92
+
+KIND_NONE, KIND_V, KIND_VT, KIND_VN, KIND_F = 0, 1, 2, 3, 4
+
+# Face corner layouts by code: v, v//vn, v/vt, v/vt/vn
+FACE_LAYOUTS = (("v",), ("v", "vn"), ("v", "vt"), ("v", "vt", "vn"))
+
+# Values a v / vt / vn record needs at least
+RECORD_COLUMNS = {KIND_V: 3, KIND_VT: 2, KIND_VN: 3}
+
+
+class ObjData:
+    def __init__(self):
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+
+        # One row per triangle, 0-based indices, -1 where the face has no vt / vn
+        self.tri_v = np.zeros((0, 3), dtype=np.int32)
+        self.tri_vt = np.zeros((0, 3), dtype=np.int32)
+        self.tri_vn = np.zeros((0, 3), dtype=np.int32)
+
+        self.bytes_read = 0
+        self.seconds = 0.0
+
+    @property
+    def mb_per_s(self):
+        if self.seconds <= 0.0:
+            return float("inf")
+        return self.bytes_read / (1024.0 * 1024.0) / self.seconds
+
+
+def parse_obj_file(filename, chunk_size=CHUNK_SIZE):
+    start = time.perf_counter()
+    parts = {"v": [], "vt": [], "vn": [], "tri_v": [], "tri_vt": [], "tri_vn": []}
+    counts = [0, 0, 0]   # v, vt, vn records seen before the current chunk
+    total = 0
+    line = 1             # file line number of the current chunk's first line
+
+    with open(filename, "rb") as f:
+        carry = b""
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            total += len(block)
+            block = carry + block
+            cut = last_line_end(block)
+            if cut == 0:
+                carry = block
+                continue
+            carry = block[cut:]
+            parse_chunk(block[:cut], parts, counts, filename, line)
+            line += block.count(b"\n", 0, cut)
+
+        if carry.strip():
+            parse_chunk(carry + b"\n", parts, counts, filename, line)
+
+    data = ObjData()
+    if parts["v"]:
+        data.positions = np.concatenate(parts["v"]).astype(np.float32)
+    if parts["vt"]:
+        data.texcoords = np.concatenate(parts["vt"]).astype(np.float32)
+    if parts["vn"]:
+        data.normals = np.concatenate(parts["vn"]).astype(np.float32)
+    if parts["tri_v"]:
+        data.tri_v = np.concatenate(parts["tri_v"]).astype(np.int32)
+        data.tri_vt = np.concatenate(parts["tri_vt"]).astype(np.int32)
+        data.tri_vn = np.concatenate(parts["tri_vn"]).astype(np.int32)
+
+    data.bytes_read = total
+    data.seconds = time.perf_counter() - start
+    return data
+
+
+def last_line_end(block):
+    # Offset just past the last newline that is not a "\" continuation
+    # (0 when the block holds no complete line)
+    cut = block.rfind(b"\n")
+    while cut > 0:
+        j = cut - 1
+        if block[j] == CR:
+            j -= 1
+        if j < 0 or block[j] != BACKSLASH:
+            break
+        cut = block.rfind(b"\n", 0, cut)
+    return cut + 1
+
+
+def parse_chunk(chunk, parts, counts, filename="", first_line=1):
+    # chunk: whole lines, ending with b"\n"; first_line: its line number in the file
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == LF)
+    work = join_continued_lines(buf, newlines)
+
+    ends = np.flatnonzero(work == LF)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    strip_comments(work, ends)
+
+    # Classify every line from its first two bytes (padded so empty lines are safe)
+    padded = np.concatenate([work, np.zeros(2, dtype=np.uint8)])
+    c0 = padded[starts]
+    c1 = padded[starts + 1]
+    blank1 = (c1 == SPACE) | (c1 == TAB)
+    kinds = np.zeros(len(starts), dtype=np.int8)
+    kinds[(c0 == ord("v")) & blank1] = KIND_V
+    kinds[(c0 == ord("v")) & (c1 == ord("t"))] = KIND_VT
+    kinds[(c0 == ord("v")) & (c1 == ord("n"))] = KIND_VN
+    kinds[(c0 == ord("f")) & blank1] = KIND_F
+
+    # Blank the record keywords so only numbers are left on those lines
+    keyword = kinds != KIND_NONE
+    work[starts[keyword]] = SPACE
+    two_char = (kinds == KIND_VT) | (kinds == KIND_VN)
+    work[starts[two_char] + 1] = SPACE
+
+    byte_kind = np.repeat(kinds, lengths)
+
+    try:
+        v = decode_floats(work, byte_kind, lengths, kinds, KIND_V, 3)
+        vt = decode_floats(work, byte_kind, lengths, kinds, KIND_VT, 2)
+        vn = decode_floats(work, byte_kind, lengths, kinds, KIND_VN, 3)
+
+        face_lines = np.flatnonzero(kinds == KIND_F)
+        if len(face_lines):
+            # Records of each kind defined before every face line (for negative indices)
+            before = []
+            for i, kind in enumerate((KIND_V, KIND_VT, KIND_VN)):
+                seen = np.cumsum(kinds == kind) - (kinds == kind)
+                before.append(counts[i] + seen[face_lines])
+            tri_v, tri_vt, tri_vn = decode_faces(work, byte_kind, lengths, kinds, before)
+            parts["tri_v"].append(tri_v)
+            parts["tri_vt"].append(tri_vt)
+            parts["tri_vn"].append(tri_vn)
+    except ValueError as e:
+        # Re-check the records one line at a time to report where it failed
+        text = join_continued_lines(buf, newlines)
+        strip_comments(text, ends)
+        for k in np.flatnonzero(kinds != KIND_NONE).tolist():
+            line = text[starts[k]:ends[k]].tobytes().decode("utf-8", "replace")
+            problem = check_record(kinds[k], line.split())
+            if problem is not None:
+                line_no = first_line + int(np.searchsorted(newlines, starts[k]))
+                raise ValueError("%s:%d: %s: %r" % (filename, line_no, problem, line.strip())) from None
+        raise ValueError("%s: %s" % (filename, e)) from None
+
+    for i, (name, values) in enumerate((("v", v), ("vt", vt), ("vn", vn))):
+        if len(values):
+            parts[name].append(values)
+            counts[i] += len(values)
+
+
+def join_continued_lines(buf, newlines):
+    # Blank every "\" + newline that continues a line on the next one; the
+    # chunk's last newline always ends a line (a "\" there is only dropped)
+    before = newlines - 1
+    before[buf[np.maximum(before, 0)] == CR] -= 1
+    continued = (before >= 0) & (buf[np.maximum(before, 0)] == BACKSLASH)
+    work = buf.copy()
+    if np.any(continued):
+        work[before[continued]] = SPACE
+        continued[-1] = False
+        work[newlines[continued]] = SPACE
+    return work
+
+
+def strip_comments(work, ends):
+    # Blank everything from the first "#" of a line up to its newline, in place
+    hashes = np.flatnonzero(work == HASH)
+    if len(hashes) == 0:
+        return
+    line = np.searchsorted(ends, hashes)
+    first = np.ones(len(hashes), dtype=bool)
+    first[1:] = line[1:] != line[:-1]
+    cut_from = hashes[first]
+    cut_lengths = ends[line[first]] - cut_from
+
+    # Byte offsets of all the cut ranges, without a pass over the whole chunk
+    range_start = np.cumsum(cut_lengths) - cut_lengths
+    offsets = np.arange(int(cut_lengths.sum())) + np.repeat(cut_from - range_start, cut_lengths)
+    work[offsets] = SPACE
+
+
+def check_record(kind, fields):
+    # Why one record line (fields after the keyword included) is malformed,
+    # or None when it parses
+    values = fields[1:]
+    if kind in RECORD_COLUMNS:
+        if len(values) < RECORD_COLUMNS[kind]:
+            return "vertex record with fewer than %d values" % RECORD_COLUMNS[kind]
+        try:
+            for value in values:
+                float(value)
+        except ValueError:
+            return "malformed vertex record"
+        return None
+
+    if len(values) < 3:
+        return "face with fewer than 3 vertices"
+    layouts = set()
+    for corner in values:
+        indices = corner.split("/")
+        present = tuple(bool(index) for index in indices)
+        if len(indices) > 3 or not present[0] or present == (True, False):
+            return "malformed face record"
+        try:
+            for index in indices:
+                if index:
+                    int(index)
+        except ValueError:
+            return "malformed face record"
+        layouts.add(present)
+    if len(layouts) > 1:
+        return "face whose corners mix different v/vt/vn layouts"
+    return None
+
+
+def select_lines(work, byte_kind, lengths, kinds, kind):
+    # Bytes of every line of one kind (newlines kept) and their token counts
+    seg = work[byte_kind == kind]
+    line_lengths = lengths[kinds == kind]
+
+    space = (seg == SPACE) | (seg == TAB) | (seg == CR) | (seg == LF)
+    token_start = ~space
+    token_start[1:] &= space[:-1]
+
+    line_of_byte = np.repeat(np.arange(len(line_lengths)), line_lengths)
+    tokens = np.bincount(line_of_byte[token_start], minlength=len(line_lengths))
+    return seg, tokens
+
+
+def decode_floats(work, byte_kind, lengths, kinds, kind, ncols):
+    if not np.any(kinds == kind):
+        return np.zeros((0, ncols), dtype=np.float64)
+
+    seg, tokens = select_lines(work, byte_kind, lengths, kinds, kind)
+    try:
+        values = np.fromstring(seg.tobytes(), dtype=np.float64, sep=" ")
+    except ValueError:
+        raise ValueError("malformed vertex record in OBJ file") from None
+    if len(values) != tokens.sum():
+        raise ValueError("malformed vertex record in OBJ file")
+    if np.any(tokens < ncols):
+        raise ValueError("OBJ vertex record with fewer than %d values" % ncols)
+
+    if np.all(tokens == ncols):
+        return values.reshape(-1, ncols)
+
+    # Extra values (v x y z w, v x y z r g b, vt u v w): keep the first ncols
+    first = np.cumsum(tokens) - tokens
+    return values[first[:, None] + np.arange(ncols)]
+
+
+def decode_faces(work, byte_kind, lengths, kinds, before):
+    seg, corners_per_face = select_lines(work, byte_kind, lengths, kinds, KIND_F)
+    n_corners = int(corners_per_face.sum())
+    if np.any(corners_per_face < 3):
+        raise ValueError("OBJ face with fewer than 3 vertices")
+
+    # Work out each face's corner layout (v, v/vt, v/vt/vn or v//vn) from
+    # its slash counts; faces with different layouts are decoded apart
+    slash = seg == SLASH
+    double = np.zeros(len(seg), dtype=bool)
+    double[1:] = slash[1:] & slash[:-1]
+    line_of_byte = np.repeat(np.arange(len(corners_per_face)), lengths[kinds == KIND_F])
+    n_slash = np.bincount(line_of_byte[slash], minlength=len(corners_per_face))
+    n_double = np.bincount(line_of_byte[double], minlength=len(corners_per_face))
+
+    layout_of_face = np.full(len(corners_per_face), -1, dtype=np.int8)
+    layout_of_face[n_slash == 0] = 0
+    layout_of_face[(n_double == corners_per_face) & (n_slash == 2 * corners_per_face)] = 1
+    layout_of_face[(n_double == 0) & (n_slash == corners_per_face)] = 2
+    layout_of_face[(n_double == 0) & (n_slash == 2 * corners_per_face)] = 3
+    if np.any(layout_of_face < 0):
+        raise ValueError("OBJ face whose corners mix different v/vt/vn layouts")
+
+    seg = seg.copy()
+    seg[slash] = SPACE
+    layout_of_corner = np.repeat(layout_of_face, corners_per_face)
+    columns = {name: np.full(n_corners, -1, dtype=np.int64) for name in ("v", "vt", "vn")}
+    for code in np.unique(layout_of_face).tolist():
+        layout = FACE_LAYOUTS[code]
+        faces = layout_of_face == code
+        group = seg if faces.all() else seg[faces[line_of_byte]]
+        n_group = int(corners_per_face[faces].sum())
+        try:
+            values = np.fromstring(group.tobytes(), dtype=np.int64, sep=" ")
+        except ValueError:
+            raise ValueError("malformed face record in OBJ file") from None
+        if len(values) != n_group * len(layout):
+            raise ValueError("malformed face record in OBJ file")
+        values = values.reshape(n_group, len(layout))
+
+        in_group = layout_of_corner == code
+        for i, name in enumerate(("v", "vt", "vn")):
+            if name not in layout:
+                continue
+            raw = values[:, layout.index(name)]
+            # 1-based, or negative = relative to the records defined so far
+            base = np.repeat(before[i][faces], corners_per_face[faces])
+            columns[name][in_group] = np.where(raw > 0, raw - 1, base + raw)
+
+    # Fan triangulation: corners (0, i, i+1) for i = 1 .. n-2 of every face
+    tris_per_face = corners_per_face - 2
+    face_first = np.cumsum(corners_per_face) - corners_per_face
+    face_of_tri = np.repeat(np.arange(len(corners_per_face)), tris_per_face)
+    tri_first = np.cumsum(tris_per_face) - tris_per_face
+    i = np.arange(int(tris_per_face.sum())) - tri_first[face_of_tri] + 1
+
+    first = face_first[face_of_tri]
+    corners = np.stack([first, first + i, first + i + 1], axis=1)
+
+    return columns["v"][corners], columns["vt"][corners], columns["vn"][corners]
@@ -1,5 +1,11 @@
-import pygame
+import os
 import sys
+import numpy as np
+import pygame
+
+# Shared software framebuffer (lab4/framebuffer.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab4"))
+from framebuffer import Framebuffer
 
 # Initialize Pygame
 pygame.init()
@@ -59,24 +65,21 @@ def bresenham_line(x0, y0, x1, y1):
     
     return pixels
 
-def draw_line(surface, x0, y0, x1, y1, color):
+def draw_line(framebuffer, x0, y0, x1, y1, color):
     """
     Draw a line using Bresenham's algorithm.
     """
     pixels = bresenham_line(x0, y0, x1, y1)
-    for x, y in pixels:
-        surface.set_at((x, y), color)
+    xs, ys = zip(*pixels)
+    framebuffer.plot(xs, ys, color)
 
-def draw_point(surface, x, y, color, size=3):
+def draw_point(framebuffer, x, y, color, size=3):
     """
     Draw a small circle to mark a point.
     """
-    for dx in range(-size, size + 1):
-        for dy in range(-size, size + 1):
-            if dx*dx + dy*dy <= size*size:
-                px, py = x + dx, y + dy
-                if 0 <= px < WINDOW_WIDTH and 0 <= py < WINDOW_HEIGHT:
-                    surface.set_at((px, py), color)
+    dy, dx = np.mgrid[-size:size + 1, -size:size + 1]
+    disk = dx*dx + dy*dy <= size*size
+    framebuffer.plot(x + dx[disk], y + dy[disk], color)
 
 def main():
     clock = pygame.time.Clock()
@@ -88,8 +91,12 @@ def main():
     # Font for displaying coordinates
     font = pygame.font.Font(None, 24)
     
+    # All drawing goes to the framebuffer, presented once per change
+    framebuffer = Framebuffer(WINDOW_WIDTH, WINDOW_HEIGHT)
+    
     # Fill background initially
-    screen.fill(BACKGROUND_COLOR)
+    framebuffer.clear(BACKGROUND_COLOR)
+    framebuffer.present(screen)
     pygame.display.flip()
     
     running = True
@@ -108,7 +115,8 @@ def main():
                         print(f"P0 = ({mouse_x}, {mouse_y})")
                         
                         # Draw the start point
-                        draw_point(screen, mouse_x, mouse_y, POINT_COLOR)
+                        draw_point(framebuffer, mouse_x, mouse_y, POINT_COLOR)
+                        framebuffer.present(screen)
                         pygame.display.flip()
                     
                     else:
@@ -120,15 +128,16 @@ def main():
                         print(f"Drawing line from P0=({x0},{y0}) to P1=({x1},{y1})")
                         
                         # Draw the line using Bresenham's algorithm
-                        draw_line(screen, x0, y0, x1, y1, LINE_COLOR)
+                        draw_line(framebuffer, x0, y0, x1, y1, LINE_COLOR)
                         
                         # Draw the end point
-                        draw_point(screen, x1, y1, POINT_COLOR)
+                        draw_point(framebuffer, x1, y1, POINT_COLOR)
                         
                         # Display coordinates on screen
                         text = font.render(f"P0=({x0},{y0}), P1=({x1},{y1})", 
                                          True, (0, 255, 0))
                         
+                        framebuffer.present(screen)
                         pygame.display.flip()
                         
                         # Reset for next line
@@ -138,8 +147,9 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_c:
                     # Clear screen with 'C' key
-                    screen.fill(BACKGROUND_COLOR)
+                    framebuffer.clear(BACKGROUND_COLOR)
                     first_point = None
+                    framebuffer.present(screen)
                     pygame.display.flip()
                     print("Screen cleared\n")
         
@@ -1,5 +1,11 @@
-import pygame
+import os
 import sys
+import numpy as np
+import pygame
+
+# Shared software framebuffer (lab4/framebuffer.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab4"))
+from framebuffer import Framebuffer
 
 # Initialize Pygame
 pygame.init()
@@ -65,29 +71,6 @@ def barycentric_coordinates(p, a, b, c):
     
     return alpha, beta, gamma
 
-def is_inside_triangle(alpha, beta, gamma, epsilon=1e-6):
-    """
-    Check if barycentric coordinates represent a point inside the triangle.
-    Allow small epsilon for numerical stability.
-    """
-    return alpha >= -epsilon and beta >= -epsilon and gamma >= -epsilon
-
-def interpolate_color(alpha, beta, gamma, ca, cb, cc):
-    """
-    Interpolate color using barycentric coordinates (Gouraud shading).
-    CP = alpha*CA + beta*CB + gamma*CC
-    """
-    r = int(alpha * ca[0] + beta * cb[0] + gamma * cc[0])
-    g = int(alpha * ca[1] + beta * cb[1] + gamma * cc[1])
-    b = int(alpha * ca[2] + beta * cb[2] + gamma * cc[2])
-    
-    # Clamp values to valid range [0, 255]
-    r = max(0, min(255, r))
-    g = max(0, min(255, g))
-    b = max(0, min(255, b))
-    
-    return (r, g, b)
-
 def get_bounding_box(a, b, c):
     """
     Compute the axis-aligned bounding box for the triangle.
@@ -100,34 +83,41 @@ def get_bounding_box(a, b, c):
     
     return min_x, max_x, min_y, max_y
 
-def rasterize_triangle(surface, a, b, c, ca, cb, cc):
+def rasterize_triangle(framebuffer, a, b, c, ca, cb, cc):
     """
     Rasterize a triangle with Gouraud shading using barycentric coordinates.
+    All pixels of the bounding box are evaluated at once as NumPy arrays.
     
     Args:
-        surface: PyGame surface to draw on
+        framebuffer: Framebuffer to draw into
         a, b, c: Triangle vertices (x, y)
         ca, cb, cc: Colors at vertices (R, G, B)
     """
     # Get bounding box
     min_x, max_x, min_y, max_y = get_bounding_box(a, b, c)
+    if min_x > max_x or min_y > max_y:
+        return
+    
+    # Pixel centers of the whole bounding box
+    xs = np.arange(min_x, max_x + 1) + 0.5
+    ys = np.arange(min_y, max_y + 1) + 0.5
+    p = np.meshgrid(xs, ys)
+    
+    # Compute barycentric coordinates (works element-wise on arrays)
+    alpha, beta, gamma = barycentric_coordinates(p, a, b, c)
+    
+    # Check which pixels are inside the triangle
+    epsilon = 1e-6
+    inside = (alpha >= -epsilon) & (beta >= -epsilon) & (gamma >= -epsilon)
+    
+    # Interpolate color using Gouraud shading (CP = alpha*CA + beta*CB + gamma*CC),
+    # truncated and clamped to [0, 255]
+    weights = np.stack([alpha[inside], beta[inside], gamma[inside]], axis=1)
+    colors = weights @ np.array([ca, cb, cc], dtype=np.float64)
+    colors = np.clip(np.trunc(colors), 0, 255).astype(np.uint8)
     
-    # Iterate over all pixels in bounding box
-    for y in range(min_y, max_y + 1):
-        for x in range(min_x, max_x + 1):
-            # Pixel center
-            p = (x + 0.5, y + 0.5)
-            
-            # Compute barycentric coordinates
-            alpha, beta, gamma = barycentric_coordinates(p, a, b, c)
-            
-            # Check if pixel is inside triangle
-            if is_inside_triangle(alpha, beta, gamma):
-                # Interpolate color using Gouraud shading
-                color = interpolate_color(alpha, beta, gamma, ca, cb, cc)
-                
-                # Set pixel color
-                surface.set_at((x, y), color)
+    # Set pixel colors
+    framebuffer.pixels[min_y:max_y + 1, min_x:max_x + 1][inside] = colors
 
 def draw_vertex_markers(surface, a, b, c, ca, cb, cc):
     """
@@ -140,9 +130,10 @@ def draw_vertex_markers(surface, a, b, c, ca, cb, cc):
 
 def main():
     clock = pygame.time.Clock()
+    framebuffer = Framebuffer(WINDOW_WIDTH, WINDOW_HEIGHT)
     
     # Fill background
-    screen.fill(BACKGROUND_COLOR)
+    framebuffer.clear(BACKGROUND_COLOR)
     
     # Rasterize the triangle with Gouraud shading
     print("Rasterizing triangle with Gouraud shading...")
@@ -150,7 +141,8 @@ def main():
     print(f"Vertex B: {B}, Color: {CB} (Green)")
     print(f"Vertex C: {C}, Color: {CC} (Blue)")
     
-    rasterize_triangle(screen, A, B, C, CA, CB, CC)
+    rasterize_triangle(framebuffer, A, B, C, CA, CB, CC)
+    framebuffer.present(screen)
     
     # Draw vertex markers
     draw_vertex_markers(screen, A, B, C, CA, CB, CC)
@@ -2,20 +2,86 @@ import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from OpenGL.error import GLError, NullFunctionError
+import numpy as np
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab5"))
+from ObjParser import parse_obj_file
 
 # Window settings
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 
+# (has_texcoords, has_normals) -> glInterleavedArrays format of the welded vertices
+INTERLEAVED_FORMATS = {
+    (False, False): GL_V3F,
+    (True, False): GL_T2F_V3F,
+    (False, True): GL_N3F_V3F,
+    (True, True): GL_T2F_N3F_V3F,
+}
+
+def weld_corners(tri_v, tri_vt, tri_vn):
+    """
+    De-duplicate triangle corners by their (v, vt, vn) index triple.
+    Each triple is packed into one int64 key when the index ranges allow it
+    (v_range * vt_range * vn_range < 2**63); otherwise the triples are
+    compared row by row, which is slower but cannot collide.
+    Returns (unique_corners, indices): unique_corners is (M, 3) of
+    (v, vt, vn) with -1 for missing, indices the uint32 index buffer.
+    """
+    v = tri_v.reshape(-1).astype(np.int64)
+    vt = tri_vt.reshape(-1).astype(np.int64) + 1
+    vn = tri_vn.reshape(-1).astype(np.int64) + 1
+    if len(v) == 0:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.uint32)
+
+    # Python ints: the product itself must not overflow
+    v_range = int(v.max()) + 1
+    vt_range = int(vt.max()) + 1
+    vn_range = int(vn.max()) + 1
+    if int(v.min()) >= 0 and v_range * vt_range * vn_range < 2 ** 63:
+        keys = (v * vt_range + vt) * vn_range + vn
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(np.stack([v, vt, vn], axis=1), axis=0,
+                                      return_index=True, return_inverse=True)
+    unique_corners = np.stack([v[first], vt[first] - 1, vn[first] - 1], axis=1)
+    return unique_corners, inverse.reshape(-1).astype(np.uint32)
+
+def smooth_normals(positions, indices):
+    """
+    Area-weighted average of the face normals around each vertex of an
+    indexed triangle list; (0, 0, 1), GL's default normal, where they cancel.
+    """
+    tris = positions[indices.reshape(-1, 3).astype(np.int64)]
+    face = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    normals = np.zeros((len(positions), 3), dtype=np.float64)
+    for k in range(3):
+        np.add.at(normals, indices[k::3].astype(np.int64), face)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, length, out=np.zeros_like(normals), where=length > 1e-20)
+    normals[length[:, 0] <= 1e-20] = (0.0, 0.0, 1.0)
+    return normals.astype(np.float32)
+
 class OBJModel:
     def __init__(self, filename):
-        self.vertices = []
-        self.normals = []
-        self.texcoords = []
-        self.faces = []
+        self.vertices = np.zeros((0, 3), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.float32)
         self.has_normals = False
         self.has_texcoords = False
+
+        # Welded geometry: one interleaved row per unique corner + index buffer
+        self.vertex_data = np.zeros((0, 3), dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.uint32)
+        self.vertex_format = GL_V3F
+
+        # GPU copies, created on the first render()
+        self.use_buffers = True
+        self.vbo = None
+        self.ibo = None
         
         self.load(filename)
     
@@ -26,81 +92,98 @@ class OBJModel:
         
         print(f"Loading OBJ file: {filename}")
         
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                
-                parts = line.split()
-                if not parts:
-                    continue
-                
-                # Vertex position
-                if parts[0] == 'v':
-                    x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                    self.vertices.append((x, y, z))
-                
-                # Vertex normal
-                elif parts[0] == 'vn':
-                    nx, ny, nz = float(parts[1]), float(parts[2]), float(parts[3])
-                    self.normals.append((nx, ny, nz))
-                    self.has_normals = True
-                
-                # Texture coordinate
-                elif parts[0] == 'vt':
-                    u, v = float(parts[1]), float(parts[2])
-                    self.texcoords.append((u, v))
-                    self.has_texcoords = True
-                
-                # Face
-                elif parts[0] == 'f':
-                    face = []
-                    for vertex_str in parts[1:]:
-                        indices = vertex_str.split('/')
-                        
-                        v_idx = int(indices[0]) - 1  
-                        vt_idx = None
-                        vn_idx = None
-                        
-                        if len(indices) >= 2 and indices[1]:
-                            vt_idx = int(indices[1]) - 1
-                        
-                        if len(indices) >= 3 and indices[2]:
-                            vn_idx = int(indices[2]) - 1
-                        
-                        face.append((v_idx, vt_idx, vn_idx))
-                    
-                    # Convert quads to triangles
-                    if len(face) == 3:
-                        self.faces.append(face)
-                    elif len(face) == 4:
-                        # Split quad into two triangles
-                        self.faces.append([face[0], face[1], face[2]])
-                        self.faces.append([face[0], face[2], face[3]])
+        data = parse_obj_file(filename)
+        self.vertices = data.positions
+        self.normals = data.normals
+        self.texcoords = data.texcoords
+        self.has_normals = len(self.normals) > 0
+        self.has_texcoords = len(self.texcoords) > 0
+
+        self.build_vertex_data(data)
         
-        print(f"Loaded: {len(self.vertices)} vertices, {len(self.normals)} normals, {len(self.faces)} faces")
+        print(f"Loaded: {len(self.vertices)} vertices, {len(self.normals)} normals, {self.triangle_count()} faces")
+        print(f"Parsed {data.bytes_read / 1024:.1f} KB in {data.seconds * 1000:.1f} ms ({data.mb_per_s:.1f} MB/s)")
+        print(f"Welded {len(self.indices)} corners into {len(self.vertex_data)} unique vertices")
+
+    def build_vertex_data(self, data):
+        corners, self.indices = weld_corners(data.tri_v, data.tri_vt, data.tri_vn)
+
+        # Columns in glInterleavedArrays order: texcoord, normal, position.
+        # Corners without a vt get (0, 0); corners without a vn get the
+        # smoothed face normal around them.
+        positions = self.gather(self.vertices, corners[:, 0])
+        columns = []
+        if self.has_texcoords:
+            columns.append(self.gather(self.texcoords, corners[:, 1]))
+        if self.has_normals:
+            normals = self.gather(self.normals, corners[:, 2])
+            missing = (corners[:, 2] < 0) | (corners[:, 2] >= len(self.normals))
+            if missing.any():
+                normals[missing] = smooth_normals(positions, self.indices)[missing]
+            columns.append(normals)
+        columns.append(positions)
+
+        self.vertex_data = np.ascontiguousarray(np.hstack(columns), dtype=np.float32)
+        self.vertex_format = INTERLEAVED_FORMATS[(self.has_texcoords, self.has_normals)]
+        self.delete_buffers()
+
+    @staticmethod
+    def gather(values, idx):
+        out = np.zeros((len(idx), values.shape[1]), dtype=np.float32)
+        valid = (idx >= 0) & (idx < len(values))
+        out[valid] = values[idx[valid]]
+        return out
+
+    def triangle_count(self):
+        return len(self.indices) // 3
+
+    def upload(self):
+        self.vbo, self.ibo = (int(b) for b in glGenBuffers(2))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertex_data.nbytes, self.vertex_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def delete_buffers(self):
+        if self.vbo is not None:
+            glDeleteBuffers(2, [self.vbo, self.ibo])
+        self.vbo = self.ibo = None
     
     def render(self):
-        glBegin(GL_TRIANGLES)
-        
-        for face in self.faces:
-            for v_idx, vt_idx, vn_idx in face:
-                # Set normal if available
-                if vn_idx is not None and vn_idx < len(self.normals):
-                    glNormal3fv(self.normals[vn_idx])
-                
-                # Set texture coordinate if available
-                if vt_idx is not None and vt_idx < len(self.texcoords):
-                    glTexCoord2fv(self.texcoords[vt_idx])
-                
-                # Set vertex position
-                if v_idx < len(self.vertices):
-                    glVertex3fv(self.vertices[v_idx])
-        
-        glEnd()
+        if len(self.indices) == 0:
+            return
+
+        if self.use_buffers:
+            try:
+                self.render_buffers()
+                return
+            except (GLError, NullFunctionError):
+                # No buffer-object support: draw from client-side arrays instead
+                self.use_buffers = False
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(self.vertex_format, 0, self.vertex_data)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, self.indices)
+        glPopClientAttrib()
+
+    def render_buffers(self):
+        if self.vbo is None:
+            self.upload()
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glInterleavedArrays(self.vertex_format, 0, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, None)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glPopClientAttrib()
 
 def init_pygame_opengl():
     pygame.init()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Headless: must be set before pygame is imported anywhere
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# The labs import their modules by plain name, as when run from their folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for lab_dir in ("lab4", "lab5", "lab8", "Homework_04"):
+    sys.path.insert(0, os.path.join(ROOT, lab_dir))
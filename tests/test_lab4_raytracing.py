@@ -0,0 +1,129 @@
+import math
+import numpy as np
+import pytest
+
+import tri_packet
+from tri_packet import TriangleSoA, intersect_packet
+from lab04_1_Real_Ray_Tracing import ray_sphere_intersect, ray_sphere_intersect_batch
+from lab04_2_OpenGL import (build_bvh, refit_bvh, bvh_closest_hit, intersect_triangle,
+                            build_rotated_box_mesh)
+
+
+def random_dirs(rng, n):
+    d = rng.normal(size=(n, 3))
+    return d / np.linalg.norm(d, axis=1, keepdims=True)
+
+
+def random_triangles(rng, n, spread=3.0):
+    centers = rng.uniform(-spread, spread, size=(n, 1, 3))
+    return [tuple(map(tuple, tri)) for tri in (centers + rng.normal(scale=0.6, size=(n, 3, 3))).tolist()]
+
+
+def closest_scalar(origin, direction, triangles):
+    # Nearest hit over all triangles with the scalar Möller–Trumbore test
+    best_t, best_id = math.inf, -1
+    for i, (v0, v1, v2) in enumerate(triangles):
+        hit, t, _ = intersect_triangle(origin, direction, v0, v1, v2)
+        if hit and t < best_t:
+            best_t, best_id = t, i
+    return best_t, best_id
+
+
+# -------------------------
+# Sphere tracer
+# -------------------------
+@pytest.mark.parametrize("eye", [(0.0, 0.5, -4.0), (0.2, 0.1, 0.3)])
+def test_sphere_batch_matches_scalar(eye):
+    rng = np.random.default_rng(1)
+    d = random_dirs(rng, 2000)
+    # Aim half the rays at the sphere so both hits and misses are covered
+    d[:1000] = (np.array([0.0, 0.0, 0.0]) - eye) + rng.normal(scale=0.3, size=(1000, 3))
+    center, radius = (0.0, 0.0, 0.0), 1.0
+
+    t = ray_sphere_intersect_batch(eye, d, center, radius)
+    for i in range(len(d)):
+        expected = ray_sphere_intersect(eye, tuple(d[i]), center, radius)
+        if expected is None:
+            assert t[i] == np.inf
+        else:
+            assert t[i] == pytest.approx(expected, rel=1e-9)
+
+
+# -------------------------
+# Packet triangle kernel
+# -------------------------
+def test_packet_matches_scalar():
+    rng = np.random.default_rng(2)
+    triangles = random_triangles(rng, 40)
+    origins = rng.normal(scale=0.5, size=(300, 3))
+    dirs = random_dirs(rng, 300)
+
+    t, tri_id, u, v = intersect_packet(origins, dirs, TriangleSoA(triangles))
+    assert np.isfinite(t).any() and not np.isfinite(t).all()
+    for i in range(len(dirs)):
+        best_t, best_id = closest_scalar(tuple(origins[i]), tuple(dirs[i]), triangles)
+        assert tri_id[i] == best_id
+        if best_id >= 0:
+            assert t[i] == pytest.approx(best_t, rel=1e-9)
+            assert 0.0 <= u[i] <= 1.0 and 0.0 <= v[i] and u[i] + v[i] <= 1.0
+
+
+def test_packet_chunking(monkeypatch):
+    rng = np.random.default_rng(3)
+    soa = TriangleSoA(random_triangles(rng, 150))
+    origin = np.zeros(3)
+    dirs = random_dirs(rng, 500)
+    expected = intersect_packet(origin, dirs, soa)
+
+    # More rays and triangles than fit in one step
+    monkeypatch.setattr(tri_packet, "MAX_PAIRS", 1000)
+    chunked = intersect_packet(origin, dirs, soa)
+    for a, b in zip(expected, chunked):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_packet_empty():
+    soa = TriangleSoA(np.zeros((0, 3, 3)))
+    t, tri_id, _, _ = intersect_packet(np.zeros(3), np.ones((4, 3)), soa)
+    assert np.all(np.isinf(t)) and np.all(tri_id == -1)
+
+
+# -------------------------
+# BVH
+# -------------------------
+def check_bvh(bvh, triangles, rng, n_rays=300):
+    # Rays from around the scene, roughly towards its center
+    hits = 0
+    for _ in range(n_rays):
+        origin = tuple(rng.normal(scale=6.0, size=3))
+        direction = tuple(random_dirs(rng, 1)[0] * 0.5 - np.array(origin) / 12.0)
+        norm = math.sqrt(sum(c * c for c in direction))
+        direction = tuple(c / norm for c in direction)
+
+        t, normal = bvh_closest_hit(bvh, origin, direction)
+        best_t, best_id = closest_scalar(origin, direction, triangles)
+        if best_id < 0:
+            assert t == math.inf and normal is None
+        else:
+            assert t == pytest.approx(best_t, rel=1e-12)
+            hits += 1
+    assert hits > 0
+
+
+def test_bvh_matches_brute_force():
+    rng = np.random.default_rng(4)
+    triangles = random_triangles(rng, 200)
+    bvh = build_bvh(triangles)
+    assert sorted(bvh.tri_ids) == list(range(len(triangles)))
+    check_bvh(bvh, triangles, rng)
+
+
+def test_refit_matches_rebuild():
+    rng = np.random.default_rng(5)
+    bvh = build_bvh(build_rotated_box_mesh(0.0))
+    moved = build_rotated_box_mesh(37.0)
+    refit_bvh(bvh, moved)
+
+    rebuilt = build_bvh(moved)
+    np.testing.assert_allclose([bvh.root.bmin, bvh.root.bmax], [rebuilt.root.bmin, rebuilt.root.bmax])
+    check_bvh(bvh, moved, rng)
@@ -0,0 +1,125 @@
+import os
+import numpy as np
+import pytest
+from ObjParser import parse_obj_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_obj(tmp_path, text, name="mesh.obj"):
+    path = tmp_path / name
+    path.write_bytes(text.encode())
+    return str(path)
+
+
+QUAD = "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3 4\n"
+
+
+def test_inline_comments(tmp_path):
+    plain = parse_obj_file(write_obj(tmp_path, QUAD, "plain.obj"))
+    commented = parse_obj_file(write_obj(tmp_path, (
+        "# header\n"
+        "v 0 0 0 # note\n"
+        "v 1 0 0#no space\n"
+        "v 1 1 0\n"
+        "v 0 1 0\n"
+        "f 1 2 3 4 # c\n"), "commented.obj"))
+
+    np.testing.assert_array_equal(commented.positions, plain.positions)
+    np.testing.assert_array_equal(commented.tri_v, plain.tri_v)
+
+
+def test_line_continuations(tmp_path):
+    plain = parse_obj_file(write_obj(tmp_path, QUAD, "plain.obj"))
+    continued = parse_obj_file(write_obj(tmp_path, (
+        "v 0 0 0\n"
+        "v 1 0 \\\n0\n"
+        "v 1 1 0\n"
+        "v 0 1 \\\r\n0\r\n"
+        "f 1 2 \\\n3 4"), "continued.obj"))
+
+    np.testing.assert_array_equal(continued.positions, plain.positions)
+    np.testing.assert_array_equal(continued.tri_v, plain.tri_v)
+
+
+def test_continuation_across_chunks(tmp_path):
+    text = "".join("v %d 0 \\\n0 # x\n" % i for i in range(50)) + "f 1 2 3\n"
+    data = parse_obj_file(write_obj(tmp_path, text), chunk_size=7)
+
+    assert len(data.positions) == 50
+    np.testing.assert_array_equal(data.positions[:, 0], np.arange(50))
+    np.testing.assert_array_equal(data.tri_v, [[0, 1, 2]])
+
+
+@pytest.mark.parametrize("text, line, message", [
+    ("v 0 0 0\nv 1 x 0\n", 2, "malformed vertex record"),
+    ("v 0 0 0\n# c\nv 1 1\n", 3, "fewer than 3 values"),
+    (QUAD + "f 1 2 a\n", 6, "malformed face record"),
+    (QUAD + "f 1 2/1 3\n", 6, "mix different"),
+])
+def test_errors_name_file_and_line(tmp_path, text, line, message):
+    path = write_obj(tmp_path, text)
+    with pytest.raises(ValueError, match=message) as error:
+        parse_obj_file(path, chunk_size=16)
+    assert str(error.value).startswith("%s:%d:" % (path, line))
+
+
+def parse_scalar(filename):
+    # Line-by-line reference (the OBJModel loader before the bulk parser),
+    # with n-gons fan-triangulated and negative indices resolved
+    positions, texcoords, normals, tris = [], [], [], []
+    with open(filename) as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                positions.append([float(x) for x in parts[1:4]])
+            elif parts[0] == "vt":
+                texcoords.append([float(x) for x in parts[1:3]])
+            elif parts[0] == "vn":
+                normals.append([float(x) for x in parts[1:4]])
+            elif parts[0] == "f":
+                face = []
+                for corner in parts[1:]:
+                    indices = corner.split("/") + ["", ""]
+                    counts = (len(positions), len(texcoords), len(normals))
+                    face.append([(int(s) - 1 if int(s) > 0 else n + int(s)) if s else -1
+                                 for s, n in zip(indices[:3], counts)])
+                for i in range(1, len(face) - 1):
+                    tris.append([face[0], face[i], face[i + 1]])
+    return (np.array(positions, dtype=np.float32).reshape(-1, 3),
+            np.array(texcoords, dtype=np.float32).reshape(-1, 2),
+            np.array(normals, dtype=np.float32).reshape(-1, 3),
+            np.array(tris, dtype=np.int32).reshape(-1, 3, 3))
+
+
+@pytest.mark.parametrize("filename", ["lab5/cube.obj", "lab5/teapot.obj", "lab8/icecream.obj"])
+def test_matches_scalar_parser(filename):
+    path = os.path.join(ROOT, filename)
+    positions, texcoords, normals, tris = parse_scalar(path)
+    data = parse_obj_file(path)
+
+    np.testing.assert_array_equal(data.positions, positions)
+    np.testing.assert_array_equal(data.texcoords, texcoords)
+    np.testing.assert_array_equal(data.normals, normals)
+    np.testing.assert_array_equal(data.tri_v, tris[:, :, 0])
+    np.testing.assert_array_equal(data.tri_vt, tris[:, :, 1])
+    np.testing.assert_array_equal(data.tri_vn, tris[:, :, 2])
+
+
+def test_mixed_layouts_and_negative_indices(tmp_path):
+    path = write_obj(tmp_path, (
+        "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n"
+        "vt 0 0\nvt 1 0\nvt 1 1\n"
+        "vn 0 0 1\n"
+        "f 1 2 3\n"
+        "f 1/1 2/2 3/3\n"
+        "f 1//1 3//1 4//1\n"
+        "f -4/-3/-1 -3/-2/-1 -2/-1/-1 -1/-1/-1\n"))
+    positions, texcoords, normals, tris = parse_scalar(path)
+    data = parse_obj_file(path, chunk_size=32)
+
+    np.testing.assert_array_equal(data.tri_v, tris[:, :, 0])
+    np.testing.assert_array_equal(data.tri_vt, tris[:, :, 1])
+    np.testing.assert_array_equal(data.tri_vn, tris[:, :, 2])
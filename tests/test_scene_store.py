@@ -0,0 +1,192 @@
+import numpy as np
+import pytest
+
+from store import ObjectStore, COLUMNS, TYPE_SPHERE, TYPE_BOX
+from objects import SphereObject, BoxObject, make_view
+from spatial import LooseOctree, extract_frustum_planes, sphere_in_frustum
+from io_scene import SAVED_COLUMNS, write_scene_file, SceneFile, zstandard
+
+
+def random_columns(rng, n):
+    return {
+        "type_id": rng.integers(0, 2, size=n).astype(np.uint8),
+        "position": rng.uniform(-50, 50, size=(n, 3)).astype(np.float32),
+        "scale": rng.uniform(0.1, 3.0, size=n).astype(np.float32),
+        "color": rng.uniform(0, 1, size=(n, 4)).astype(np.float32),
+        "material": rng.uniform(0, 60, size=(n, 2)).astype(np.float32),
+    }
+
+
+def check_rows(store):
+    assert len(store.objects) == store.count
+    for row, obj in enumerate(store.objects):
+        assert obj.store is store and obj.row == row
+
+
+# -------------------------
+# ObjectStore
+# -------------------------
+def test_store_extend_and_remove():
+    rng = np.random.default_rng(9)
+    columns = random_columns(rng, 200)
+    store = ObjectStore(4)
+    store.extend(columns, make_view)
+    check_rows(store)
+    for name, values in columns.items():
+        np.testing.assert_array_equal(getattr(store, name)[:store.count], values)
+
+    # Each object keeps its own attributes whichever rows get removed
+    expected = {id(obj): (obj.position.tolist(), obj.scale, obj.type_id) for obj in store.objects}
+    for _ in range(150):
+        store.remove(store.objects[rng.integers(store.count)])
+        check_rows(store)
+    for obj in store.objects:
+        assert (obj.position.tolist(), obj.scale, obj.type_id) == expected[id(obj)]
+    assert store.count == 50
+
+
+def test_store_adopt_and_detach():
+    store = ObjectStore()
+    sphere = SphereObject(position=(1, 2, 3), radius=2.0, color=(1, 0, 0, 0.5))
+    box = BoxObject(position=(4, 5, 6), size=3.0)
+    store.adopt(sphere)
+    store.adopt(box)
+    check_rows(store)
+    assert store.type_id[:2].tolist() == [TYPE_SPHERE, TYPE_BOX]
+
+    store.detach(sphere)
+    check_rows(store)
+    assert sphere.store is not store and sphere.store.count == 1
+    assert sphere.position.tolist() == [1, 2, 3] and sphere.radius == 2.0
+    assert sphere.color.tolist() == [1, 0, 0, 0.5]
+    assert box.row == 0 and box.size == 3.0
+
+    store.detach_all()
+    assert store.count == 0 and box.store.count == 1 and box.position.tolist() == [4, 5, 6]
+
+
+def test_store_grows():
+    store = ObjectStore(1)
+    objects = [SphereObject(position=(i, 0, 0)) for i in range(100)]
+    for obj in objects:
+        store.adopt(obj)
+    assert store.capacity >= 100
+    check_rows(store)
+    assert [obj.position[0] for obj in objects] == list(range(100))
+
+
+# -------------------------
+# Loose octree
+# -------------------------
+def perspective(fovy, aspect, near, far):
+    f = 1.0 / np.tan(np.radians(fovy) / 2.0)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def look_at(eye, target, up=(0.0, 1.0, 0.0)):
+    eye = np.asarray(eye, dtype=np.float64)
+    forward = np.asarray(target, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    up = np.cross(side, forward)
+    m = np.identity(4)
+    m[0, :3], m[1, :3], m[2, :3] = side, up, -forward
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+@pytest.mark.parametrize("eye, target", [((0, 8, 30), (0, 0, 0)), ((40, 5, -10), (-20, 0, 5))])
+def test_octree_query_matches_brute_force(eye, target):
+    rng = np.random.default_rng(10)
+    objects = []
+    for _ in range(3000):
+        position = tuple(rng.uniform(-60, 60, size=3))
+        if rng.random() < 0.5:
+            objects.append(SphereObject(position=position, radius=rng.uniform(0.1, 4.0)))
+        else:
+            objects.append(BoxObject(position=position, size=rng.uniform(0.1, 4.0)))
+    # A few far and huge objects end up outside the root
+    objects.append(SphereObject(position=(5e6, 0, 0), radius=1.0))
+    objects.append(SphereObject(position=(0, 0, 0), radius=1000.0))
+
+    octree = LooseOctree(half_size=16.0)
+    for obj in objects:
+        octree.insert(obj)
+    assert len(octree) == len(objects)
+
+    # Column-major like glGetDoublev
+    planes = extract_frustum_planes(perspective(45.0, 4 / 3, 0.1, 200.0).T.reshape(-1),
+                                    look_at(eye, target).T.reshape(-1))
+    visible = {id(obj) for obj in octree.query(planes)}
+    expected = {id(obj) for obj in objects
+                if sphere_in_frustum(planes, list(obj.position), obj.bounding_radius)}
+    assert visible == expected
+    assert 0 < len(visible) < len(objects)
+
+    # Moved and removed objects are found where they are now
+    for obj in objects[:500]:
+        obj.store.position[obj.row] += rng.uniform(-10, 10, size=3).astype(np.float32)
+        octree.update(obj)
+    for obj in objects[500:800]:
+        octree.remove(obj)
+    kept = objects[:500] + objects[800:]
+    visible = {id(obj) for obj in octree.query(planes)}
+    expected = {id(obj) for obj in kept
+                if sphere_in_frustum(planes, list(obj.position), obj.bounding_radius)}
+    assert visible == expected
+
+
+# -------------------------
+# Scene files
+# -------------------------
+CODECS = [None, "zlib", pytest.param("zstd", marks=pytest.mark.skipif(
+    zstandard is None, reason="zstandard is not installed"))]
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_scene_file_round_trip(tmp_path, compression):
+    rng = np.random.default_rng(11)
+    store = ObjectStore()
+    store.extend(random_columns(rng, 1000), make_view)
+    path = str(tmp_path / "scene.bin")
+    write_scene_file(store, path, compression)
+
+    with SceneFile(path) as scene_file:
+        assert scene_file.count == 1000
+        columns = scene_file.columns()
+        for name in SAVED_COLUMNS:
+            assert columns[name].dtype == np.dtype(COLUMNS[name][1])
+            np.testing.assert_array_equal(columns[name], getattr(store, name)[:store.count])
+        del columns
+
+
+def test_scene_file_empty_store(tmp_path):
+    path = str(tmp_path / "scene.bin")
+    write_scene_file(ObjectStore(), path)
+    with SceneFile(path) as scene_file:
+        assert scene_file.count == 0
+        assert scene_file.column("position").shape == (0, 3)
+
+
+def test_scene_file_rejects_bad_files(tmp_path):
+    store = ObjectStore()
+    store.extend(random_columns(np.random.default_rng(12), 100), make_view)
+    path = tmp_path / "scene.bin"
+    write_scene_file(store, str(path))
+    data = path.read_bytes()
+
+    for name, content in [("empty.bin", b""), ("header.bin", data[:10]),
+                          ("truncated.bin", data[:len(data) - 100]), ("magic.bin", b"XXXX" + data[4:])]:
+        bad = tmp_path / name
+        bad.write_bytes(content)
+        with pytest.raises(ValueError):
+            SceneFile(str(bad))
+
+    with pytest.raises(ValueError):
+        write_scene_file(store, str(path), compression="lz4")
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from lab8_4 import weld_corners
+
+
+def random_corners(rng, n_tris, v_max, vt_max, vn_max):
+    # (n_tris, 3) index arrays drawn from small pools so corners repeat
+    tri_v = rng.integers(0, v_max, size=(n_tris, 3))
+    tri_vt = rng.integers(-1, vt_max, size=(n_tris, 3))
+    tri_vn = rng.integers(-1, vn_max, size=(n_tris, 3))
+    return tri_v, tri_vt, tri_vn
+
+
+def check_weld(tri_v, tri_vt, tri_vn):
+    unique_corners, indices = weld_corners(tri_v, tri_vt, tri_vn)
+    corners = np.stack([tri_v.reshape(-1), tri_vt.reshape(-1), tri_vn.reshape(-1)], axis=1)
+
+    assert indices.dtype == np.uint32
+    # Every corner maps back to its own (v, vt, vn) and no triple is stored twice
+    np.testing.assert_array_equal(unique_corners[indices], corners)
+    assert len(np.unique(unique_corners, axis=0)) == len(unique_corners)
+    assert len(unique_corners) == len({tuple(c) for c in corners.tolist()})
+
+
+def test_packed_keys():
+    rng = np.random.default_rng(6)
+    check_weld(*random_corners(rng, 500, 50, 20, 10))
+
+
+def test_large_ranges_fall_back_to_rows():
+    # v * vt * vn ranges past 2**63: the packed key would overflow
+    rng = np.random.default_rng(7)
+    big = 3 * 10 ** 6
+    tri_v, tri_vt, tri_vn = random_corners(rng, 300, 40, 20, 10)
+    tri_v = tri_v * (big // 40)
+    tri_vt = np.where(tri_vt >= 0, tri_vt * (big // 20), -1)
+    tri_vn = np.where(tri_vn >= 0, tri_vn * (big // 10), -1)
+    check_weld(tri_v, tri_vt, tri_vn)
+
+
+@pytest.mark.parametrize("n_tris", [0, 1])
+def test_small_inputs(n_tris):
+    rng = np.random.default_rng(8)
+    check_weld(*random_corners(rng, n_tris, 5, 5, 5))